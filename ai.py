@@ -1,19 +1,39 @@
 import os
+import re
 import json
 import time
+import hashlib
+import queue
+import asyncio
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import FastAPI, HTTPException, Query, Path
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from typing import Optional, List, Dict, Any, Union
 from dotenv import load_dotenv
 from web3 import Web3
 from web3.auto import w3
 from eth_account import Account
 from crewai import Agent, Task, Crew, LLM, Process
-from crewai_tools import SerperDevTool
 import uvicorn
 import logging
+from workers import WorkerPool, PoolSaturatedError, SingleFlight, CommitQueue, BatchWriter
+from jobs import JobStore
+from caching import LRUCache, PersistentCache
+from search_tools import CachedSearchTool
+from tx_manager import SignerPool, FeeOracle, GasModel, ReceiptTracker, is_nonce_error, payload_size, payload_items
+from payload_codec import encode_result, decode_result
+from blob_store import BlobStore, BlobAnchor, BlobIntegrityError
+from contract_state import ContractStateCache, COMPLETION_EVENTS, event_topics, deployed_functions, decode_log
+from chain_reader import BatchReader, MULTICALL3_ADDRESS
+from chain_index import ChainIndex
+from tx_index import TxIndex, sent_tasks
+from crew_results import RealEstateAnalysisOutput, ANALYSIS_FIELDS, crew_output_record, extract_answer, normalize_crew_result
 
 # Initialize FastAPI app
 app = FastAPI(title="OnChain Real Estate AI", description="API for processing real estate analysis tasks and storing results on the blockchain")
@@ -110,35 +130,43 @@ if not Web3.is_address(CONTRACT_ADDRESS):
     raise ValueError(f"Invalid CONTRACT_ADDRESS format: {CONTRACT_ADDRESS}")
 
 # Initialize Web3 with Arbitrum
-web3 = Web3(Web3.HTTPProvider(ARBITRUM_RPC_URL))
+# Creating the provider is local; no RPC round trip happens until the first call
+RPC_TIMEOUT = float(os.getenv("RPC_TIMEOUT", "10"))
+web3 = Web3(Web3.HTTPProvider(ARBITRUM_RPC_URL, request_kwargs={"timeout": RPC_TIMEOUT}))
 
-# Validate connection to Arbitrum Sepolia
-try:
-    chain_id = web3.eth.chain_id
-    if chain_id == 421614:  # Arbitrum Sepolia chain ID
-        logger.info(f"Successfully connected to Arbitrum Sepolia (Chain ID: {chain_id})")
-    else:
-        logger.warning(f"Connected to unexpected chain ID: {chain_id} (Expected: 421614 for Arbitrum Sepolia)")
-    
-    # Check if we're connected
-    if web3.is_connected():
-        logger.info(f"Web3 connection successful: {ARBITRUM_RPC_URL}")
-    else:
-        logger.error(f"Web3 connection failed: {ARBITRUM_RPC_URL}")
-        raise ConnectionError(f"Could not connect to Arbitrum Sepolia: {ARBITRUM_RPC_URL}")
-        
-except Exception as e:
-    logger.error(f"Error validating Arbitrum connection: {str(e)}")
-    raise
+# Contract writes are spread over the service account and the extra keys in SIGNER_PRIVATE_KEYS
+# (comma separated), each with its own in-memory nonce sequence so several transactions can be in flight
+SIGNER_PRIVATE_KEYS = [key.strip() for key in os.getenv("SIGNER_PRIVATE_KEYS", "").split(",") if key.strip()]
+signer_pool = SignerPool(
+    web3,
+    [account] + [Account.from_key(key) for key in SIGNER_PRIVATE_KEYS],
+    strategy=os.getenv("SIGNER_STRATEGY", "least_pending")
+)
+logger.info(f"Signing with {len(signer_pool)} account(s): {', '.join(signer.address for signer in signer_pool.signers)}")
+
+# Gas limits are learned from receipts; estimate_gas is only used for unseen shapes
+DEFAULT_GAS_LIMIT = int(os.getenv("DEFAULT_GAS_LIMIT", "3000000"))
+gas_model = GasModel(
+    safety_margin=float(os.getenv("GAS_SAFETY_MARGIN", "1.25")),
+    bucket_size=int(os.getenv("GAS_BUCKET_SIZE", "32"))
+)
 
-# Verify wallet address has funds
-wallet_balance = web3.eth.get_balance(account.address)
-wallet_balance_eth = web3.from_wei(wallet_balance, 'ether')
-logger.info(f"Wallet address: {account.address}")
-logger.info(f"Wallet balance: {wallet_balance_eth} ETH")
+# Receipts of submitted transactions are polled from one background loop
+TX_CONFIRMATION_TIMEOUT = float(os.getenv("TX_CONFIRMATION_TIMEOUT", "30"))
+receipt_tracker = ReceiptTracker(
+    web3,
+    poll_interval=float(os.getenv("RECEIPT_POLL_INTERVAL", "1")),
+    timeout=float(os.getenv("RECEIPT_TRACK_TIMEOUT", "600")),
+    late_timeout=float(os.getenv("RECEIPT_LATE_TIMEOUT", "3600"))
+)
 
-if wallet_balance == 0:
-    logger.warning("Wallet has zero balance. Transactions will fail.")
+# Fee parameters are refreshed in the background once the server starts
+fee_oracle = FeeOracle(
+    web3,
+    ttl=float(os.getenv("FEE_REFRESH_INTERVAL", "5")),
+    max_age=float(os.getenv("FEE_MAX_AGE", "30")),
+    base_fee_multiplier=float(os.getenv("FEE_BASE_MULTIPLIER", "2"))
+)
 
 # Load contract ABI (Application Binary Interface)
 contract_abi = None
@@ -165,128 +193,285 @@ if contract_abi is None:
     raise FileNotFoundError(f"ABI file not found in any of the expected locations: {ABI_PATHS}")
 
 contract = web3.eth.contract(address=CONTRACT_ADDRESS, abi=contract_abi)
+available_functions = [fn['name'] for fn in contract.abi if fn['type'] == 'function']
+logger.info(f"Available contract functions: {available_functions}")
 
-# Validate contract is deployed and accessible
-contract_validated = False
-try:
-    # Try different ways to validate the contract is deployed
-    available_functions = [fn['name'] for fn in contract.abi if fn['type'] == 'function']
-    logger.info(f"Available contract functions: {available_functions}")
+# Owner, operators, task counter and string limit, read once and kept current from the contract's logs
+contract_state = ContractStateCache(
+    web3,
+    contract,
+    poll_interval=float(os.getenv("CONTRACT_STATE_POLL_INTERVAL", "2")),
+    max_age=float(os.getenv("CONTRACT_STATE_MAX_AGE", "30"))
+)
+
+# Tasks per getTasksRange or getTaskSummaries call when listing tasks
+TASK_PAGE_SIZE = int(os.getenv("TASK_PAGE_SIZE", "50"))
+
+# Most tasks one /tasks request may list
+TASK_LIST_MAX_COUNT = int(os.getenv("TASK_LIST_MAX_COUNT", "1000"))
+
+# Task listings read many tasks in one round trip, through Multicall3 when the chain has it
+chain_reader = BatchReader(
+    web3,
+    mode=os.getenv("CHAIN_READ_MODE", "auto"),
+    multicall_address=os.getenv("MULTICALL_ADDRESS", MULTICALL3_ADDRESS),
+    chunk_size=int(os.getenv("MULTICALL_CHUNK_SIZE", "50"))
+)
+
+# Local SQLite index of the contract's logs; the read endpoints answer from it while it is fresh
+CHAIN_INDEX_ENABLED = os.getenv("CHAIN_INDEX_ENABLED", "true").lower() == "true"
+chain_index = ChainIndex(
+    web3,
+    contract,
+    os.getenv("CHAIN_INDEX_PATH", os.path.join("results", "chain_index.db")),
+    start_block=int(os.getenv("CHAIN_INDEX_START_BLOCK")) if os.getenv("CHAIN_INDEX_START_BLOCK") else None,
+    confirmations=int(os.getenv("CHAIN_INDEX_CONFIRMATIONS", "6")),
+    poll_interval=float(os.getenv("CHAIN_INDEX_POLL_INTERVAL", "2")),
+    max_age=float(os.getenv("CHAIN_INDEX_MAX_AGE", "30"))
+) if CHAIN_INDEX_ENABLED else None
+
+# Read-through cache of tasks read from the chain. A completed task never changes, so it stays
+# until the memory budget evicts it; other tasks expire after TASK_CACHE_PENDING_TTL seconds or
+# when the contract state follower sees them completed
+TASK_CACHE_ENABLED = os.getenv("TASK_CACHE_ENABLED", "true").lower() == "true"
+TASK_CACHE_PENDING_TTL = float(os.getenv("TASK_CACHE_PENDING_TTL", "5"))
+chain_task_cache = LRUCache(
+    max_entries=int(os.getenv("TASK_CACHE_MAX_ENTRIES", "100000")),
+    max_bytes=int(os.getenv("TASK_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+) if TASK_CACHE_ENABLED else None
+if chain_task_cache is not None:
+    contract_state.add_listener(COMPLETION_EVENTS, lambda event: chain_task_cache.delete(event["args"]["id"]))
+
+# Task events by topic0, so receipt logs are decoded without trying each event in turn
+task_event_topics = event_topics(contract, ("TaskCreated",) + COMPLETION_EVENTS)
+
+# Persistent map of the transactions we send to the tasks they carry, recorded at send time,
+# so lookups by our own transaction hashes need no RPC; the most recent ones stay in memory
+tx_index = TxIndex(
+    os.getenv("TX_INDEX_PATH", os.path.join("results", "tx_index.db")),
+    memory_entries=int(os.getenv("TX_INDEX_MEMORY_ENTRIES", "1024"))
+)
+
+# Commit each analysis with one createAndCompleteTask transaction when the contract has it
+SINGLE_TX_COMMIT = os.getenv("SINGLE_TX_COMMIT", "true").lower() == "true"
+
+# Write results as compressed bytes (see payload_codec.py) when the contract has the packed functions
+PACKED_RESULTS = os.getenv("PACKED_RESULTS", "true").lower() == "true"
+
+# Keep results in a local content-addressed blob store and anchor only their digest on-chain (see blob_store.py)
+# Anchored results are read back from the store whether or not BLOB_RESULTS is still set
+BLOB_RESULTS = os.getenv("BLOB_RESULTS", "false").lower() == "true"
+blob_store = BlobStore(os.getenv("BLOB_STORE_DIR", os.path.join("results", "blobs")))
+
+# The LLM, search tool and agent rosters are built during the startup phase (see init_llm)
+llm = None
+search_tool = None
+crew_registry = None
+llm_lock = threading.Lock()
+
+# Startup dependency checks
+# Every check that needs the network runs in the background once the server is up,
+# so importing this module (and every uvicorn reload) only pays for local work.
+# Dependencies marked as required must be healthy before /readyz reports ready.
+REQUIRED_DEPENDENCIES = ["rpc", "contract", "llm"]
+
+dependency_status = {}
+dependency_lock = threading.Lock()
+
+def set_dependency_status(name, state, detail=None, latency_ms=None):
+    """
+    Records the state of a startup dependency
+
+    Args:
+        name: Dependency name (rpc, wallet, contract, ownership, llm)
+        state: One of pending, ok, degraded, failed
+        detail: Optional human readable detail
+        latency_ms: Optional probe latency in milliseconds
+    """
+    with dependency_lock:
+        dependency_status[name] = {
+            "state": state,
+            "detail": detail,
+            "latency_ms": latency_ms,
+            "required": name in REQUIRED_DEPENDENCIES,
+            "checked_at": time.strftime("%Y-%m-%d %H:%M:%S") if state != "pending" else None
+        }
+
+def probe_rpc():
+    """Checks the RPC endpoint is reachable and on the expected chain"""
+    if not web3.is_connected():
+        raise ConnectionError(f"Could not connect to Arbitrum Sepolia: {ARBITRUM_RPC_URL}")
+
+    chain_id = web3.eth.chain_id
+    if chain_id == 421614:  # Arbitrum Sepolia chain ID
+        logger.info(f"Successfully connected to Arbitrum Sepolia (Chain ID: {chain_id})")
+        return "ok", f"Chain ID {chain_id}"
+
+    logger.warning(f"Connected to unexpected chain ID: {chain_id} (Expected: 421614 for Arbitrum Sepolia)")
+    return "degraded", f"Unexpected chain ID {chain_id}"
+
+def probe_wallet():
+    """Checks the wallet and every extra signer have funds to pay for transactions"""
+    wallet_balance = web3.eth.get_balance(account.address)
+    wallet_balance_eth = web3.from_wei(wallet_balance, 'ether')
+    logger.info(f"Wallet balance: {wallet_balance_eth} ETH")
+
+    if wallet_balance == 0:
+        logger.warning("Wallet has zero balance. Transactions will fail.")
+        return "degraded", "Wallet has zero balance"
     
-    # Check if basic functions exist
-    if 'taskCounter' in available_functions:
+    for signer in signer_pool.signers[1:]:
+        if web3.eth.get_balance(signer.address) == 0:
+            signer_pool.disable(signer.address, "zero balance")
+    enabled = sum(1 for signer in signer_pool.signers if signer.enabled)
+    if enabled < len(signer_pool):
+        return "degraded", f"{wallet_balance_eth} ETH, {len(signer_pool) - enabled} signer(s) with zero balance"
+    return "ok", f"{wallet_balance_eth} ETH"
+
+def probe_contract():
+    """Checks the contract is deployed and answers calls"""
+    if 'taskCounter' in contract_functions():
         try:
-            # Try with a higher gas limit to avoid execution reverted errors
-            task_counter = contract.functions.taskCounter().call({'gas': 2000000})
+            # Loading the contract state cache doubles as the check that the contract answers calls
+            contract_state.sync()
+            task_counter = contract_state.task_counter()
             logger.info(f"Contract deployed at {CONTRACT_ADDRESS} with {task_counter} tasks")
-            contract_validated = True
+            return "ok", f"{task_counter} tasks"
         except Exception as tc_error:
+            # Don't fail validation just because of taskCounter error, check the code instead
             logger.error(f"Error accessing taskCounter: {str(tc_error)}")
-            # Don't fail validation just because of taskCounter error
-            # We'll handle this more gracefully later
-            contract_validated = True
-    
-    # Try getTask as an alternative validation
-    elif 'getTask' in available_functions:
-        try:
-            # Just check if the function exists, don't need to actually call it successfully
-            contract_validated = True
-            logger.info(f"Contract validated through getTask function availability")
-        except Exception as gt_error:
-            logger.error(f"Error with getTask: {str(gt_error)}")
-    
-    # Try checking tasks mapping
-    elif 'tasks' in available_functions:
-        try:
-            # Try to access task 1 (may not exist but confirms contract is there)
-            contract.functions.tasks(1).call()
-            contract_validated = True
-            logger.info(f"Contract validated through tasks mapping access")
-        except Exception as t_error:
-            if "not found" in str(t_error).lower():
-                # This is likely because task 1 doesn't exist, but contract is fine
-                contract_validated = True
-                logger.info(f"Contract validated but task 1 does not exist")
-            else:
-                logger.error(f"Error accessing tasks: {str(t_error)}")
-    
+
     # If we couldn't validate through standard functions, just try to detect if it's a contract
-    if not contract_validated:
-        code = web3.eth.get_code(CONTRACT_ADDRESS)
-        if code and code != '0x':
-            logger.info(f"Contract exists at {CONTRACT_ADDRESS} but has unexpected interface")
-            contract_validated = True
-        else:
-            logger.error(f"No contract code found at {CONTRACT_ADDRESS}")
+    code = web3.eth.get_code(CONTRACT_ADDRESS)
+    if code and code not in ('0x', b''):
+        logger.info(f"Contract exists at {CONTRACT_ADDRESS} but has unexpected interface")
+        return "degraded", "Contract code found but interface is unexpected"
+
+    logger.error(f"No contract code found at {CONTRACT_ADDRESS}")
+    raise ValueError(f"No contract code found at {CONTRACT_ADDRESS}")
+
+def probe_ownership():
+    """Checks whether our account, and every extra signer, can complete tasks on the contract"""
+    if 'isOperator' in contract_functions():
+        # Signers that aren't operators would have their completions revert, so they only sign if nothing else can
+        for signer in signer_pool.signers:
+            if not contract_state.is_operator(signer.address):
+                signer_pool.disable(signer.address, "not a contract operator")
+        operators = [signer.address for signer in signer_pool.signers if signer.enabled]
+        if account.address not in operators:
+            logger.warning("Account is neither the contract owner nor an operator - cannot complete tasks")
+            return "degraded", "Account is not a contract operator"
+        if len(operators) < len(signer_pool):
+            return "degraded", f"{len(operators)} of {len(signer_pool)} signers are contract operators"
+        logger.info(f"All {len(operators)} signer(s) can complete tasks")
+        return "ok", f"{len(operators)} operator(s)"
+
+    if 'owner' in contract_functions():
+        contract_owner = contract_state.owner()
+        logger.info(f"Contract owner: {contract_owner}")
+        
+        # Contracts without operators only take completions from the owner
+        for signer in signer_pool.signers:
+            if signer.address.lower() != contract_owner.lower():
+                signer_pool.disable(signer.address, "the contract has no operators and this is not the owner")
+
+        if contract_owner.lower() == account.address.lower():
+            logger.info("Account is the contract owner - can complete tasks")
+            return "ok", f"Owner {contract_owner}"
+        logger.warning("Account is NOT the contract owner - cannot complete tasks")
+        return "degraded", f"Account is not the contract owner {contract_owner}"
+
+    logger.warning("Cannot determine ownership status - no suitable functions found")
+    return "degraded", "No suitable functions to determine ownership"
+
+def init_llm():
+    """Builds the LLM, the search tool and the agent rosters used by the analyses"""
+    global llm, search_tool, crew_registry
     
-    # If contract is validated, try to determine ownership if possible
-    if contract_validated:
-        # Try different ways to determine if our account has owner privileges
+    with llm_lock:
+        # Nothing to do if a request already triggered the initialization
+        if crew_registry is not None:
+            return "ok", "Initialized on first request"
+        
         try:
-            # Check if the contract has an owner function
-            if 'owner' in available_functions:
-                try:
-                    contract_owner = contract.functions.owner().call()
-                    logger.info(f"Contract owner: {contract_owner}")
-                    
-                    if contract_owner.lower() == account.address.lower():
-                        logger.info("Account is the contract owner - can complete tasks")
-                    else:
-                        logger.warning("Account is NOT the contract owner - cannot complete tasks")
-                except Exception as o_error:
-                    logger.error(f"Error calling owner(): {str(o_error)}")
+            # Try to get Gemini API key directly from .env file if needed
+            gemini_api_key = os.getenv("GEMINI_API_KEY")
+            if not gemini_api_key and os.path.exists(".env"):
+                with open(".env", "r") as env_file:
+                    for line in env_file:
+                        if line.startswith("GEMINI_API_KEY="):
+                            gemini_api_key = line.split("=", 1)[1].strip().strip('"').strip("'")
+                            break
             
-            # If no owner function but complete task exists, try that for permission check
-            elif 'completeTask' in available_functions:
-                # Try to get gas estimate for a completion call (will fail if not owner)
-                # We don't actually execute this, just estimate gas
-                try:
-                    gas_estimate = contract.functions.completeTask(999, "Test").estimate_gas({
-                        "from": account.address
-                    })
-                    logger.info("Account appears to have owner privileges (can complete tasks)")
-                except Exception as perm_error:
-                    if "revert" in str(perm_error).lower():
-                        logger.warning("Account does NOT have owner privileges")
-                    else:
-                        # This is likely another error, not a permissions issue
-                        logger.error(f"Error testing owner privileges: {str(perm_error)}")
-            else:
-                logger.warning("Cannot determine ownership status - no suitable functions found")
-        except Exception as own_error:
-            logger.warning(f"Could not determine ownership status: {str(own_error)}")
-        
-except Exception as e:
-    logger.error(f"Error validating contract deployment: {str(e)}")
-    logger.warning("Contract may not be deployed at the specified address, or there's an ABI mismatch")
-    # We'll continue anyway, as some functions might still work
+            logger.info(f"Using Gemini API key: {gemini_api_key[:5]}..." if gemini_api_key else "No Gemini API key found")
+            
+            llm = LLM(
+                model="gemini/gemini-2.0-flash",  # Gemini model
+                api_key=gemini_api_key,
+                temperature=0.7
+            )
+            
+            # Initialize the search tool for internet search capabilities, cached on disk
+            search_tool = CachedSearchTool(
+                cache=search_cache,
+                ttl=SEARCH_CACHE_TTL,
+                refresh_ahead=SEARCH_REFRESH_AHEAD,
+                backend=SEARCH_BACKEND,
+                backend_url=SEARCH_BACKEND_URL
+            )
+            state, detail = "ok", "gemini/gemini-2.0-flash"
+        except Exception as e:
+            logger.error(f"Error initializing LLM: {str(e)}")
+            # Fallback to a default LLM if available
+            llm = LLM()
+            search_tool = None
+            state, detail = "degraded", f"Using default LLM without search: {str(e)}"
+        
+        # Build the agent rosters once so requests only bind their inputs
+        crew_registry = CrewRegistry(llm, search_tool, size=analysis_pool.max_workers)
+        return state, detail
 
-# Initialize LLM
-try:
-    # Try to get Gemini API key directly from .env file if needed
-    gemini_api_key = os.getenv("GEMINI_API_KEY")
-    if not gemini_api_key:
-        with open(".env", "r") as env_file:
-            for line in env_file:
-                if line.startswith("GEMINI_API_KEY="):
-                    gemini_api_key = line.split("=", 1)[1].strip().strip('"').strip("'")
-                    break
-    
-    logger.info(f"Using Gemini API key: {gemini_api_key[:5]}..." if gemini_api_key else "No Gemini API key found")
-    
-    llm = LLM(
-        model="gemini/gemini-2.0-flash",  # Gemini model
-        api_key=gemini_api_key,
-        temperature=0.7
-    )
-    
-    # Initialize SerperDevTool for internet search capabilities
-    search_tool = SerperDevTool()
-except Exception as e:
-    logger.error(f"Error initializing LLM: {str(e)}")
-    # Fallback to a default LLM if available
-    llm = LLM()
-    search_tool = None
+STARTUP_PROBES = {
+    "rpc": probe_rpc,
+    "wallet": probe_wallet,
+    "contract": probe_contract,
+    "ownership": probe_ownership,
+    "llm": init_llm
+}
+
+for probe_name in STARTUP_PROBES:
+    set_dependency_status(probe_name, "pending")
+
+def run_probe(name):
+    """
+    Runs one startup probe and records its outcome and latency
+
+    Args:
+        name: The name of the probe in STARTUP_PROBES
+    """
+    started = time.perf_counter()
+    try:
+        state, detail = STARTUP_PROBES[name]()
+    except Exception as e:
+        logger.error(f"Startup check '{name}' failed: {str(e)}")
+        state, detail = "failed", str(e)
+    latency_ms = round((time.perf_counter() - started) * 1000, 2)
+    set_dependency_status(name, state, detail, latency_ms)
+
+async def run_startup_checks():
+    """Runs all startup probes concurrently in worker threads"""
+    started = time.perf_counter()
+    await asyncio.gather(*(asyncio.to_thread(run_probe, name) for name in STARTUP_PROBES))
+    logger.info(f"Startup checks finished in {time.perf_counter() - started:.2f}s")
+
+@app.on_event("startup")
+async def start_background_checks():
+    # Don't await the checks: the server starts accepting requests right away
+    app.state.startup_checks = asyncio.create_task(run_startup_checks())
+    fee_oracle.start()
+    contract_state.start()
+    if chain_index:
+        chain_index.start()
 
 # Define Pydantic models for request/response validation
 class RealEstateTaskRequest(BaseModel):
@@ -295,14 +480,11 @@ class RealEstateTaskRequest(BaseModel):
     task_type: str  # market_analysis, property_valuation, investment_analysis, neighborhood_insights, etc.
     additional_details: Optional[Dict[str, Any]] = None
 
-class RealEstateAnalysisOutput(BaseModel):
-    roi: str
-    cap_rate: str
-    cash_flow: str
-    appreciation: str
-    risk_assessment: str
-    recommendations: str
-    summary: str
+    @field_validator("task_type")
+    @classmethod
+    def normalize_task_type(cls, task_type):
+        # The crew routing and the analysis cache key both use this value, so they can't disagree
+        return task_type.strip().lower()
 
 class TaskResponse(BaseModel):
     task_id: int
@@ -311,6 +493,10 @@ class TaskResponse(BaseModel):
     transaction_hash: Optional[str] = None
     transaction_status: str
     on_chain_result: Optional[Dict[str, Any]] = None
+    from_cache: bool = False
+    specialist_timings: Optional[Dict[str, Any]] = None
+    chain_task_id: Optional[int] = None
+    commit_batch: Optional[Dict[str, Any]] = None
 
 class ErrorResponse(BaseModel):
     error: str
@@ -324,6 +510,10 @@ class BlockchainTask(BaseModel):
     topic: str  # Will contain serialized property info
     result: str
     requester: str
+    result_digest: Optional[str] = None  # Set when the result is anchored from the blob store
+    result_size: Optional[int] = None
+    result_verified: Optional[bool] = None
+    index: Optional[Dict[str, Any]] = None  # Freshness of the chain index when the task was read from it
 
 class PropertyDetails(BaseModel):
     address: str
@@ -337,11 +527,406 @@ class PropertyDetails(BaseModel):
     features: Optional[List[str]] = None
     location_data: Optional[Dict[str, Any]] = None
 
-# Global task cache to store tasks that fail to be stored on blockchain
-task_cache = {}
+# Profiles of the specialist agents. Each roster builds one Agent per profile.
+AGENT_PROFILES = {
+    "market_analyst": {
+        "role": "Senior Real Estate Market Analyst",
+        "goal": "Deliver authoritative, data-driven market analyses with actionable insights using real-time internet data",
+        "backstory": """You are a highly respected real estate analyst with 15+ years of experience analyzing property markets.
+            You have a reputation for delivering precise, data-driven analyses that cut through the noise to identify
+            the most significant market factors. You consistently use specific numbers, percentages, and metrics in your
+            analyses rather than vague generalizations. You're known for your ability to synthesize complex market data
+            into clear, actionable insights that help clients make confident decisions. Your reports always include
+            specific price points, growth rates, and comparative metrics. You focus on hyperlocal market dynamics at the
+            neighborhood level and always provide context by comparing local metrics to broader market averages.
+            You structure your analyses with clear bullet points and headers for maximum clarity and impact.
+            You leverage internet search to find the most current market data, trends, and comparable properties."""
+    },
+    "property_appraiser": {
+        "role": "Senior Property Appraiser & Valuation Expert",
+        "goal": "Deliver precise property valuations with specific value drivers and comparative metrics using real-time internet data",
+        "backstory": """You are a highly respected property appraiser with 15+ years of experience and multiple advanced certifications.
+            You're known for delivering valuations with specific dollar amounts, value ranges, and confidence levels rather than
+            vague estimates. Your reports always identify the exact features that drive a property's value with specific dollar
+            or percentage impacts for each feature. You consistently use comparative metrics like price per square foot, value
+            percentile ranking, and neighborhood premium/discount percentages. You have extensive experience with both automated
+            valuation models and traditional appraisal methods. You're skilled at identifying unique property attributes that
+            automated systems miss. You structure your valuations with clear bullet points and headers for maximum clarity and impact.
+            You always provide specific, actionable insights rather than general observations.
+            You leverage internet search to find the most current property values, comparable sales, and market trends."""
+    },
+    "investment_advisor": {
+        "role": "Elite Real Estate Investment Strategist",
+        "goal": "Deliver precise investment analyses with specific returns, risks, and growth projections",
+        "backstory": """You are an elite investment advisor with 15+ years of experience and a track record of identifying
+            high-performing real estate investments. You're known for providing specific ROI projections, cap rates,
+            cash-on-cash returns, and IRR calculations rather than vague potential. Your analyses always include
+            detailed cash flow projections with specific income and expense figures. You quantify investment risks
+            with probability estimates and provide specific mitigation strategies. You have deep expertise in value-add
+            opportunities and can estimate renovation ROIs with remarkable accuracy. You consistently provide comparative
+            metrics showing how an investment performs against market averages. You structure your analyses with clear
+            bullet points and headers for maximum clarity and impact. You always provide specific, actionable insights
+            rather than general observations."""
+    },
+    "location_intelligence_specialist": {
+        "role": "Advanced Location Intelligence & Neighborhood Analytics Expert",
+        "goal": "Deliver precise neighborhood analyses with specific metrics, amenities, and livability factors",
+        "backstory": """You are a renowned location intelligence expert with 15+ years of experience analyzing neighborhoods
+            at a micro level. You're known for providing specific demographic statistics, income levels, and
+            homeownership rates rather than vague descriptions. Your reports always include specific school ratings,
+            test scores, and student-teacher ratios for each nearby school. You quantify crime rates with specific
+            statistics compared to city averages and track safety trends over time. You identify specific amenities
+            with exact walking distances and quality ratings. You provide precise transit scores, commute times, and
+            transportation options. You're skilled at identifying neighborhood transition indicators and gentrification
+            patterns with specific metrics. You structure your analyses with clear bullet points and headers for maximum
+            clarity and impact. You always provide specific, actionable insights rather than general observations."""
+    },
+    "investment_analyst": {
+        "role": "Real Estate Investment Analyst",
+        "goal": "Provide comprehensive real estate investment analysis",
+        "backstory": """You are a seasoned real estate investment analyst with 15+ years of experience analyzing properties
+            across various markets. You have deep expertise in ROI calculations, market trend analysis, risk assessment,
+            and investment strategy. You're known for your data-driven approach and ability to identify hidden value and
+            potential pitfalls in real estate investments. Your analyses are thorough, balanced, and actionable, helping
+            investors make informed decisions. You have a particular talent for translating complex market data into clear,
+            strategic recommendations.
+
+            You're especially skilled at evaluating properties based on cash flow potential, appreciation prospects,
+            tax advantages, and overall return metrics. You can assess both residential and commercial properties
+            with equal expertise. You always consider both macro market trends and micro neighborhood factors in your
+            analysis.
+
+            When analyzing investment properties, you always include:
+            - Estimated ROI and cap rate calculations
+            - Cash flow projections
+            - Appreciation potential
+            - Risk assessment with probability estimates
+            - Specific recommendations for maximizing returns
+
+            You present your findings in a clear, structured format that highlights the most important metrics and insights.
+            You're not afraid to recommend against an investment if the numbers don't make sense."""
+    }
+}
+
+# Output instructions shared by every crew so all task types produce a RealEstateAnalysisOutput
+ANALYSIS_OUTPUT_INSTRUCTIONS = """
+You MUST format your response as a JSON object with the following EXACT keys:
+- roi: Return on investment metrics and calculations
+- cap_rate: Capitalization rate and related metrics
+- cash_flow: Cash flow projections and analysis
+- appreciation: Expected property appreciation over time
+- risk_assessment: Analysis of investment risks
+- recommendations: Specific investment recommendations
+- summary: Brief overview of overall assessment
+
+Keep your total response under 2000 characters for blockchain storage efficiency.
+"""
+
+# Task templates per analysis type. Each step is (agent, description template); the last step
+# produces the final JSON. Templates are bound with property_address, task_type and additional_details.
+CREW_TEMPLATES = {
+    "market_analysis": [
+        ("market_analyst", """Analyze the local real estate market around the property at {property_address}.
+Task type: {task_type}.
+Additional details: {additional_details}
+
+Cover median prices and price trends, inventory and days on market, demand drivers and how local
+metrics compare with the broader market, then relate them to the investment potential of the property.
+""")
+    ],
+    "property_valuation": [
+        ("property_appraiser", """Estimate the market value of the property at {property_address}.
+Task type: {task_type}.
+Additional details: {additional_details}
+
+Give a value range with a confidence level, comparable sales, price per square foot and the features
+that drive the value up or down, then relate the valuation to the investment potential of the property.
+""")
+    ],
+    "investment_analysis": [
+        ("investment_analyst", """Analyze the investment potential of the property at {property_address}.
+Task type: {task_type}.
+Additional details: {additional_details}
+
+Provide a comprehensive analysis including:
+1. Estimated ROI and cap rate
+2. Cash flow projections
+3. Appreciation potential
+4. Risk assessment
+5. Specific recommendations
+""")
+    ],
+    "neighborhood_insights": [
+        ("location_intelligence_specialist", """Analyze the neighborhood around the property at {property_address}.
+Task type: {task_type}.
+Additional details: {additional_details}
+
+Cover demographics, schools, safety, amenities, transit and signs of neighborhood change, and explain
+how they affect demand, appreciation and risk for the property.
+""")
+    ],
+    "rental_analysis": [
+        ("investment_advisor", """Analyze the rental potential of the property at {property_address}.
+Task type: {task_type}.
+Additional details: {additional_details}
+
+Estimate achievable rent, vacancy, operating expenses, net operating income, cap rate and
+cash-on-cash return, and recommend how to maximize rental income.
+""")
+    ],
+    "development_potential": [
+        ("property_appraiser", """Assess the as-is value and the development or improvement options for the property at {property_address}.
+Task type: {task_type}.
+Additional details: {additional_details}
+
+List the realistic options (renovation, expansion, redevelopment) with their estimated cost and the
+value they would add. Summarize your findings as notes for an investment strategist.
+"""),
+        ("investment_advisor", """Using the appraiser's findings, evaluate the development potential of the property at {property_address}.
+Task type: {task_type}.
+
+Compare the returns, risks and timelines of the development options and recommend the best one.
+""")
+    ]
+}
+
+# Task types without a dedicated template use the general investment analysis
+DEFAULT_CREW_TEMPLATE = "investment_analysis"
+
+# The comprehensive analysis runs these specialists concurrently as independent one-task crews and
+# merges their outputs locally, so its latency is close to the slowest specialist rather than the sum
+COMPREHENSIVE_TASK_TYPE = "comprehensive"
+SPECIALIST_TEMPLATES = {
+    "market_analyst": """Analyze the local real estate market around the property at {property_address}
+as part of a comprehensive analysis.
+Additional details: {additional_details}
+
+Focus on price trends, supply and demand and the expected appreciation of the property.
+""",
+    "property_appraiser": """Estimate the market value of the property at {property_address}
+as part of a comprehensive analysis.
+Additional details: {additional_details}
+
+Focus on a value range with comparable sales and what the valuation means for returns.
+""",
+    "investment_advisor": """Evaluate the property at {property_address} as an income investment
+as part of a comprehensive analysis.
+Additional details: {additional_details}
+
+Focus on ROI, cap rate, cash flow and concrete recommendations for the investor.
+""",
+    "location_intelligence_specialist": """Analyze the neighborhood around the property at {property_address}
+as part of a comprehensive analysis.
+Additional details: {additional_details}
+
+Focus on the location factors that drive demand, appreciation and risk.
+"""
+}
+
+# Specialists whose answer is used for each output field, most authoritative first
+SPECIALIST_FIELD_SOURCES = {
+    "roi": ["investment_advisor", "property_appraiser"],
+    "cap_rate": ["investment_advisor", "property_appraiser"],
+    "cash_flow": ["investment_advisor", "property_appraiser"],
+    "appreciation": ["market_analyst", "location_intelligence_specialist"],
+    "risk_assessment": ["location_intelligence_specialist", "market_analyst"],
+    "recommendations": ["investment_advisor", "market_analyst"]
+}
+
+# Threads that run the specialists of comprehensive analyses
+specialist_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("SPECIALIST_WORKERS", str(4 * len(SPECIALIST_TEMPLATES)))),
+    thread_name_prefix="specialist"
+)
+
+def build_agent_roster(llm, search_tool):
+    """Builds one Agent for each profile in AGENT_PROFILES"""
+    return {
+        name: Agent(
+            role=profile["role"],
+            goal=profile["goal"],
+            backstory=profile["backstory"],
+            llm=llm,
+            tools=[search_tool] if search_tool else [],
+            verbose=True
+        )
+        for name, profile in AGENT_PROFILES.items()
+    }
+
+class CrewRegistry:
+    """
+    Prebuilt agent rosters and crew templates for every task type
+    
+    Agents keep per-run state, so a roster is checked out by one analysis at a time.
+    There is one roster per analysis worker, built once when the LLM is initialized.
+    """
+    
+    def __init__(self, llm, search_tool, size):
+        self._rosters = queue.Queue()
+        for _ in range(size):
+            self._rosters.put(build_agent_roster(llm, search_tool))
+        logger.info(f"Built {size} agent rosters for task types: {list(CREW_TEMPLATES)}")
+    
+    @contextmanager
+    def crew(self, task_type, inputs):
+        """
+        Checks out a roster and binds the request inputs to the crew template for task_type
+        
+        Args:
+            task_type: The requested analysis type
+            inputs: Dictionary with property_address, task_type and additional_details
+        """
+        steps = CREW_TEMPLATES.get(task_type, CREW_TEMPLATES[DEFAULT_CREW_TEMPLATE])
+        roster = self._rosters.get()
+        try:
+            tasks = []
+            for index, (agent_name, description) in enumerate(steps):
+                is_final = index == len(steps) - 1
+                tasks.append(Task(
+                    description=description.format(**inputs) + (ANALYSIS_OUTPUT_INSTRUCTIONS if is_final else ""),
+                    expected_output="A JSON object containing the real estate analysis results" if is_final
+                                    else "Notes for the next specialist",
+                    agent=roster[agent_name],
+                    output_json=RealEstateAnalysisOutput if is_final else None
+                ))
+            
+            yield Crew(
+                agents=[roster[agent_name] for agent_name, _ in steps],
+                tasks=tasks,
+                verbose=True,
+                process=Process.sequential
+            )
+        finally:
+            self._rosters.put(roster)
+
+    @contextmanager
+    def specialist_crews(self, inputs):
+        """
+        Checks out a roster and builds one single-task crew per specialist in SPECIALIST_TEMPLATES
+        
+        Args:
+            inputs: Dictionary with property_address, task_type and additional_details
+        """
+        roster = self._rosters.get()
+        try:
+            yield {
+                agent_name: Crew(
+                    agents=[roster[agent_name]],
+                    tasks=[Task(
+                        description=description.format(**inputs) + ANALYSIS_OUTPUT_INSTRUCTIONS,
+                        expected_output="A JSON object containing the real estate analysis results",
+                        agent=roster[agent_name],
+                        output_json=RealEstateAnalysisOutput
+                    )],
+                    verbose=True,
+                    process=Process.sequential
+                )
+                for agent_name, description in SPECIALIST_TEMPLATES.items()
+            }
+        finally:
+            self._rosters.put(roster)
+
+def get_crew_registry():
+    """Returns the crew registry, building it on first use if the startup phase has not done it yet"""
+    if crew_registry is None:
+        run_probe("llm")
+    return crew_registry
+
+# Worker pools for the blocking stages of process_task
+# The analysis stage can use a process pool; the chain stage shares the nonce manager, so it stays on threads
+analysis_pool = WorkerPool(
+    "analysis",
+    max_workers=int(os.getenv("ANALYSIS_WORKERS", "4")),
+    max_queue=int(os.getenv("ANALYSIS_QUEUE_SIZE", "16")),
+    kind=os.getenv("ANALYSIS_EXECUTOR", "thread")
+)
+chain_pool = WorkerPool(
+    "chain",
+    max_workers=int(os.getenv("CHAIN_WORKERS", "4")),
+    max_queue=int(os.getenv("CHAIN_QUEUE_SIZE", "32"))
+)
+
+# Cache of analysis results keyed on the normalized request
+# Each task type has its own TTL since market data goes stale faster than a valuation
+ANALYSIS_CACHE_ENABLED = os.getenv("ANALYSIS_CACHE_ENABLED", "true").lower() == "true"
+ANALYSIS_CACHE_REUSE_TX = os.getenv("ANALYSIS_CACHE_REUSE_TX", "false").lower() == "true"
+ANALYSIS_CACHE_DEFAULT_TTL = int(os.getenv("ANALYSIS_CACHE_TTL", str(12 * 3600)))
+ANALYSIS_CACHE_TTLS = {
+    "market_analysis": 6 * 3600,
+    "property_valuation": 24 * 3600,
+    "investment_analysis": 24 * 3600,
+    "neighborhood_insights": 7 * 24 * 3600,
+    "rental_analysis": 12 * 3600,
+    "development_potential": 7 * 24 * 3600,
+    "comprehensive": 6 * 3600
+}
+ANALYSIS_CACHE_TTLS.update(json.loads(os.getenv("ANALYSIS_CACHE_TTLS", "{}")))
+
+analysis_cache = PersistentCache(
+    os.getenv("ANALYSIS_CACHE_PATH", os.path.join("results", "analysis_cache.db")),
+    max_entries=int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "5000")),
+    memory_entries=int(os.getenv("ANALYSIS_CACHE_MEMORY_ENTRIES", "256")),
+    default_ttl=ANALYSIS_CACHE_DEFAULT_TTL
+) if ANALYSIS_CACHE_ENABLED else None
 
-# Map of transaction hash to task ID for lookup
-tx_hash_to_task_id = {}
+# Cache of raw web search responses used by the agents' search tool
+# SEARCH_BACKEND=http with SEARCH_BACKEND_URL points the agents at a Serper-compatible stand-in server
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "serper").lower()
+SEARCH_BACKEND_URL = os.getenv("SEARCH_BACKEND_URL")
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", str(24 * 3600)))
+SEARCH_REFRESH_AHEAD = float(os.getenv("SEARCH_REFRESH_AHEAD", "0.8"))
+search_cache = PersistentCache(
+    os.getenv("SEARCH_CACHE_PATH", os.path.join("results", "search_cache.db")),
+    max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "20000")),
+    memory_entries=int(os.getenv("SEARCH_CACHE_MEMORY_ENTRIES", "512")),
+    default_ttl=SEARCH_CACHE_TTL
+) if os.getenv("SEARCH_CACHE_ENABLED", "true").lower() == "true" else None
+
+def normalize_address(property_address):
+    """Normalizes an address so trivially different spellings share a cache entry"""
+    address = property_address.strip().lower()
+    address = re.sub(r"\s*,\s*", ", ", address)
+    address = re.sub(r"\s+", " ", address)
+    return address.rstrip(" .,")
+
+def analysis_cache_key(property_address, task_type, additional_details):
+    """Builds the cache key from the normalized address, the request's normalized task type and a canonical hash of the details"""
+    details = json.dumps(additional_details or {}, sort_keys=True, separators=(",", ":"), default=str)
+    details_hash = hashlib.sha256(details.encode()).hexdigest()
+    return f"{task_type}|{normalize_address(property_address)}|{details_hash}"
+
+def is_cacheable_analysis(analysis):
+    """Only cache analyses that produced every field of RealEstateAnalysisOutput"""
+    structured_output = analysis.get("structured_output") or {}
+    values = [structured_output.get(field) for field in ANALYSIS_FIELDS]
+    # A comprehensive analysis missing a specialist is served but not cached
+    specialists = (analysis.get("specialist_timings") or {}).get("specialists", {})
+    if any(timing["status"] != "ok" for timing in specialists.values()):
+        return False
+    return all(isinstance(value, str) and value not in ("Not available", "Extracted from result") for value in values)
+
+# Identical analyses that are already running are shared instead of started again
+analysis_flights = SingleFlight()
+
+# Batches from /process_tasks share the analysis slots and hand their writes to one commit queue
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", str(analysis_pool.max_workers)))
+BATCH_MAX_TASKS = int(os.getenv("BATCH_MAX_TASKS", "500"))
+batch_slots = asyncio.Semaphore(BATCH_CONCURRENCY)
+commit_queue = CommitQueue(chain_pool)
+
+# Jobs for asynchronous /process_task requests
+job_store = JobStore(max_jobs=int(os.getenv("MAX_TRACKED_JOBS", "1000")))
+background_jobs = set()
+
+@app.on_event("shutdown")
+def shutdown_worker_pools():
+    analysis_pool.shutdown()
+    chain_pool.shutdown()
+    specialist_executor.shutdown(wait=False, cancel_futures=True)
+    fee_oracle.stop()
+    contract_state.stop()
+    if chain_index:
+        chain_index.stop()
 
 # Helper function to make objects JSON serializable
 def make_json_serializable(obj, max_depth=10, current_depth=0, processed=None):
@@ -417,8 +1002,8 @@ def save_crew_output(crew_result, property_address=None, task_type=None, task_id
         timestamp = time.strftime("%Y%m%d_%H%M%S")
         filename = os.path.join(agents_dir, f"crew_output_{task_id}_{timestamp}.json")
         
-        # Make the crew result serializable
-        serializable_result = make_json_serializable(crew_result, max_depth=20)
+        # Records built by the normalizer are already serializable
+        serializable_result = crew_output_record(crew_result)
         
         # Prepare the output data structure
         output_data = {
@@ -440,8 +1025,23 @@ def save_crew_output(crew_result, property_address=None, task_type=None, task_id
         logger.error(f"Error saving CrewAI output: {str(e)}")
         return None
 
+# Serializes read-modify-write cycles of results/task_index.json
+task_index_lock = threading.Lock()
+
+def load_task_index(results_dir):
+    index_file = os.path.join(results_dir, "task_index.json")
+    if not os.path.exists(index_file):
+        return []
+    try:
+        with open(index_file, 'r') as f:
+            return json.load(f)
+    except Exception as idx_error:
+        logger.error(f"Error loading task index: {str(idx_error)}")
+        return []
+
 # Function to save AI outputs locally with improved organization
-def save_ai_output(task_id, tx_hash, structured_output, result_str, property_address=None, task_type=None):
+def save_ai_output(task_id, tx_hash, structured_output, result_str, property_address=None, task_type=None,
+                   transaction_status=None, chain_task_id=None):
     try:
         # Create results directory if it doesn't exist
         results_dir = os.path.join(os.getcwd(), 'results')
@@ -458,7 +1058,9 @@ def save_ai_output(task_id, tx_hash, structured_output, result_str, property_add
             "property_address": property_address,
             "task_type": task_type,
             "structured_output": serializable_output,
-            "raw_result": result_str
+            "raw_result": result_str,
+            "transaction_status": transaction_status,
+            "chain_task_id": chain_task_id
         }
         
         # Save to a file named with transaction hash
@@ -467,42 +1069,35 @@ def save_ai_output(task_id, tx_hash, structured_output, result_str, property_add
             json.dump(output_data, f, indent=2)
         
         # Also save to an index file that tracks all tasks
-        index_file = os.path.join(results_dir, "task_index.json")
-        task_index = []
-        
-        # Load existing index if it exists
-        if os.path.exists(index_file):
-            try:
-                with open(index_file, 'r') as f:
-                    task_index = json.load(f)
-            except Exception as idx_error:
-                logger.error(f"Error loading task index: {str(idx_error)}")
-                task_index = []
-        
-        # Add this task to the index
         task_summary = {
             "task_id": task_id,
             "transaction_hash": tx_hash,
             "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
             "property_address": property_address,
             "task_type": task_type,
-            "result_file": os.path.basename(filename)
+            "result_file": os.path.basename(filename),
+            "transaction_status": transaction_status,
+            "chain_task_id": chain_task_id
         }
         
-        # Update or add to the index
-        updated = False
-        for i, entry in enumerate(task_index):
-            if entry.get("task_id") == task_id:
-                task_index[i] = task_summary
-                updated = True
-                break
-        
-        if not updated:
-            task_index.append(task_summary)
-        
-        # Save the updated index
-        with open(index_file, 'w') as f:
-            json.dump(task_index, f, indent=2)
+        # Chain workers and the receipt tracker both rewrite the index
+        with task_index_lock:
+            task_index = load_task_index(results_dir)
+            
+            # Update or add to the index
+            updated = False
+            for i, entry in enumerate(task_index):
+                if entry.get("task_id") == task_id:
+                    task_index[i] = task_summary
+                    updated = True
+                    break
+            
+            if not updated:
+                task_index.append(task_summary)
+            
+            # Save the updated index
+            with open(os.path.join(results_dir, "task_index.json"), 'w') as f:
+                json.dump(task_index, f, indent=2)
         
         logger.info(f"AI output saved to {filename} and indexed")
         return filename
@@ -510,6 +1105,48 @@ def save_ai_output(task_id, tx_hash, structured_output, result_str, property_add
         logger.error(f"Error saving AI output: {str(e)}")
         return None
 
+# Record the receipt outcome of a task's transaction locally
+def update_local_transaction_status(tx_hash, transaction_status, chain_task_id=None):
+    """
+    Records the outcome of a submitted transaction in the local task index and result file
+    
+    Args:
+        tx_hash: Hash of the transaction saved with the task
+        transaction_status: The new status, e.g. confirmed, reverted or unconfirmed
+        chain_task_id: Optional task ID the contract assigned, read from the receipt
+        
+    Returns:
+        True if a locally saved task was updated
+    """
+    try:
+        results_dir = os.path.join(os.getcwd(), 'results')
+        with task_index_lock:
+            task_index = load_task_index(results_dir)
+            entry = next((entry for entry in task_index if entry.get("transaction_hash") == tx_hash), None)
+            if entry is None:
+                return False
+            entry["transaction_status"] = transaction_status
+            if chain_task_id is not None:
+                entry["chain_task_id"] = chain_task_id
+            with open(os.path.join(results_dir, "task_index.json"), 'w') as f:
+                json.dump(task_index, f, indent=2)
+            
+            result_file = os.path.join(results_dir, entry["result_file"])
+            if os.path.exists(result_file):
+                with open(result_file, 'r') as f:
+                    output_data = json.load(f)
+                output_data["transaction_status"] = transaction_status
+                if chain_task_id is not None:
+                    output_data["chain_task_id"] = chain_task_id
+                with open(result_file, 'w') as f:
+                    json.dump(output_data, f, indent=2)
+        
+        logger.info(f"Task {entry['task_id']} transaction {tx_hash} is {transaction_status}")
+        return True
+    except Exception as e:
+        logger.error(f"Error updating transaction status for {tx_hash}: {str(e)}")
+        return False
+
 # Function to get local task results
 def get_local_task_results(task_id=None, tx_hash=None):
     """
@@ -573,6 +1210,11 @@ def get_task_from_blockchain(task_id):
     """
     Retrieves task data from the blockchain
     
+    Results written as compressed bytes are decoded, so the result is always the JSON string.
+    While the chain index is fresh and has the task, it answers without an RPC and the task
+    carries the index's freshness under "index". Otherwise tasks come from the task cache or
+    are read from the chain and cached.
+    
     Args:
         task_id: The ID of the task to retrieve
         
@@ -584,24 +1226,158 @@ def get_task_from_blockchain(task_id):
         if not contract:
             logger.error("Contract not initialized")
             return {"error": "Contract not initialized"}
+        
+        # Tasks the index doesn't have yet are read from the chain
+        task = indexed_task(task_id)
+        if task is not None:
+            return dict(task, index=chain_index.freshness())
+        
+        task = cached_task(task_id)
+        if task is not None:
+            return task
             
-        # Call the getTask function on the smart contract
-        task_data = contract.functions.getTask(task_id).call()
-        
-        # Format the task data
-        task = {
-            "id": task_data[0],
-            "topic": task_data[1],
-            "result": task_data[2],
-            "requester": task_data[3],
-            "completed": task_data[4]
-        }
+        # Call the getTask function on the smart contract; getTaskPacked also returns a compressed result
+        task = format_task_read(task_read_call(task_id).call())
+        
+        # A completed task without a result on-chain may have anchored it in the blob store
+        if task["completed"] and not task["result"] and supports_blob_anchors():
+            task.update(resolve_anchored_result(task_id))
         
+        cache_task(task)
         return task
     except Exception as e:
         logger.error(f"Error getting task from blockchain: {str(e)}")
         return {"error": f"Error retrieving task: {str(e)}"}
 
+def cached_task(task_id):
+    """Returns a copy of the cached task, or None"""
+    if chain_task_cache is None:
+        return None
+    task = chain_task_cache.get(task_id)
+    return dict(task) if task is not None else None
+
+def cache_task(task):
+    """Caches a task read from the chain; until it is completed with a verified result, only briefly"""
+    if chain_task_cache is None:
+        return
+    final = task["completed"] and task.get("result_verified", True) is True
+    chain_task_cache.set(task["id"], dict(task), ttl=None if final else TASK_CACHE_PENDING_TTL)
+
+def task_read_call(task_id):
+    """Returns the contract call that reads a task, with its packed result when the contract has one"""
+    if supports_packed_reads():
+        return contract.functions.getTaskPacked(task_id)
+    return contract.functions.getTask(task_id)
+
+def format_task_read(call_result):
+    """Formats the return value of task_read_call as a task dictionary"""
+    if supports_packed_reads():
+        return format_task(*call_result)
+    return format_task(call_result)
+
+def format_task(task_data, packed_result=b""):
+    """Formats a Task struct read from the contract, with its compressed result if it has one"""
+    return {
+        "id": task_data[0],
+        "topic": task_data[1],
+        "result": decode_result(packed_result) if packed_result else task_data[2],
+        "requester": task_data[3],
+        "completed": task_data[4]
+    }
+
+def indexed_task(task_id):
+    """Returns the task from the chain index, or None if the index is off, stale or doesn't have it"""
+    if chain_index is None or not chain_index.is_fresh():
+        return None
+    row = chain_index.get_task(task_id)
+    return format_indexed_task(row) if row else None
+
+def format_indexed_task(row):
+    """Formats a task row of the chain index like a task read from the contract"""
+    task = format_task(
+        (row["id"], row["topic"], row["result"] or "", row["requester"], row["completed"]),
+        row["packed_result"] or b""
+    )
+    if row["result_digest"] and not task["result"]:
+        task.update(resolve_anchored_result(row["id"], (bytes.fromhex(row["result_digest"][2:]), row["result_size"])))
+    return task
+
+def resolve_anchored_result(task_id, anchor=None):
+    """
+    Reads the digest a task anchored on-chain and loads the result from the blob store
+    
+    Args:
+        task_id: The ID of the task
+        anchor: The (digest, size) returned by getTaskAnchor, if it was already read
+    
+    Returns:
+        The fields to add to the task: result_digest, result_size and result_verified, plus
+        the result if the blob was found and matches the digest. Empty if nothing was anchored.
+    """
+    digest, size = anchor if anchor is not None else contract.functions.getTaskAnchor(task_id).call()
+    if not any(digest):
+        return {}
+    
+    anchored = {"result_digest": "0x" + digest.hex(), "result_size": size}
+    try:
+        data = blob_store.get(digest, size)
+    except BlobIntegrityError as e:
+        logger.error(f"Result of task {task_id} failed verification: {str(e)}")
+        return dict(anchored, result_verified=False)
+    
+    if data is None:
+        logger.warning(f"Result {anchored['result_digest']} of task {task_id} is not in the blob store")
+        return dict(anchored, result_verified=None)
+    return dict(anchored, result=data.decode("utf-8"), result_verified=True)
+
+def task_from_tx_index(tx_hash):
+    """
+    Answers a lookup by one of our transaction hashes from the tx index, without an RPC
+    
+    Args:
+        tx_hash: The transaction hash to look up
+        
+    Returns:
+        The task, the record of a task that failed before anything was sent, or an error
+        if the transaction failed. None if we didn't send the transaction, or if the index
+        can't tell the task's state yet and the chain has to be read.
+    """
+    rows = tx_index.get(tx_hash)
+    if rows is None:
+        return None
+    sent = rows[0]
+    if sent["role"] == "error":
+        logger.info(f"Found failed task for generated hash {tx_hash} in the tx index")
+        return sent["record"]
+    if sent["chain_task_id"] is None:
+        if sent["status"] == "reverted":
+            return {"error": "Transaction reverted, no task was created"}
+        # Not mined yet, or mined after the receipt tracker gave up on it
+        return None
+    
+    task_id = sent["chain_task_id"]
+    logger.info(f"Found task ID {task_id} for transaction hash {tx_hash} in the tx index")
+    task = {"id": task_id, "topic": None, "result": "", "requester": None, "completed": False}
+    for row in tx_index.task_rows(contract.address, task_id):
+        if row["status"] != "confirmed" and row["status"] != "reverted":
+            # An outcome we haven't seen (sent, or unconfirmed when the tracker gave up); the chain has it
+            task = None
+            break
+        if row["status"] == "reverted":
+            continue
+        if row["topic"] is not None:
+            task.update(topic=row["topic"], requester=row["sender"])
+        if row["role"] != "create":
+            task.update(completed=True, result=row["result"] or "")
+            if row["result_digest"]:
+                task.update(resolve_anchored_result(task_id, (bytes.fromhex(row["result_digest"][2:]), row["result_size"])))
+    
+    if task is None or task["topic"] is None:
+        task = get_task_from_blockchain(task_id)
+    if "error" not in task:
+        task["transaction_hash"] = tx_hash
+    return task
+
 # Function to get task data by transaction hash
 def get_task_by_tx_hash(tx_hash):
     """
@@ -616,35 +1392,19 @@ def get_task_by_tx_hash(tx_hash):
     try:
         logger.info(f"Looking up task with transaction hash: {tx_hash}")
         
-        # First check if we have this transaction hash in our local mapping
-        if tx_hash in tx_hash_to_task_id:
-            task_id = tx_hash_to_task_id[tx_hash]
-            logger.info(f"Found task ID {task_id} for transaction hash {tx_hash} in local mapping")
-            
-            # Check if the task is in our local cache
-            if task_id in task_cache:
-                logger.info(f"Found task {task_id} in local cache")
-                return task_cache[task_id]
-            
-            # Try to get the task from the blockchain
-            try:
-                # Call the getTask function on the smart contract
-                task_data = contract.functions.getTask(task_id).call()
-                
-                # Format the task data
-                task = {
-                    "id": task_data[0],
-                    "topic": task_data[1],
-                    "result": task_data[2],
-                    "requester": task_data[3],
-                    "completed": task_data[4],
-                    "transaction_hash": tx_hash
-                }
-                
-                return task
-            except Exception as contract_error:
-                logger.error(f"Error getting task from blockchain: {str(contract_error)}")
-                return {"error": f"Error retrieving task: {str(contract_error)}"}
+        # Transactions we sent resolve from the tx index without asking the node
+        task = task_from_tx_index(tx_hash)
+        if task is not None:
+            return task
+        
+        # The chain index knows every transaction that created or completed a task
+        task_id = chain_index.task_id_by_tx_hash(tx_hash) if chain_index else None
+        if task_id is not None:
+            logger.info(f"Found task ID {task_id} for transaction hash {tx_hash} in the chain index")
+            task = get_task_from_blockchain(task_id)
+            if "error" not in task:
+                task["transaction_hash"] = tx_hash
+            return task
         
         # If not in our mapping, try to get the transaction receipt from the blockchain
         try:
@@ -658,39 +1418,13 @@ def get_task_by_tx_hash(tx_hash):
             receipt = web3.eth.get_transaction_receipt(tx_hash_bytes)
             
             if receipt:
-                # Parse logs to find the task ID
+                # The first task event of our contract names the task
                 for log in receipt.logs:
-                    # Check if this log is from our contract
-                    if log['address'].lower() == CONTRACT_ADDRESS.lower():
-                        # Try to decode the log
-                        try:
-                            # Look for TaskCreated or TaskCompleted events
-                            task_created_event = contract.events.TaskCreated().process_log(log)
-                            if task_created_event:
-                                task_id = task_created_event['args']['id']
-                                logger.info(f"Found TaskCreated event with task ID: {task_id}")
-                                
-                                # Store in our mapping for future lookups
-                                tx_hash_to_task_id[tx_hash] = task_id
-                                
-                                # Get the task data
-                                return get_task_from_blockchain(task_id)
-                        except Exception as decode_error:
-                            try:
-                                # Try TaskCompleted event
-                                task_completed_event = contract.events.TaskCompleted().process_log(log)
-                                if task_completed_event:
-                                    task_id = task_completed_event['args']['id']
-                                    logger.info(f"Found TaskCompleted event with task ID: {task_id}")
-                                    
-                                    # Store in our mapping for future lookups
-                                    tx_hash_to_task_id[tx_hash] = task_id
-                                    
-                                    # Get the task data
-                                    return get_task_from_blockchain(task_id)
-                            except Exception:
-                                # Not a task event or couldn't decode
-                                continue
+                    event = decode_task_log(log)
+                    if event is not None:
+                        task_id = event['args']['id']
+                        logger.info(f"Found {event['event']} event with task ID: {task_id}")
+                        return get_task_from_blockchain(task_id)
                 
                 # If we got here, we couldn't find a task ID in the logs
                 logger.warning(f"Transaction {tx_hash} found, but no task events detected")
@@ -701,13 +1435,6 @@ def get_task_by_tx_hash(tx_hash):
                 
         except Exception as tx_error:
             logger.error(f"Error retrieving transaction: {str(tx_error)}")
-            
-            # Check if this is a locally generated hash for a failed transaction
-            for task_id, task in task_cache.items():
-                if "transaction_hash" in task and task["transaction_hash"] == tx_hash:
-                    logger.info(f"Found cached task for generated hash {tx_hash}")
-                    return task
-            
             return {"error": f"Error retrieving transaction: {str(tx_error)}"}
     
     except Exception as e:
@@ -734,8 +1461,8 @@ def get_recent_tasks(count=10):
         # Get the current task counter
         task_counter = 0
         try:
-            # Try with higher gas limit
-            task_counter = contract.functions.taskCounter().call({'gas': 2000000})
+            # Kept current from TaskCreated events, so this is normally answered from memory
+            task_counter = contract_state.task_counter()
             logger.info(f"Current task counter: {task_counter}")
         except Exception as counter_error:
             logger.warning(f"Error getting task counter from blockchain: {str(counter_error)}")
@@ -771,97 +1498,288 @@ def get_recent_tasks(count=10):
         start_id = max(1, task_counter - count + 1)
         end_id = task_counter
         
-        # Retrieve each task
-        tasks = []
-        for task_id in range(end_id, start_id - 1, -1):
-            task = get_task_from_blockchain(task_id)
-            if "error" not in task:
-                tasks.append(task)
-        
-        return tasks
+        # Retrieve the tasks in one round trip, newest first
+        return list(reversed(get_task_range(start_id, end_id - start_id + 1)))
     except Exception as e:
         logger.error(f"Unexpected error retrieving recent tasks: {str(e)}")
         return {"error": f"Unexpected error retrieving recent tasks: {str(e)}"}
 
-# Function to send transaction to blockchain
-def send_transaction(function_call, wallet_credentials=None):
-    try:
-        # Validate function call
-        if function_call is None:
-            logger.error("Function call is None")
-            return None
-            
-        # Get nonce for sending address
-        nonce = web3.eth.get_transaction_count(account.address)
-        logger.info(f"Current nonce: {nonce}")
-        
-        # Check if the function is callable
-        if not hasattr(function_call, 'estimate_gas') or not callable(function_call.estimate_gas):
-            logger.error(f"Invalid function call object: {type(function_call)}")
-            return None
+def get_tasks_from_blockchain(task_ids):
+    """
+    Retrieves several tasks from the blockchain with one batched read
+    
+    Every task is read with the same eth_call as get_task_from_blockchain, together with its
+    blob anchor when the contract has them, and all calls go out in one round trip; tasks
+    in the task cache aren't read again. Tasks whose call reverts or can't be decoded are
+    logged and left out.
+    
+    Args:
+        task_ids: The IDs of the tasks to retrieve
         
-        # Estimate gas required for the transaction - use a higher default for Arbitrum Sepolia
+    Returns:
+        A list of task dictionaries in the order of task_ids
+    """
+    cached = {task_id: cached_task(task_id) for task_id in task_ids}
+    task_ids = [task_id for task_id, task in cached.items() if task is None]
+    anchors = supports_blob_anchors()
+    calls = [task_read_call(task_id) for task_id in task_ids]
+    if anchors:
+        calls += [contract.functions.getTaskAnchor(task_id) for task_id in task_ids]
+    results = chain_reader.call(calls)
+    
+    tasks = []
+    for index, task_id in enumerate(task_ids):
+        read = results[index]
+        if not read.success:
+            logger.warning(f"Could not read task {task_id}: {read.value}")
+            continue
         try:
-            # First check if the function exists on the contract
-            function_name = getattr(function_call, '_function_name', 'unknown')
-            logger.info(f"Attempting to call function: {function_name}")
-            
-            # Try to estimate gas (web3.py versions may vary in parameter support)
-            try:
-                # First try with timeout parameter (newer web3.py versions)
-                gas_estimate = function_call.estimate_gas({'from': account.address}, timeout=60)
-            except TypeError:
-                # Fallback to standard estimation without timeout for older web3.py versions
-                logger.info("Timeout parameter not supported, using standard gas estimation")
-                gas_estimate = function_call.estimate_gas({'from': account.address})
-            logger.info(f"Estimated gas: {gas_estimate}")
-            # Add 100% safety margin for Arbitrum Sepolia which is known to have varying gas requirements
-            gas_estimate = int(gas_estimate * 2.0)
-            logger.info(f"Adjusted gas estimate with safety margin: {gas_estimate}")
+            task = format_task_read(read.value)
+            anchor = results[len(task_ids) + index] if anchors else None
+            if anchor is not None and anchor.success and task["completed"] and not task["result"]:
+                task.update(resolve_anchored_result(task_id, anchor.value))
         except Exception as e:
-            logger.warning(f"Gas estimation failed: {str(e)}. Using conservative default gas limit.")
-            # Check if this is a 'revert' error, which indicates the function will fail
-            if 'revert' in str(e).lower():
-                logger.error(f"Transaction would revert: {str(e)}")
-                # Try to get more details about the revert reason
-            
-            # Check if this is a revert error
-            if "execution reverted" in str(e).lower():
-                # Check if it's a permission issue
-                if "caller is not the owner" in str(e).lower():
-                    logger.error("Transaction failed: Account is not the contract owner")
-                    return None
-                # Check if it's a size issue
-                elif "result too long" in str(e).lower() or "topic too long" in str(e).lower():
-                    logger.error("Transaction failed: Data exceeds contract size limits")
-                    return None
-                else:
-                    logger.error(f"Transaction would revert: {str(e)}")
-                    # We'll still try to send it with higher gas, as sometimes estimation fails but tx succeeds
+            logger.warning(f"Could not decode task {task_id}: {str(e)}")
+            continue
+        cache_task(task)
+        cached[task_id] = task
+    return [task for task in cached.values() if task is not None]
+
+def task_page_calls(function, from_id, count):
+    """Returns the calls of a paged view that cover count tasks from from_id, TASK_PAGE_SIZE per call"""
+    end_id = from_id + count
+    return [function(start, min(TASK_PAGE_SIZE, end_id - start)) for start in range(from_id, end_id, TASK_PAGE_SIZE)]
+
+def indexed_task_range(from_id, count):
+    """Returns the chain index rows of a range of tasks, or None unless the index is fresh and has them all"""
+    if chain_index is None or not chain_index.is_fresh():
+        return None
+    rows = chain_index.task_range(from_id, count)
+    return rows if len(rows) == count else None
+
+def get_task_range(from_id, count):
+    """
+    Retrieves consecutive tasks from the blockchain
+    
+    The chain index answers when it is fresh and has the whole range. Otherwise contracts
+    with getTasksRange return a page of tasks per call and all pages go out in one round
+    trip; results anchored in the blob store take one more round trip for their digests.
+    Older contracts, and pages whose getTasksRange call fails, are read with a call per task.
+    
+    Args:
+        from_id: ID of the first task
+        count: Most tasks to retrieve
+        
+    Returns:
+        A list of task dictionaries in ascending ID order, without tasks that couldn't be read
+    """
+    from_id = max(1, from_id)
+    if count <= 0:
+        return []
+    rows = indexed_task_range(from_id, count)
+    if rows is not None:
+        return [format_indexed_task(row) for row in rows]
+    if not supports_task_pages():
+        return get_tasks_from_blockchain(range(from_id, from_id + count))
+    
+    calls = task_page_calls(contract.functions.getTasksRange, from_id, count)
+    try:
+        pages = chain_reader.call(calls)
+    except Exception as e:
+        logger.warning(f"Could not read tasks {from_id} to {from_id + count - 1} with getTasksRange: {str(e)}. Reading them one by one")
+        return get_tasks_from_blockchain(range(from_id, from_id + count))
+    tasks = []
+    unpaged_ids = []
+    for call, page in zip(calls, pages):
+        if not page.success:
+            logger.warning(f"Could not read tasks {call.args[0]} to {call.args[0] + call.args[1] - 1} with getTasksRange: "
+                           f"{page.value}. Reading them one by one")
+            unpaged_ids.extend(range(call.args[0], call.args[0] + call.args[1]))
+            continue
+        page_tasks, packed_results = page.value
+        tasks.extend(format_task(task_data, packed_result) for task_data, packed_result in zip(page_tasks, packed_results))
+    
+    # Completed tasks without a result on-chain may have anchored it in the blob store
+    anchored = [task for task in tasks if task["completed"] and not task["result"]] if supports_blob_anchors() else []
+    if anchored:
+        anchors = chain_reader.call([contract.functions.getTaskAnchor(task["id"]) for task in anchored])
+        for task, anchor in zip(anchored, anchors):
+            if anchor.success:
+                task.update(resolve_anchored_result(task["id"], anchor.value))
+    for task in tasks:
+        cache_task(task)
+    if unpaged_ids:
+        tasks = sorted(tasks + get_tasks_from_blockchain(unpaged_ids), key=lambda task: task["id"])
+    return tasks
+
+def get_task_summaries(from_id, count):
+    """
+    Retrieves the ID, requester, completion and result size of consecutive tasks
+    
+    Summaries leave out the topics and results, so pages of getTaskSummaries stay small
+    enough for listings of thousands of tasks. Contracts without it, and pages whose call
+    fails, are read in full.
+    
+    Args:
+        from_id: ID of the first task
+        count: Most summaries to retrieve
+        
+    Returns:
+        A list of summary dictionaries in ascending ID order
+    """
+    from_id = max(1, from_id)
+    if count <= 0:
+        return []
+    rows = indexed_task_range(from_id, count)
+    if rows is not None:
+        return [
+            {
+                "id": row["id"],
+                "requester": row["requester"],
+                "completed": row["completed"],
+                "result_length": len((row["result"] or "").encode("utf-8")) + len(row["packed_result"] or b"") + (row["result_size"] or 0)
+            }
+            for row in rows
+        ]
+    if not supports_task_pages():
+        return [task_summary(task) for task in get_task_range(from_id, count)]
+    
+    calls = task_page_calls(contract.functions.getTaskSummaries, from_id, count)
+    try:
+        pages = chain_reader.call(calls)
+    except Exception as e:
+        logger.warning(f"Could not read task summaries {from_id} to {from_id + count - 1}: {str(e)}. Reading the tasks one by one")
+        return [task_summary(task) for task in get_tasks_from_blockchain(range(from_id, from_id + count))]
+    summaries = []
+    for call, page in zip(calls, pages):
+        if not page.success:
+            logger.warning(f"Could not read task summaries {call.args[0]} to {call.args[0] + call.args[1] - 1}: "
+                           f"{page.value}. Reading the tasks one by one")
+            summaries.extend(task_summary(task) for task in get_tasks_from_blockchain(range(call.args[0], call.args[0] + call.args[1])))
+            continue
+        summaries.extend(
+            {"id": task_id, "requester": requester, "completed": completed, "result_length": result_length}
+            for task_id, requester, completed, result_length in page.value
+        )
+    return summaries
+
+def task_summary(task):
+    """Returns the summary of a task read in full"""
+    return {
+        "id": task["id"],
+        "requester": task["requester"],
+        "completed": task["completed"],
+        "result_length": task.get("result_size") or len(task["result"].encode("utf-8"))
+    }
+
+# The chain ID never changes, so it is read once
+@lru_cache(maxsize=1)
+def get_chain_id():
+    return web3.eth.chain_id
+
+# Function to send transaction to blockchain
+def send_transaction(function_call, wallet_credentials=None, on_status=None, wait=True, timeout=None):
+    """
+    Signs and sends a contract transaction, then optionally waits for its receipt
+    
+    Args:
+        function_call: The contract function call to send
+        wallet_credentials: Unused, kept for backward compatibility
+        on_status: Optional callback called as on_status(status, tx_hash) when the transaction
+                   is sent and when it is confirmed, reverted or left unconfirmed
+        wait: Wait for the receipt; otherwise return right after submission and let the
+              receipt tracker record the outcome
+        timeout: Seconds to wait for the receipt, TX_CONFIRMATION_TIMEOUT by default
+        
+    Returns:
+        The transaction hash, or None if the transaction could not be sent
+    """
+    timeout = TX_CONFIRMATION_TIMEOUT if timeout is None else timeout
+    nonce = None
+    # The signer stays pending until the receipt tracker hands it back
+    signer = signer_pool.acquire()
+    nonce_manager = signer.nonce_manager
+    tracked = False
+    broadcast = False
+    try:
+        # Validate function call
+        if function_call is None:
+            logger.error("Function call is None")
+            return None
             
-        # Build transaction with higher gas limit to be safe
+        # Check if the function is callable
+        if not hasattr(function_call, 'estimate_gas') or not callable(function_call.estimate_gas):
+            logger.error(f"Invalid function call object: {type(function_call)}")
+            return None
+        
+        # Use the learned gas limit for this function and payload size when there is one
+        function_name = getattr(function_call, 'fn_name', None) or getattr(function_call, '_function_name', 'unknown')
+        call_args = getattr(function_call, 'args', ()) or ()
+        payload_length = payload_size(call_args)
+        items = payload_items(call_args)
+        logger.info(f"Attempting to call function: {function_name} ({payload_length} byte payload) from {signer.address}")
+        predicted_gas = gas_model.predict(function_name, payload_length, items)
+        
+        if predicted_gas is not None:
+            gas_limit = predicted_gas
+            logger.info(f"Predicted gas limit: {gas_limit}")
+        else:
+            # Unseen shape: estimate gas, which also catches transactions that would revert
+            try:
+                # Try to estimate gas (web3.py versions may vary in parameter support)
+                try:
+                    # First try with timeout parameter (newer web3.py versions)
+                    gas_estimate = function_call.estimate_gas({'from': signer.address}, timeout=60)
+                except TypeError:
+                    # Fallback to standard estimation without timeout for older web3.py versions
+                    logger.info("Timeout parameter not supported, using standard gas estimation")
+                    gas_estimate = function_call.estimate_gas({'from': signer.address})
+                logger.info(f"Estimated gas: {gas_estimate}")
+                gas_limit = int(gas_estimate * gas_model.safety_margin)
+                logger.info(f"Adjusted gas estimate with safety margin: {gas_limit}")
+            except Exception as e:
+                logger.warning(f"Gas estimation failed: {str(e)}. Using conservative default gas limit.")
+                gas_limit = DEFAULT_GAS_LIMIT
+                
+                # Check if this is a revert error
+                if "execution reverted" in str(e).lower():
+                    # Check if it's a permission issue
+                    if "caller is not the owner" in str(e).lower():
+                        logger.error("Transaction failed: Account is not the contract owner")
+                        return None
+                    elif "caller is not an operator" in str(e).lower():
+                        logger.error(f"Transaction failed: Signer {signer.address} is not a contract operator")
+                        signer_pool.disable(signer.address, "not a contract operator")
+                        return None
+                    # Check if it's a size issue
+                    elif "result too long" in str(e).lower() or "topic too long" in str(e).lower():
+                        logger.error("Transaction failed: Data exceeds contract size limits")
+                        return None
+                    else:
+                        logger.error(f"Transaction would revert: {str(e)}")
+                        # We'll still try to send it, as sometimes estimation fails but tx succeeds
+        
+        # Take the next nonce from the signer's allocator so concurrent sends don't collide
+        nonce = nonce_manager.allocate()
+        logger.info(f"Allocated nonce: {nonce}")
+        
+        # Build the transaction
         tx_params = {
-            'from': account.address,
-            'gas': int(gas_estimate * 1.5),  # Add 50% buffer to gas estimate
-            'gasPrice': web3.eth.gas_price,
-            'nonce': nonce,
-            'maxFeePerGas': web3.eth.gas_price * 2,  # Double the current gas price as max fee
-            'maxPriorityFeePerGas': web3.eth.gas_price  # Set priority fee to current gas price
+            'from': signer.address,
+            'gas': gas_limit,
+            'nonce': nonce
         }
         
-        # Remove EIP-1559 specific parameters if not supported
-        try:
-            web3.eth.get_block('latest')['baseFeePerGas']
-        except (KeyError, AttributeError):
-            # EIP-1559 not supported, remove those fields
-            tx_params.pop('maxFeePerGas', None)
-            tx_params.pop('maxPriorityFeePerGas', None)
+        # EIP-1559 or legacy fee fields, whichever the chain supports, from the fee oracle
+        tx_params.update(fee_oracle.fee_params())
+        # build_transaction would otherwise ask the node for the chain ID on every call
+        tx_params['chainId'] = get_chain_id()
         
         # Build the raw transaction
         raw_tx = function_call.build_transaction(tx_params)
         
         # Sign the transaction
-        signed_tx = web3.eth.account.sign_transaction(raw_tx, private_key=PRIVATE_KEY)
+        signed_tx = web3.eth.account.sign_transaction(raw_tx, private_key=signer.account.key)
         
         # Get the raw transaction data
         if isinstance(signed_tx, dict) and 'rawTransaction' in signed_tx:
@@ -881,29 +1799,20 @@ def send_transaction(function_call, wallet_credentials=None):
             try:
                 tx_hash = web3.eth.send_raw_transaction(raw_tx_data)
                 logger.info(f"Transaction sent successfully on attempt {attempt+1}")
-                
-                # Wait for transaction receipt to confirm it was mined
-                try:
-                    receipt = web3.eth.wait_for_transaction_receipt(tx_hash, timeout=30)
-                    if receipt.status == 1:
-                        logger.info(f"Transaction confirmed successfully: {tx_hash.hex()}")
-                    else:
-                        logger.error(f"Transaction reverted on-chain: {tx_hash.hex()}")
-                        # Return the hash anyway so we can track the failed tx
-                except Exception as receipt_error:
-                    logger.warning(f"Could not get receipt, but tx was submitted: {str(receipt_error)}")
-                
-                return tx_hash.hex()
+                break
             except Exception as e:
                 logger.warning(f"Transaction attempt {attempt+1} failed: {str(e)}")
                 if attempt < max_retries - 1:
                     time.sleep(retry_delay)
                     retry_delay *= 2  # Exponential backoff
-                    # Increment nonce for next attempt
-                    nonce = web3.eth.get_transaction_count(account.address)
+                    # The same nonce is retried unless the node says it is wrong
+                    if is_nonce_error(e):
+                        nonce_manager.release(nonce)
+                        nonce_manager.resync(str(e))
+                        nonce = nonce_manager.allocate()
                     tx_params['nonce'] = nonce
                     raw_tx = function_call.build_transaction(tx_params)
-                    signed_tx = web3.eth.account.sign_transaction(raw_tx, private_key=PRIVATE_KEY)
+                    signed_tx = web3.eth.account.sign_transaction(raw_tx, private_key=signer.account.key)
                     # Get the updated raw tx data
                     if hasattr(signed_tx, 'rawTransaction'):
                         raw_tx_data = signed_tx.rawTransaction
@@ -911,24 +1820,730 @@ def send_transaction(function_call, wallet_credentials=None):
                         raw_tx_data = signed_tx.raw_transaction
                 else:
                     logger.error(f"Transaction failed after {max_retries} attempts: {str(e)}")
+                    nonce_manager.release(nonce)
                     return None
+        
+        # The transaction is out: from here on nothing may send it again or hand its nonce out
+        # HexBytes.hex() drops the 0x prefix that nodes need in receipt requests
+        tx_hash_hex = Web3.to_hex(tx_hash)
+        nonce_manager.mark_sent(nonce)
+        broadcast = True
+        record_sent_transaction(tx_hash_hex, signer.address, function_call)
+        if on_status:
+            on_status("sent", tx_hash_hex)
+        
+        sent_nonce = nonce
+        gas_limit = tx_params['gas']
+        
+        signer_released = threading.Event()
+        
+        def handle_receipt(tx_hash_hex, receipt):
+            # Runs on the receipt tracker once the transaction is mined or given up on, and
+            # again if a transaction it gave up on is mined later
+            if not signer_released.is_set():
+                signer_released.set()
+                signer_pool.release(signer)
+            if receipt is None:
+                receipt_status = "unconfirmed"
+                logger.warning(f"Transaction not mined yet, still watching it: {tx_hash_hex}")
+                # The transaction may still be pending, so its nonce stays in flight. If the node
+                # dropped it, the resync sees the nonce missing and queues it for reuse
+                try:
+                    nonce_manager.resync("unmined transaction")
+                except Exception as resync_error:
+                    logger.warning(f"Nonce resync failed: {str(resync_error)}")
+            else:
+                nonce_manager.confirm(sent_nonce)
+                if receipt.status == 0 and receipt.gasUsed >= gas_limit:
+                    # A revert that used the whole limit ran out of gas
+                    gas_model.record_out_of_gas(function_name, payload_length, items)
+                else:
+                    gas_model.observe(function_name, payload_length, receipt.gasUsed, predicted_gas, items)
+                if receipt.status == 1:
+                    logger.info(f"Transaction confirmed successfully: {tx_hash_hex}")
+                    receipt_status = "confirmed"
+                    # Tasks we created count toward taskCounter before the state cache's next sync
+                    contract_state.observe_receipt(receipt)
+                else:
+                    logger.error(f"Transaction reverted on-chain: {tx_hash_hex}")
+                    receipt_status = "reverted"
+            record_transaction_receipt(tx_hash_hex, receipt_status, receipt)
+            if on_status:
+                on_status(receipt_status, tx_hash_hex)
+        
+        # The receipt tracker watches the transaction from its own polling loop
+        receipt_tracker.track(tx_hash_hex, handle_receipt)
+        tracked = True
+        if wait:
+            try:
+                receipt_tracker.wait(tx_hash_hex, timeout=timeout)
+            except Exception as receipt_error:
+                logger.warning(f"Could not get receipt, but tx was submitted: {str(receipt_error) or 'timed out'}")
+                if on_status:
+                    on_status("unconfirmed", tx_hash_hex)
+        return tx_hash_hex
                     
     except Exception as e:
         logger.error(f"Error in send_transaction: {str(e)}")
+        if broadcast:
+            # The transaction was sent even though the bookkeeping after it failed
+            return tx_hash_hex
+        if nonce is not None:
+            nonce_manager.release(nonce)
         return None
+    finally:
+        if not tracked:
+            signer_pool.release(signer)
 
-@app.post("/process_task", response_model=Union[TaskResponse, ErrorResponse])
-async def process_task(task_data: RealEstateTaskRequest):
-    # Main try-except block for the entire function
+# Build the JSON topic stored with the task on the blockchain
+def build_blockchain_topic(property_address, task_type, additional_details):
+    # Create a structured topic for blockchain storage
+    topic_data = {
+        "property_address": property_address,
+        "task_type": task_type,
+        "additional_details": additional_details
+    }
+    
+    # Convert to JSON string for blockchain storage
+    blockchain_topic = json.dumps(topic_data)
+    
+    # Check if topic is too long for blockchain storage, keeping a margin below the contract's limit
+    MAX_BLOCKCHAIN_TOPIC_LENGTH = contract_max_string_length() - STRING_LENGTH_MARGIN
+    
+    # Truncate topic if needed
+    if len(blockchain_topic) > MAX_BLOCKCHAIN_TOPIC_LENGTH:
+        logger.warning(f"Topic too long ({len(blockchain_topic)} chars), truncating for blockchain storage")
+        # Truncate and add indicator
+        blockchain_topic = blockchain_topic[:MAX_BLOCKCHAIN_TOPIC_LENGTH-30] + "... [truncated]"
+    return blockchain_topic
+
+def run_specialists(inputs):
+    """
+    Runs the comprehensive analysis specialists concurrently and merges their outputs
+    
+    Args:
+        inputs: Dictionary with property_address, task_type and additional_details
+        
+    Returns:
+        The merged RealEstateAnalysisOutput dictionary, the per-specialist outputs and the timings
+    """
+    def run_one(crew):
+        started_at = time.time()
+        try:
+            return crew.kickoff(), None, time.time() - started_at
+        except Exception as e:
+            return None, e, time.time() - started_at
+    
+    started_at = time.time()
+    with get_crew_registry().specialist_crews(inputs) as crews:
+        futures = {name: specialist_executor.submit(run_one, crew) for name, crew in crews.items()}
+        runs = {name: future.result() for name, future in futures.items()}
+    wall_clock = time.time() - started_at
+    
+    outputs = {}
+    timings = {}
+    for name, (result, error, seconds) in runs.items():
+        timings[name] = {"seconds": round(seconds, 3), "status": "ok" if error is None else "failed"}
+        if error is None:
+            answer, raw = extract_answer(result)
+            outputs[name] = answer if answer is not None else {"summary": (raw or "")[:500]}
+        else:
+            logger.error(f"Specialist {name} failed: {str(error)}")
+            timings[name]["error"] = str(error)
+    
+    if not outputs:
+        raise RuntimeError("All specialists of the comprehensive analysis failed")
+    
+    # Each field comes from its most authoritative specialist that answered
+    merged = {}
+    for field, sources in SPECIALIST_FIELD_SOURCES.items():
+        candidates = sources + [name for name in outputs if name not in sources]
+        merged[field] = next((str(outputs[name][field]) for name in candidates
+                              if name in outputs and outputs[name].get(field)), "Not available")
+    merged["summary"] = " ".join(
+        f"{AGENT_PROFILES[name]['role']}: {output.get('summary', '')}" for name, output in outputs.items()
+    )
+    
+    specialist_seconds = sum(timing["seconds"] for timing in timings.values())
+    logger.info(f"Comprehensive analysis took {wall_clock:.1f}s ({specialist_seconds:.1f}s across specialists)")
+    return merged, outputs, {
+        "wall_clock_seconds": round(wall_clock, 3),
+        "specialist_seconds": round(specialist_seconds, 3),
+        "specialists": timings
+    }
+
+# Stage 1: run the AI analysis for a task
+def run_analysis(task_id, property_address, task_type, additional_details):
+    """
+    Runs the CrewAI analysis for a task and formats the result for blockchain storage.
+    This runs on the analysis worker pool, so it only returns plain data.
+    
+    Args:
+        task_id: The client supplied task ID
+        property_address: Address of the property to analyze
+        task_type: Type of analysis to run
+        additional_details: Extra details supplied with the request
+        
+    Returns:
+        A dictionary with the structured output, the result string for the blockchain
+        and the serializable crew output
+    """
+    # Bind the request to the prebuilt crew for this task type
+    inputs = {
+        "property_address": property_address,
+        "task_type": task_type,
+        "additional_details": json.dumps(additional_details, indent=2)
+    }
+    
+    specialist_timings = None
+    if task_type == COMPREHENSIVE_TASK_TYPE:
+        # Independent specialists run concurrently and are merged locally
+        result, specialist_outputs, specialist_timings = run_specialists(inputs)
+    else:
+        with get_crew_registry().crew(task_type, inputs) as crew:
+            # Run the analysis
+            result = crew.kickoff()
+    logger.info(f"Analysis completed for task {task_id}")
+    
+    # Parse and validate the result once; the on-chain string and the saved record both come from it
+    record = {"merged": result, "specialists": specialist_outputs} if specialist_timings is not None else None
+    normalized = normalize_crew_result(result, record=record)
+    structured_output = normalized.structured_output
+    result_str = normalized.result_str
+    logger.info(f"Normalized crew result for task {task_id} (valid: {normalized.valid})")
+    
+    analysis = {
+        "structured_output": structured_output,
+        "result_str": result_str,
+        "crew_output": normalized.record
+    }
+    if specialist_timings is not None:
+        analysis["specialist_timings"] = specialist_timings
+    return analysis
+
+# Helpers for committing analyses to the contract
+CONTRACT_MAX_STRING_LENGTH = 8000  # MAX_STRING_LENGTH in contracts/AIAgent.sol, used until the contract is read
+STRING_LENGTH_MARGIN = 500  # String results and topics stay this far below the limit to be safe
+
+def contract_max_string_length():
+    """Returns the contract's MAX_STRING_LENGTH from the contract state cache"""
+    try:
+        return contract_state.max_string_length() or CONTRACT_MAX_STRING_LENGTH
+    except Exception as e:
+        logger.warning(f"Could not read MAX_STRING_LENGTH: {str(e)}. Assuming {CONTRACT_MAX_STRING_LENGTH}")
+        return CONTRACT_MAX_STRING_LENGTH
+
+# Functions of the ABI that the deployed contract has, by contract address
+deployed_contract_functions = {}
+
+def contract_functions():
+    """
+    Returns the names of the contract functions the deployed contract has
+    
+    The ABI file may be newer than the contract at CONTRACT_ADDRESS, so the features below
+    are checked against the deployed code, read once per address. If the code can't be
+    read the ABI is trusted until it can.
+    """
+    names = deployed_contract_functions.get(contract.address)
+    if names is not None:
+        return names
     try:
-        task_id = task_data.task_id
-        property_address = task_data.property_address
-        task_type = task_data.task_type
-        additional_details = task_data.additional_details or {}
-        
-        # Initialize structured_output with default values in case of errors
-        structured_output = {
-            "summary": "Analysis pending",
+        names = deployed_functions(web3, contract)
+    except Exception as e:
+        logger.warning(f"Could not read the contract code: {str(e)}. Assuming the ABI matches the deployment")
+        return {fn.get('name') for fn in contract.abi if fn.get('type') == 'function'}
+    missing = sorted({fn.get('name') for fn in contract.abi if fn.get('type') == 'function'} - names)
+    if missing:
+        logger.warning(f"The contract at {contract.address} doesn't have {', '.join(missing)}; the features that need them are off")
+    deployed_contract_functions[contract.address] = names
+    return names
+
+def supports_single_tx_commit():
+    return SINGLE_TX_COMMIT and 'createAndCompleteTask' in contract_functions()
+
+def supports_packed_results():
+    return PACKED_RESULTS and {'completeTaskPacked', 'createAndCompleteTaskPacked', 'completeTasksPacked'} <= contract_functions()
+
+def supports_packed_reads():
+    # Tasks written packed before PACKED_RESULTS was turned off still need getTaskPacked to read
+    return 'getTaskPacked' in contract_functions()
+
+def supports_blob_anchors():
+    return {'anchorTask', 'createAndAnchorTask', 'anchorTasks', 'getTaskAnchor'} <= contract_functions()
+
+def supports_task_pages():
+    return {'getTasksRange', 'getTaskSummaries'} <= contract_functions()
+
+def supports_blob_results():
+    return BLOB_RESULTS and supports_blob_anchors()
+
+def summary_only_result(result_str):
+    # Stored on-chain instead of an analysis that doesn't fit
+    try:
+        summary = json.loads(result_str).get("summary", "Analysis completed")
+    except (ValueError, AttributeError):
+        summary = "Analysis completed"
+    return json.dumps({"summary": summary, "note": "Full analysis available in local storage"})
+
+def chain_result_payload(result_str):
+    """
+    Returns the result to write on-chain: the BlobAnchor of the result in the blob store
+    with BLOB_RESULTS, compressed bytes when the contract takes them, otherwise the JSON
+    string. Only the summary is kept on-chain if the full analysis doesn't fit.
+    """
+    if supports_blob_results():
+        # The blob is stored before the transaction is sent, so an anchor never points at a missing result
+        return blob_store.put(result_str)
+    
+    max_length = contract_max_string_length()
+    if supports_packed_results():
+        packed = encode_result(result_str)
+        if len(packed) <= max_length:
+            return packed
+        logger.warning(f"Packed result too long ({len(packed)} bytes), storing the summary on-chain")
+        return encode_result(summary_only_result(result_str))
+    
+    if len(result_str) <= max_length - STRING_LENGTH_MARGIN:
+        return result_str
+    logger.warning(f"Result too long ({len(result_str)} chars), storing the summary on-chain")
+    return summary_only_result(result_str)
+
+def create_and_complete_call(blockchain_topic, chain_result):
+    # Contract call that creates a task with the result returned by chain_result_payload
+    if isinstance(chain_result, BlobAnchor):
+        return contract.functions.createAndAnchorTask(blockchain_topic, chain_result.digest, chain_result.size)
+    if isinstance(chain_result, bytes):
+        return contract.functions.createAndCompleteTaskPacked(blockchain_topic, chain_result)
+    return contract.functions.createAndCompleteTask(blockchain_topic, chain_result)
+
+def complete_call(chain_task_id, chain_result):
+    # Contract call that completes a created task with the result returned by chain_result_payload
+    if isinstance(chain_result, BlobAnchor):
+        return contract.functions.anchorTask(chain_task_id, chain_result.digest, chain_result.size)
+    if isinstance(chain_result, bytes):
+        return contract.functions.completeTaskPacked(chain_task_id, chain_result)
+    return contract.functions.completeTask(chain_task_id, chain_result)
+
+def complete_batch_call(chain_task_ids, chain_results):
+    # Contract call that completes several created tasks; the results all have the same form
+    if isinstance(chain_results[0], BlobAnchor):
+        return contract.functions.anchorTasks(chain_task_ids, [anchor.digest for anchor in chain_results],
+                                              [anchor.size for anchor in chain_results])
+    if isinstance(chain_results[0], bytes):
+        return contract.functions.completeTasksPacked(chain_task_ids, chain_results)
+    return contract.functions.completeTasks(chain_task_ids, chain_results)
+
+def record_sent_transaction(tx_hash, sender, function_call):
+    # Records the tasks a transaction carries in the tx index as soon as it is sent
+    try:
+        role, tasks = sent_tasks(function_call)
+        if tasks:
+            tx_index.record_sent(tx_hash, function_call.address, sender, role, tasks)
+    except Exception as e:
+        logger.warning(f"Could not record transaction {tx_hash} in the tx index: {str(e)}")
+
+def record_transaction_receipt(tx_hash, receipt_status, receipt):
+    # Records the outcome of a transaction, and the IDs of the tasks it created, in the tx index
+    try:
+        created_task_ids = task_ids_from_receipt(receipt) if receipt_status == "confirmed" else []
+        tx_index.record_receipt(tx_hash, receipt_status, receipt.blockNumber if receipt is not None else None, created_task_ids)
+    except Exception as e:
+        logger.warning(f"Could not record the receipt of {tx_hash} in the tx index: {str(e)}")
+
+def check_commit_permission():
+    """
+    Returns True if the service account may complete tasks, as the contract owner or an
+    operator, False if not, None if it can't be checked. Extra signers are checked by the
+    ownership probe, which stops using those without permission. The answer comes from
+    the contract state cache, so it costs no RPC while the cache is fresh.
+    """
+    if 'owner' not in contract_functions():
+        return None
+    try:
+        permitted = contract_state.is_operator(account.address)
+    except Exception as owner_error:
+        logger.warning(f"Could not verify ownership: {str(owner_error)}")
+        return None
+    if not permitted:
+        logger.error(f"Account {account.address} is neither the contract owner nor an operator")
+        return False
+    return True
+
+def decode_task_log(log):
+    """Decodes a task event of our contract, dispatching on its topic0; returns None for any other log"""
+    if log['address'].lower() != contract.address.lower() or not log['topics']:
+        return None
+    event = task_event_topics.get(bytes(log['topics'][0]))
+    return decode_log(event, log) if event is not None else None
+
+def task_ids_from_receipt(receipt):
+    """Returns the task IDs the contract assigned in the TaskCreated events of a receipt, in log order"""
+    if receipt is None:
+        return []
+    events = (decode_task_log(log) for log in receipt['logs'])
+    return [event['args']['id'] for event in events if event is not None and event['event'] == "TaskCreated"]
+
+def task_id_from_receipt(receipt):
+    """Returns the task ID the contract assigned in the TaskCreated event of a receipt, or None"""
+    task_ids = task_ids_from_receipt(receipt)
+    return task_ids[0] if task_ids else None
+
+def commit_to_chain(task_id, blockchain_topic, result_str, on_stage=None, wait_for_receipt=True, receipt_timeout=None):
+    """
+    Creates and completes one task on the blockchain
+    
+    When the contract has createAndCompleteTask the topic and result go out in one
+    transaction; otherwise the task is created, and completed once the contract has
+    assigned it an ID.
+    
+    Args:
+        task_id: The client supplied task ID, used in logs
+        blockchain_topic: The topic built by build_blockchain_topic
+        result_str: The analysis string to store
+        on_stage: Optional callback called as on_stage(stage, detail) as the transactions progress
+        wait_for_receipt: Wait for the final receipt; otherwise return once it is submitted
+        receipt_timeout: Seconds to wait for each receipt, TX_CONFIRMATION_TIMEOUT by default
+        
+    Returns:
+        A dictionary with tx_hash, result_tx_hash, chain_task_id and transaction_status
+    """
+    def report(prefix):
+        # Turn send_transaction status updates into job stages such as create_task_sent
+        if on_stage is None:
+            return None
+        return lambda status, tx_hash: on_stage(f"{prefix}_{status}", {"transaction_hash": tx_hash})
+    
+    tx_hash = None
+    transaction_status = "pending"
+    result_tx_hash = None
+    chain_task_id = None
+    
+    try:
+        # A blob anchor, compressed bytes or the JSON string, depending on the contract and settings
+        chain_result = chain_result_payload(result_str)
+        
+        if supports_single_tx_commit():
+            # One owner-only transaction creates the task and stores the result
+            if check_commit_permission() is False:
+                logger.error("Cannot commit task - only the contract owner or an operator can complete tasks")
+                transaction_status = "error_not_owner"
+            else:
+                logger.info(f"Committing task {task_id} with topic: {blockchain_topic[:100]}...")
+                commit_function = create_and_complete_call(blockchain_topic, chain_result)
+                result_tx_hash = send_transaction(commit_function, on_status=report("complete_task"),
+                                                  wait=wait_for_receipt, timeout=receipt_timeout)
+                tx_hash = result_tx_hash
+        else:
+            # Step 1: Create the blockchain task. Its receipt carries the ID to complete, so this always waits
+            logger.info(f"Creating blockchain task with topic: {blockchain_topic[:100]}...")
+            create_task_function = contract.functions.createTask(blockchain_topic)
+            tx_hash = send_transaction(create_task_function, on_status=report("create_task"), timeout=receipt_timeout)
+            
+            if not tx_hash:
+                logger.warning(f"Failed to create task {task_id} on blockchain")
+            else:
+                logger.info(f"Task {task_id} created on blockchain with tx hash: {tx_hash}")
+                chain_task_id = task_id_from_receipt(receipt_tracker.receipt(tx_hash))
+                if chain_task_id is None:
+                    # Fall back to the client's ID as before, which only matches if the counters agree
+                    logger.warning(f"No TaskCreated event for task {task_id}, completing it under the client ID")
+                    chain_task_id = task_id
+                
+                # Step 2: Store the result on blockchain, which only the contract owner or an operator can do
+                if check_commit_permission() is False:
+                    logger.error("Cannot complete task - only the contract owner or an operator can complete tasks")
+                    transaction_status = "error_not_owner"
+                else:
+                    logger.info(f"Completing task {chain_task_id} on blockchain with result: {result_str[:100]}...")
+                    complete_task_function = complete_call(chain_task_id, chain_result)
+                    result_tx_hash = send_transaction(complete_task_function, on_status=report("complete_task"),
+                                                      wait=wait_for_receipt, timeout=receipt_timeout)
+        
+        if result_tx_hash and not wait_for_receipt:
+            logger.info(f"Task {task_id} commit submitted with tx hash: {result_tx_hash}")
+            transaction_status = "submitted"
+        elif result_tx_hash:
+            receipt = receipt_tracker.receipt(result_tx_hash)
+            if receipt is None:
+                # The wait timed out; the receipt tracker records the outcome once it is mined
+                logger.warning(f"Task {task_id} commit not confirmed yet, tx hash: {result_tx_hash}")
+                transaction_status = "unconfirmed"
+            elif receipt.status == 0:
+                logger.error(f"Task {task_id} commit reverted on blockchain: {result_tx_hash}")
+                transaction_status = "reverted"
+            else:
+                logger.info(f"Task {task_id} completed on blockchain with tx hash: {result_tx_hash}")
+                transaction_status = "completed"
+                if chain_task_id is None:
+                    chain_task_id = task_id_from_receipt(receipt)
+        elif transaction_status != "error_not_owner":
+            logger.error(f"Failed to store task {task_id} on blockchain")
+            transaction_status = "failed"
+    except Exception as e:
+        logger.error(f"Error storing result on blockchain: {str(e)}")
+        transaction_status = "error"
+    
+    return {
+        "tx_hash": tx_hash,
+        "result_tx_hash": result_tx_hash,
+        "chain_task_id": chain_task_id,
+        "transaction_status": transaction_status
+    }
+
+# Commit batching
+# Analyses that finish close together are committed with createTasks and completeTasks,
+# two transactions for the whole batch instead of one or two per analysis
+COMMIT_BATCHING = os.getenv("COMMIT_BATCHING", "true").lower() == "true"
+COMMIT_BATCH_SIZE = int(os.getenv("COMMIT_BATCH_SIZE", "16"))
+COMMIT_BATCH_WINDOW = float(os.getenv("COMMIT_BATCH_WINDOW", "0.5"))
+COMMIT_BATCH_GAS_FRACTION = float(os.getenv("COMMIT_BATCH_GAS_FRACTION", "0.5"))
+# Batches flushed at once (each waits for its own receipts) and commits that may wait for a batch
+COMMIT_BATCH_FLUSHES = int(os.getenv("COMMIT_BATCH_FLUSHES", "4"))
+COMMIT_BATCH_QUEUE_SIZE = int(os.getenv("COMMIT_BATCH_QUEUE_SIZE", "64"))
+
+def supports_commit_batching():
+    return COMMIT_BATCHING and {'createTasks', 'completeTasks'} <= contract_functions()
+
+def estimate_commit_gas(blockchain_topic, chain_result):
+    """Rough gas to create and complete one task: fixed overhead plus storage words and calldata"""
+    if isinstance(chain_result, BlobAnchor):
+        # The digest and size take one word each
+        sizes = [payload_size([blockchain_topic]), 64]
+    else:
+        sizes = [payload_size([blockchain_topic]), payload_size([chain_result])]
+    stored_words = sum((size + 31) // 32 for size in sizes)
+    return 60000 + 22100 * stored_words + 16 * sum(sizes)
+
+@lru_cache(maxsize=1)
+def commit_batch_gas_budget():
+    # Batches stay well under the block gas limit so they still fit when blocks are busy
+    try:
+        block_gas_limit = web3.eth.get_block("latest")["gasLimit"]
+    except Exception as e:
+        logger.warning(f"Could not read the block gas limit: {str(e)}. Assuming 30M gas")
+        block_gas_limit = 30000000
+    return int(block_gas_limit * COMMIT_BATCH_GAS_FRACTION)
+
+def flush_commit_batch(items, reason):
+    """
+    Commits a batch of analyses, called by the commit writer
+    
+    Each item's payload is a dictionary with task_id, topic, result_str, result (the
+    on-chain payload), on_stage, wait_for_receipt and receipt_timeout; its future resolves with the dictionary
+    returned by commit_to_chain plus the batch details.
+    
+    Returns:
+        The batch details kept in the writer's stats
+    """
+    payloads = [item.payload for item in items]
+    batch = {"size": len(items), "reason": reason}
+    
+    if len(items) == 1:
+        # Nothing to share the transaction with
+        payload = payloads[0]
+        commit = commit_to_chain(payload["task_id"], payload["topic"], payload["result_str"], payload["on_stage"],
+                                 payload["wait_for_receipt"], payload["receipt_timeout"])
+        items[0].future.set_result(dict(commit, batch=batch))
+        return batch
+    
+    def report(prefix):
+        # Every task in the batch sees the shared transactions' stages
+        def on_status(status, tx_hash):
+            for payload in payloads:
+                if payload["on_stage"]:
+                    payload["on_stage"](f"{prefix}_{status}", {"transaction_hash": tx_hash, "batch_size": len(items)})
+        return on_status
+    
+    def resolve(commit):
+        for item in items:
+            item.future.set_result(dict(commit, chain_task_id=None, batch=batch))
+        return batch
+    
+    timeout = max(payload["receipt_timeout"] or TX_CONFIRMATION_TIMEOUT for payload in payloads)
+    if check_commit_permission() is False:
+        logger.error("Cannot commit batch - only the contract owner or an operator can complete tasks")
+        return resolve({"tx_hash": None, "result_tx_hash": None, "transaction_status": "error_not_owner"})
+    
+    # Step 1: Create all tasks; the receipt lists their IDs in topic order
+    logger.info(f"Creating {len(items)} blockchain tasks in one transaction ({reason})")
+    tx_hash = send_transaction(contract.functions.createTasks([payload["topic"] for payload in payloads]),
+                               on_status=report("create_task"), timeout=timeout)
+    create_receipt = receipt_tracker.receipt(tx_hash) if tx_hash else None
+    chain_task_ids = task_ids_from_receipt(create_receipt)
+    if len(chain_task_ids) != len(items):
+        logger.error(f"Batch createTasks {tx_hash} assigned {len(chain_task_ids)} IDs for {len(items)} tasks")
+        return resolve({"tx_hash": tx_hash, "result_tx_hash": None, "transaction_status": "failed"})
+    batch["create_tx_hash"] = tx_hash
+    
+    # Step 2: Complete them all. Only wait for the receipt if some request is waiting for it
+    wait = any(payload["wait_for_receipt"] for payload in payloads)
+    complete_function = complete_batch_call(chain_task_ids, [payload["result"] for payload in payloads])
+    result_tx_hash = send_transaction(complete_function, on_status=report("complete_task"), wait=wait, timeout=timeout)
+    complete_receipt = receipt_tracker.receipt(result_tx_hash) if result_tx_hash else None
+    
+    if not result_tx_hash:
+        transaction_status = "failed"
+    elif complete_receipt is None:
+        # Not waited for, or the wait timed out; the receipt tracker records the outcome
+        transaction_status = "unconfirmed" if wait else "submitted"
+    elif complete_receipt.status == 0:
+        transaction_status = "reverted"
+    else:
+        transaction_status = "completed"
+    
+    if complete_receipt is not None:
+        batch["gas_per_task"] = (create_receipt.gasUsed + complete_receipt.gasUsed) // len(items)
+    logger.info(f"Committed batch of {len(items)} tasks {chain_task_ids}: {transaction_status}, "
+                f"{batch.get('gas_per_task', 'unknown')} gas per task")
+    
+    for item, chain_task_id in zip(items, chain_task_ids):
+        item.future.set_result({
+            "tx_hash": tx_hash,
+            "result_tx_hash": result_tx_hash,
+            "chain_task_id": chain_task_id,
+            "transaction_status": transaction_status,
+            "batch": batch
+        })
+    return batch
+
+commit_writer = BatchWriter(
+    "commit",
+    flush_commit_batch,
+    max_items=COMMIT_BATCH_SIZE,
+    max_wait=COMMIT_BATCH_WINDOW,
+    max_cost=commit_batch_gas_budget,
+    max_pending=COMMIT_BATCH_QUEUE_SIZE,
+    max_flushes=COMMIT_BATCH_FLUSHES
+)
+
+def submit_commit(task_id, blockchain_topic, result_str, on_stage=None, wait_for_receipt=True, receipt_timeout=None):
+    """
+    Queues a task for the next commit batch and returns a Future for its commit_to_chain dictionary.
+    Preparing the payload may read the chain and write the blob store, so this blocks.
+    
+    Raises:
+        PoolSaturatedError: If the commit writer's queue is full
+    """
+    chain_result = chain_result_payload(result_str)
+    max_length = contract_max_string_length()
+    for name, value in (("topic", blockchain_topic), ("result", chain_result)):
+        if payload_size([value]) > max_length:
+            raise ValueError(f"Task {task_id} {name} exceeds the contract's {max_length} byte limit")
+    payload = {
+        "task_id": task_id,
+        "topic": blockchain_topic,
+        "result_str": result_str,
+        "result": chain_result,
+        "on_stage": on_stage,
+        "wait_for_receipt": wait_for_receipt,
+        "receipt_timeout": receipt_timeout
+    }
+    return commit_writer.submit(payload, cost=estimate_commit_gas(blockchain_topic, chain_result))
+
+# Stage 2: store the analysis on the blockchain and locally
+def store_analysis(task_id, property_address, task_type, additional_details, analysis, on_stage=None,
+                   wait_for_receipt=True, receipt_timeout=None, chain_commit=None):
+    """
+    Commits the task to the blockchain, then saves the outputs locally.
+    This runs on the chain worker pool.
+    
+    Args:
+        task_id: The client supplied task ID
+        property_address: Address of the property that was analyzed
+        task_type: Type of analysis that was run
+        additional_details: Extra details supplied with the request
+        analysis: The dictionary returned by run_analysis
+        on_stage: Optional callback called as on_stage(stage, detail) as the transactions progress
+        wait_for_receipt: Wait for the receipts; otherwise return once the final transaction is submitted
+                          and let the receipt tracker update the local status
+        receipt_timeout: Seconds to wait for each receipt, TX_CONFIRMATION_TIMEOUT by default
+        chain_commit: Result of a commit already made by the commit writer; if None the task is committed here
+        
+    Returns:
+        A TaskResponse describing the stored task
+    """
+    structured_output = analysis["structured_output"]
+    result_str = analysis["result_str"]
+    result = analysis["crew_output"]
+    
+    if chain_commit is None:
+        blockchain_topic = build_blockchain_topic(property_address, task_type, additional_details)
+        chain_commit = commit_to_chain(task_id, blockchain_topic, result_str, on_stage, wait_for_receipt, receipt_timeout)
+    transaction_status = chain_commit["transaction_status"]
+    chain_task_id = chain_commit["chain_task_id"]
+    final_tx_hash = chain_commit["result_tx_hash"] or chain_commit["tx_hash"]
+    
+    # Save the raw CrewAI output to a separate file
+    crew_output_file = save_crew_output(
+        crew_result=result,
+        property_address=property_address,
+        task_type=task_type,
+        task_id=task_id,
+        transaction_hash=final_tx_hash
+    )
+    logger.info(f"CrewAI output saved to {crew_output_file}")
+    
+    # Save the AI output locally regardless of blockchain status
+    saved_file = save_ai_output(
+        task_id=task_id, 
+        tx_hash=final_tx_hash, 
+        structured_output=structured_output, 
+        result_str=result_str,
+        property_address=property_address,
+        task_type=task_type,
+        transaction_status=transaction_status,
+        chain_task_id=chain_task_id
+    )
+    logger.info(f"AI output saved to {saved_file}")
+    
+    # The receipt tracker records whether the final transaction was mined, now or once it is
+    if final_tx_hash:
+        try:
+            receipt_tracker.add_callback(final_tx_hash, record_receipt_status)
+        except KeyError:
+            logger.warning(f"Transaction {final_tx_hash} is not tracked, its local status won't be updated")
+    
+    # Try to get the updated task from blockchain if it was stored successfully
+    on_chain_result = None
+    if transaction_status == "completed":
+        try:
+            on_chain_result = get_task_from_blockchain(chain_task_id if chain_task_id is not None else task_id)
+        except Exception as fetch_error:
+            logger.warning(f"Could not fetch on-chain result after completion: {str(fetch_error)}")
+            on_chain_result = {"id": chain_task_id, "completed": True}
+    
+    # Return the result with appropriate status
+    return TaskResponse(
+        task_id=task_id,
+        local_result=result_str,
+        output_json=structured_output,
+        transaction_hash=final_tx_hash,
+        transaction_status=transaction_status,
+        on_chain_result=on_chain_result,
+        specialist_timings=analysis.get("specialist_timings"),
+        chain_task_id=chain_task_id,
+        commit_batch=chain_commit.get("batch")
+    )
+
+def record_receipt_status(tx_hash, receipt):
+    # Receipt tracker callback: None means the transaction isn't mined yet, and the tracker
+    # calls again if it is mined later
+    if receipt is None:
+        update_local_transaction_status(tx_hash, "unconfirmed")
+    else:
+        chain_task_id = task_id_from_receipt(receipt)
+        update_local_transaction_status(tx_hash, "confirmed" if receipt.status == 1 else "reverted", chain_task_id)
+
+# Build the error response for a task that failed while processing
+def build_task_error_response(task_id, property_address, task_type, additional_details, e):
+    # Generate a transaction hash for error response
+    error_tx_hash = web3.keccak(text=f"error_{task_id}_{int(time.time())}").hex()
+    
+    # Try to save whatever output we have
+    try:
+        # Create a basic structured output for the error case
+        error_output = {
+            "summary": f"Error processing task: {str(e)}",
             "roi": "Not available",
             "cap_rate": "Not available",
             "cash_flow": "Not available",
@@ -937,532 +2552,262 @@ async def process_task(task_data: RealEstateTaskRequest):
             "recommendations": "Not available"
         }
         
-        # Create a structured topic for blockchain storage
-        topic_data = {
-            "property_address": property_address,
-            "task_type": task_type,
-            "additional_details": additional_details
-        }
-        
-        # Convert to JSON string for blockchain storage
-        blockchain_topic = json.dumps(topic_data)
-        
-        # Log the incoming request
-        logger.info(f"Processing task {task_id} for property: {property_address}")
-        
-        # Create the AI agents specialized for real estate with enhanced locality focus and data-driven approach
-        real_estate_analyst = Agent(
-            role='Senior Real Estate Market Analyst',
-            goal='Deliver authoritative, data-driven market analyses with actionable insights using real-time internet data',
-            backstory="""You are a highly respected real estate analyst with 15+ years of experience analyzing property markets.
-                       You have a reputation for delivering precise, data-driven analyses that cut through the noise to identify
-                       the most significant market factors. You consistently use specific numbers, percentages, and metrics in your
-                       analyses rather than vague generalizations. You're known for your ability to synthesize complex market data
-                       into clear, actionable insights that help clients make confident decisions. Your reports always include
-                       specific price points, growth rates, and comparative metrics. You focus on hyperlocal market dynamics at the
-                       neighborhood level and always provide context by comparing local metrics to broader market averages.
-                       You structure your analyses with clear bullet points and headers for maximum clarity and impact.
-                       You leverage internet search to find the most current market data, trends, and comparable properties.""",
-            llm=llm,
-            tools=[search_tool],
-            verbose=True
-        )
-        
-        property_appraiser = Agent(
-            role='Senior Property Appraiser & Valuation Expert',
-            goal='Deliver precise property valuations with specific value drivers and comparative metrics using real-time internet data',
-            backstory="""You are a highly respected property appraiser with 15+ years of experience and multiple advanced certifications.
-                       You're known for delivering valuations with specific dollar amounts, value ranges, and confidence levels rather than
-                       vague estimates. Your reports always identify the exact features that drive a property's value with specific dollar
-                       or percentage impacts for each feature. You consistently use comparative metrics like price per square foot, value
-                       percentile ranking, and neighborhood premium/discount percentages. You have extensive experience with both automated
-                       valuation models and traditional appraisal methods. You're skilled at identifying unique property attributes that
-                       automated systems miss. You structure your valuations with clear bullet points and headers for maximum clarity and impact.
-                       You always provide specific, actionable insights rather than general observations.
-                       You leverage internet search to find the most current property values, comparable sales, and market trends.""",
-            llm=llm,
-            tools=[search_tool],
-            verbose=True
-        )
-        
-        investment_advisor = Agent(
-            role='Elite Real Estate Investment Strategist',
-            goal='Deliver precise investment analyses with specific returns, risks, and growth projections',
-            backstory="""You are an elite investment advisor with 15+ years of experience and a track record of identifying
-                       high-performing real estate investments. You're known for providing specific ROI projections, cap rates,
-                       cash-on-cash returns, and IRR calculations rather than vague potential. Your analyses always include
-                       detailed cash flow projections with specific income and expense figures. You quantify investment risks
-                       with probability estimates and provide specific mitigation strategies. You have deep expertise in value-add
-                       opportunities and can estimate renovation ROIs with remarkable accuracy. You consistently provide comparative
-                       metrics showing how an investment performs against market averages. You structure your analyses with clear
-                       bullet points and headers for maximum clarity and impact. You always provide specific, actionable insights
-                       rather than general observations.""",
-            llm=llm,
-            tools=[search_tool],
-            verbose=True
+        # Save the error output locally
+        save_ai_output(
+            task_id=task_id,
+            tx_hash=error_tx_hash,
+            structured_output=error_output,
+            result_str=json.dumps({"error": str(e)}),
+            property_address=property_address,
+            task_type=task_type
         )
+    except Exception as save_error:
+        logger.error(f"Failed to save error output: {str(save_error)}")
+    
+    # Keep the failed task in the tx index so it can still be looked up by its hash
+    tx_index.record_failed(error_tx_hash, {
+        "id": task_id,
+        "topic": build_blockchain_topic(property_address, task_type, additional_details),
+        "result": json.dumps({"error": str(e)}),
+        "requester": account.address,
+        "completed": True,
+        "transaction_hash": error_tx_hash,
+        "transaction_status": "Error",
+        "error": f"Failed to process task: {str(e)}"
+    })
+    
+    # Return error response
+    return ErrorResponse(
+        error=f"Error processing task: {str(e)}",
+        task_id=task_id,
+        transaction_hash=error_tx_hash,
+        transaction_status="Error"
+    )
+
+async def execute_task(task_data, on_stage=None, analysis_slots=None, commit=None, wait_for_receipt=True, receipt_timeout=None):
+    """
+    Runs the analysis and storage stages for a task on their worker pools
+    
+    Args:
+        task_data: The RealEstateTaskRequest to process
+        on_stage: Optional callback called as on_stage(stage, detail) when the task changes stage
+        analysis_slots: Optional semaphore held while the analysis runs
+        commit: Optional coroutine function used instead of chain_pool.run for the storage stage
+        wait_for_receipt: Wait for the transaction receipts before returning
+        receipt_timeout: Seconds to wait for each receipt when waiting
         
-        location_intelligence_specialist = Agent(
-            role='Advanced Location Intelligence & Neighborhood Analytics Expert',
-            goal='Deliver precise neighborhood analyses with specific metrics, amenities, and livability factors',
-            backstory="""You are a renowned location intelligence expert with 15+ years of experience analyzing neighborhoods
-                       at a micro level. You're known for providing specific demographic statistics, income levels, and
-                       homeownership rates rather than vague descriptions. Your reports always include specific school ratings,
-                       test scores, and student-teacher ratios for each nearby school. You quantify crime rates with specific
-                       statistics compared to city averages and track safety trends over time. You identify specific amenities
-                       with exact walking distances and quality ratings. You provide precise transit scores, commute times, and
-                       transportation options. You're skilled at identifying neighborhood transition indicators and gentrification
-                       patterns with specific metrics. You structure your analyses with clear bullet points and headers for maximum
-                       clarity and impact. You always provide specific, actionable insights rather than general observations.""",
-            llm=llm,
-            tools=[search_tool],
-            verbose=True
-        )
+    Returns:
+        A TaskResponse, or an ErrorResponse if processing failed
         
-        # Process the task with our AI agent
-        try:
-            # Initialize the real estate analyst agent
-            real_estate_analyst = Agent(
-                role="Real Estate Investment Analyst",
-                goal="Provide comprehensive real estate investment analysis",
-                backstory="""You are a seasoned real estate investment analyst with 15+ years of experience analyzing properties
-                       across various markets. You have deep expertise in ROI calculations, market trend analysis, risk assessment,
-                       and investment strategy. You're known for your data-driven approach and ability to identify hidden value and
-                       potential pitfalls in real estate investments. Your analyses are thorough, balanced, and actionable, helping
-                       investors make informed decisions. You have a particular talent for translating complex market data into clear,
-                       strategic recommendations.
-                       
-                       You're especially skilled at evaluating properties based on cash flow potential, appreciation prospects,
-                       tax advantages, and overall return metrics. You can assess both residential and commercial properties
-                       with equal expertise. You always consider both macro market trends and micro neighborhood factors in your
-                       analysis.
-                       
-                       When analyzing investment properties, you always include:
-                       - Estimated ROI and cap rate calculations
-                       - Cash flow projections
-                       - Appreciation potential
-                       - Risk assessment with probability estimates
-                       - Specific recommendations for maximizing returns
-                       
-                       You present your findings in a clear, structured format that highlights the most important metrics and insights.
-                       You're not afraid to recommend against an investment if the numbers don't make sense.""",
-                verbose=True,
-                llm=llm,
-                tools=[search_tool] if search_tool else []
-            )
-            
-            # Create a crew of agents
-            crew = Crew(
-                agents=[real_estate_analyst],
-                tasks=[
-                    Task(
-                        description=f"""Analyze the investment potential of the property at {property_address}. 
-                        Task type: {task_type}.
-                        Additional details: {json.dumps(additional_details, indent=2)}
-                        
-                        Provide a comprehensive analysis including:
-                        1. Estimated ROI and cap rate
-                        2. Cash flow projections
-                        3. Appreciation potential
-                        4. Risk assessment
-                        5. Specific recommendations
-                        
-                        You MUST format your response as a JSON object with the following EXACT keys:
-                        - roi: Return on investment metrics and calculations
-                        - cap_rate: Capitalization rate and related metrics
-                        - cash_flow: Cash flow projections and analysis
-                        - appreciation: Expected property appreciation over time
-                        - risk_assessment: Analysis of investment risks
-                        - recommendations: Specific investment recommendations
-                        - summary: Brief overview of overall assessment
-                        
-                        Keep your total response under 2000 characters for blockchain storage efficiency.
-                        """,
-                        expected_output="A JSON object containing the real estate analysis results",
-                        agent=real_estate_analyst,
-                        output_json=RealEstateAnalysisOutput
-                    )
-                ],
-                verbose=True,
-                process=Process.sequential
-            )
-            
-            # Run the analysis
-            result = crew.kickoff()
-            logger.info(f"Analysis completed for task {task_id}")
-            
-            # Save the raw CrewAI output to a JSON file
-            crew_output_file = save_crew_output(
-                crew_result=result,
-                property_address=property_address,
-                task_type=task_type,
-                task_id=task_id
-            )
-            logger.info(f"Raw CrewAI output saved to {crew_output_file}")
-            
-            # The result should now be a dictionary with the RealEstateAnalysisOutput structure
-            logger.info(f"AI Analysis result structure: {type(result)}")
-            
-            # Format the result for blockchain storage and frontend display
-            try:
-                # Check if we're dealing with CrewOutput type from newer CrewAI versions
-                if 'crewai' in str(type(result)):
-                    logger.info(f"Detected CrewAI output type: {type(result)}")
-                    
-                    # Check for TaskOutput
-                    if 'TaskOutput' in str(type(result)):
-                        logger.info("Processing TaskOutput object")
-                        # Extract data from TaskOutput
-                        # TaskOutput objects typically contain the result in a specific attribute
-                        if hasattr(result, 'output'):
-                            crew_data = result.output
-                        elif hasattr(result, 'raw'):
-                            crew_data = result.raw
-                        else:
-                            # Convert to serializable format
-                            crew_data = make_json_serializable(result)
-                    # Check for CrewOutput
-                    elif 'CrewOutput' in str(type(result)):
-                        logger.info("Processing CrewOutput object")
-                        # Extract data from CrewOutput
-                        if hasattr(result, 'raw_output'):
-                            crew_data = result.raw_output
-                        elif hasattr(result, 'final_output'):
-                            crew_data = result.final_output
-                        else:
-                            # Convert to serializable format
-                            crew_data = make_json_serializable(result)
-                    else:
-                        # Generic handling for other crewai output types
-                        crew_data = make_json_serializable(result)
-                    
-                    logger.info(f"Extracted data type: {type(crew_data)}")
-                    
-                    # Now process the extracted data
-                    if isinstance(crew_data, dict):
-                        structured_output = crew_data
-                        try:
-                            result_str = json.dumps(crew_data, indent=2)
-                        except TypeError:
-                            # If JSON serialization fails, convert to serializable first
-                            serializable_data = make_json_serializable(crew_data)
-                            structured_output = serializable_data
-                            result_str = json.dumps(serializable_data, indent=2)
-                    elif isinstance(crew_data, str):
-                        try:
-                            # Try to parse as JSON
-                            structured_output = json.loads(crew_data)
-                            result_str = crew_data
-                        except json.JSONDecodeError:
-                            # If not valid JSON, use the string directly
-                            structured_output = {
-                                "summary": crew_data[:200] + "...",
-                                "roi": "Extracted from result",
-                                "cap_rate": "Extracted from result",
-                                "cash_flow": "Extracted from result",
-                                "appreciation": "Extracted from result",
-                                "risk_assessment": "Extracted from result",
-                                "recommendations": "Extracted from result"
-                            }
-                            result_str = json.dumps({"raw_result": crew_data})
-                    else:
-                        # Convert to serializable format
-                        serializable_data = make_json_serializable(crew_data)
-                        structured_output = {
-                            "summary": str(serializable_data)[:200] + "...",
-                            "roi": "Extracted from result",
-                            "cap_rate": "Extracted from result",
-                            "cash_flow": "Extracted from result",
-                            "appreciation": "Extracted from result",
-                            "risk_assessment": "Extracted from result",
-                            "recommendations": "Extracted from result"
-                        }
-                        result_str = json.dumps({"raw_result": serializable_data})
-                
-                # If it's already a dictionary (expected with output_json)
-                elif isinstance(result, dict):
-                    # Store the structured result for frontend display
-                    structured_output = result
-                    # Convert to JSON string for blockchain
-                    result_str = json.dumps(result, indent=2)
-                    logger.info("Successfully processed structured JSON output")
-                # Fallback for string results
-                elif isinstance(result, str):
-                    try:
-                        # Try to parse as JSON
-                        structured_output = json.loads(result)
-                        result_str = result
-                        logger.info("Parsed string result into JSON")
-                    except json.JSONDecodeError:
-                        # If it's not valid JSON, create a basic structure
-                        logger.warning("Result is not valid JSON, creating basic structure")
-                        structured_output = {
-                            "summary": result[:200] + "...",
-                            "roi": "Not available",
-                            "cap_rate": "Not available",
-                            "cash_flow": "Not available",
-                            "appreciation": "Not available",
-                            "risk_assessment": "Not available",
-                            "recommendations": "Not available"
-                        }
-                        result_str = result
-                else:
-                    # Unexpected type
-                    logger.warning(f"Unexpected result type: {type(result)}")
-                    structured_output = {
-                        "summary": str(result)[:200] + "...",
-                        "roi": "Not available",
-                        "cap_rate": "Not available",
-                        "cash_flow": "Not available",
-                        "appreciation": "Not available",
-                        "risk_assessment": "Not available",
-                        "recommendations": "Not available"
-                    }
-                    result_str = json.dumps({"raw_result": str(result)})
-            except Exception as format_error:
-                logger.error(f"Error formatting result for blockchain: {str(format_error)}")
-                # Fallback to a very simple string if all else fails
-                result_str = json.dumps({"analysis": "Analysis completed. Error formatting for blockchain."})
-                structured_output = {
-                    "summary": "Analysis completed with formatting error",
-                    "roi": "Not available",
-                    "cap_rate": "Not available",
-                    "cash_flow": "Not available",
-                    "appreciation": "Not available",
-                    "risk_assessment": "Not available",
-                    "recommendations": "Not available"
-                }
-            
-            # Ensure result is not too long for blockchain storage
-            try:
-                MAX_BLOCKCHAIN_LENGTH = 7500  # Leave some margin below the 8000 limit
-                if len(result_str) > MAX_BLOCKCHAIN_LENGTH:
-                    logger.warning(f"Result too long ({len(result_str)} chars), truncating for blockchain storage")
-                    # Create a simplified version instead of hard truncating
-                    simple_result = {
-                        "summary": structured_output.get("summary", "Analysis completed"),
-                        "note": "Full analysis available in local storage"
-                    }
-                    result_str = json.dumps(simple_result)
-            except Exception as length_error:
-                logger.error(f"Error checking result length: {str(length_error)}")
-                # Fallback to a very simple string if all else fails
-                result_str = json.dumps({"analysis": "Analysis completed. Error formatting for blockchain."})
-        
-            # Now handle the blockchain interactions
-            # Step 1: Create the blockchain task
-            blockchain_task_created = False
-            tx_hash = None
-            transaction_status = "pending"
-            result_tx_hash = None
-            
-            try:
-                # Check if topic is too long for blockchain storage
-                MAX_BLOCKCHAIN_TOPIC_LENGTH = 7500  # Slightly less than contract's 8000 limit to be safe
-                
-                # Truncate topic if needed
-                if len(blockchain_topic) > MAX_BLOCKCHAIN_TOPIC_LENGTH:
-                    logger.warning(f"Topic too long ({len(blockchain_topic)} chars), truncating for blockchain storage")
-                    # Truncate and add indicator
-                    blockchain_topic = blockchain_topic[:MAX_BLOCKCHAIN_TOPIC_LENGTH-30] + "... [truncated]"
-                
-                logger.info(f"Creating blockchain task with topic: {blockchain_topic[:100]}...")
-                create_task_function = contract.functions.createTask(blockchain_topic)
-                tx_hash = send_transaction(create_task_function)
-                
-                if tx_hash:
-                    logger.info(f"Task {task_id} created on blockchain with tx hash: {tx_hash}")
-                    blockchain_task_created = True
-                else:
-                    logger.warning(f"Failed to create task {task_id} on blockchain")
-                    blockchain_task_created = False
-            except Exception as e:
-                logger.error(f"Error creating blockchain task: {str(e)}")
-                blockchain_task_created = False
-            
-            # Step 2: Store the result on blockchain if task was created successfully
-            blockchain_result_stored = False
-            
-            if blockchain_task_created:
-                try:
-                    # Check if we're the contract owner before attempting to complete the task
-                    try:
-                        contract_owner = contract.functions.owner().call()
-                        if contract_owner.lower() != account.address.lower():
-                            logger.error(f"Account {account.address} is not the contract owner {contract_owner}")
-                            logger.error("Cannot complete task - only the contract owner can complete tasks")
-                            blockchain_result_stored = False
-                            transaction_status = "error_not_owner"
-                        else:
-                            logger.info(f"Account {account.address} is the contract owner - proceeding with task completion")
-                    except Exception as owner_error:
-                        logger.warning(f"Could not verify ownership: {str(owner_error)}")
-                        # Continue anyway, the transaction will fail if we're not the owner
-                    
-                    # Only attempt to complete the task if we didn't detect an ownership issue
-                    if transaction_status != "error_not_owner":
-                        # Attempt to complete the task on blockchain
-                        logger.info(f"Completing task {task_id} on blockchain with result: {result_str[:100]}...")
-                        complete_task_function = contract.functions.completeTask(task_id, result_str)
-                        result_tx_hash = send_transaction(complete_task_function)
-                        
-                        if result_tx_hash:
-                            logger.info(f"Task {task_id} completed on blockchain with tx hash: {result_tx_hash}")
-                            blockchain_result_stored = True
-                            transaction_status = "completed"
-                        else:
-                            logger.error(f"Failed to store task {task_id} on blockchain")
-                            blockchain_result_stored = False
-                            transaction_status = "failed"
-                except Exception as e:
-                    logger.error(f"Error storing result on blockchain: {str(e)}")
-                    blockchain_result_stored = False
-                    transaction_status = "error"
-        
-            # Save the raw CrewAI output to a separate file
-            crew_output_file = save_crew_output(
-                crew_result=result,
-                property_address=property_address,
-                task_type=task_type,
-                task_id=task_id,
-                transaction_hash=result_tx_hash if result_tx_hash else tx_hash
-            )
-            logger.info(f"CrewAI output saved to {crew_output_file}")
-            
-            # Save the AI output locally regardless of blockchain status
-            saved_file = save_ai_output(
-                task_id=task_id, 
-                tx_hash=result_tx_hash if result_tx_hash else tx_hash, 
-                structured_output=structured_output, 
-                result_str=result_str,
-                property_address=property_address,
-                task_type=task_type
-            )
-            logger.info(f"AI output saved to {saved_file}")
-            
-            # Try to get the updated task from blockchain if it was stored successfully
-            on_chain_result = None
-            if blockchain_result_stored:
-                try:
-                    on_chain_result = get_task_from_blockchain(task_id)
-                except Exception as fetch_error:
-                    logger.warning(f"Could not fetch on-chain result after completion: {str(fetch_error)}")
-                    on_chain_result = {"id": task_id, "completed": True}
-            
-            # Return the result with appropriate status
-            return TaskResponse(
-                task_id=task_id,
-                local_result=result_str,
-                output_json=structured_output,
-                transaction_hash=result_tx_hash if result_tx_hash else tx_hash,
-                transaction_status=transaction_status,
-                on_chain_result=on_chain_result
-            )
-        except Exception as e:
-            logger.error(f"Error processing task {task_id}: {str(e)}")
-            # Generate a transaction hash for error response
-            error_tx_hash = web3.keccak(text=f"error_{task_id}_{int(time.time())}").hex()
+    Raises:
+        PoolSaturatedError: If a worker pool is at capacity
+    """
+    task_id = task_data.task_id
+    property_address = task_data.property_address
+    task_type = task_data.task_type
+    additional_details = task_data.additional_details or {}
+    
+    # Log the incoming request
+    logger.info(f"Processing task {task_id} for property: {property_address}")
+    
+    try:
+        # A cached analysis skips the LLM entirely
+        cache_key = analysis_cache_key(property_address, task_type, additional_details)
+        # The cache commits to SQLite, so it is used from a worker thread
+        cached = await asyncio.to_thread(analysis_cache.get, cache_key) if analysis_cache else None
+        
+        if cached:
+            logger.info(f"Using cached analysis for task {task_id} ({cache_key})")
+            if on_stage:
+                on_stage("analysis_cached")
             
-            # Try to save whatever output we have
-            try:
-                # Create a basic structured output for the error case
-                error_output = {
-                    "summary": f"Error processing task: {str(e)}",
-                    "roi": "Not available",
-                    "cap_rate": "Not available",
-                    "cash_flow": "Not available",
-                    "appreciation": "Not available",
-                    "risk_assessment": "Not available",
-                    "recommendations": "Not available"
-                }
-                
-                # Save the error output locally
-                save_ai_output(
+            # Optionally hand back the transaction that already committed this analysis
+            if ANALYSIS_CACHE_REUSE_TX and cached.get("transaction_hash"):
+                return TaskResponse(
                     task_id=task_id,
-                    tx_hash=error_tx_hash,
-                    structured_output=error_output,
-                    result_str=json.dumps({"error": str(e)}),
-                    property_address=property_address,
-                    task_type=task_type
+                    local_result=cached["result_str"],
+                    output_json=cached["structured_output"],
+                    transaction_hash=cached["transaction_hash"],
+                    transaction_status="completed",
+                    on_chain_result=cached.get("on_chain_result"),
+                    from_cache=True
+                )
+            analysis = cached
+        else:
+            async def analyze():
+                # Both stages block, so they run on worker pools instead of the event loop
+                analysis = await analysis_pool.run(
+                    run_analysis, task_id, property_address, task_type, additional_details,
+                    on_start=(lambda: on_stage("analyzing")) if on_stage else None
                 )
-            except Exception as save_error:
-                logger.error(f"Failed to save error output: {str(save_error)}")
+                if analysis_cache and is_cacheable_analysis(analysis):
+                    await asyncio.to_thread(analysis_cache.set, cache_key, analysis,
+                                            ttl=ANALYSIS_CACHE_TTLS.get(task_type, ANALYSIS_CACHE_DEFAULT_TTL))
+                return analysis
             
-            # Return error response
-            return ErrorResponse(
-                error=f"Error processing task: {str(e)}",
-                task_id=task_id,
-                transaction_hash=error_tx_hash,
-                transaction_status="Error"
-            )
+            # A request identical to one already being analyzed waits for that analysis
+            if on_stage and analysis_flights.in_flight(cache_key):
+                on_stage("analysis_coalesced")
+            if analysis_slots is not None:
+                async with analysis_slots:
+                    analysis, shared = await analysis_flights.do(cache_key, analyze)
+            else:
+                analysis, shared = await analysis_flights.do(cache_key, analyze)
+            if shared:
+                logger.info(f"Task {task_id} reused the in-flight analysis for {cache_key}")
+        
+        chain_commit = None
+        if supports_commit_batching():
+            # Share the commit transactions with other analyses finishing around the same time
+            def queue_commit():
+                blockchain_topic = build_blockchain_topic(property_address, task_type, additional_details)
+                return submit_commit(task_id, blockchain_topic, analysis["result_str"], on_stage, wait_for_receipt, receipt_timeout)
+            
+            # Queueing reads the contract limits and may write the blob store, so it stays off the event loop
+            chain_commit = await asyncio.wrap_future(await asyncio.to_thread(queue_commit))
+        
+        response = await (commit or chain_pool.run)(
+            store_analysis, task_id, property_address, task_type, additional_details, analysis, on_stage,
+            wait_for_receipt=wait_for_receipt, receipt_timeout=receipt_timeout, chain_commit=chain_commit
+        )
+        response.from_cache = bool(cached)
+        
+        # Remember the committed transaction so later hits can reuse it
+        if analysis_cache and response.transaction_status == "completed" and (cached or is_cacheable_analysis(analysis)):
+            committed = dict(analysis, transaction_hash=response.transaction_hash, on_chain_result=response.on_chain_result)
+            await asyncio.to_thread(analysis_cache.set, cache_key, committed, keep_expiry=True)
+        return response
+    except PoolSaturatedError:
+        raise
+    except Exception as e:
+        logger.error(f"Error processing task {task_id}: {str(e)}")
+        return build_task_error_response(task_id, property_address, task_type, additional_details, e)
+
+def saturated_response(task_id, error):
+    logger.warning(f"Rejecting task {task_id}: {str(error)}")
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": str(error.retry_after)},
+        content={"error": str(error), "task_id": task_id, "transaction_status": "Rejected"}
+    )
+
+async def run_task_job(job, task_data, wait_for_receipt=True, receipt_timeout=None):
+    """Processes a task in the background and records each stage on its job"""
+    def on_stage(stage, detail=None):
+        job_store.update(job.id, stage, detail)
     
+    try:
+        response = await execute_task(task_data, on_stage, wait_for_receipt=wait_for_receipt, receipt_timeout=receipt_timeout)
+    except PoolSaturatedError as e:
+        job_store.update(job.id, "rejected", error=str(e))
+        return
     except Exception as e:
-        logger.error(f"Unexpected code path in process_task for task {task_id}")
-        
-        # Store the task in our local cache so we can still retrieve it later
-        try:
-            # Check if we have result_str in scope
-            if 'result_str' not in locals():
-                result_str = json.dumps({"error": f"Failed to process task: {str(e)}"})
-                
-            # Check if structured_output is defined
-            if 'structured_output' not in locals():
-                structured_output = {
-                    "summary": f"Error: {str(e)[:200]}...",
-                    "roi": "Error occurred",
-                    "cap_rate": "Error occurred",
-                    "cash_flow": "Error occurred",
-                    "appreciation": "Error occurred",
-                    "risk_assessment": "Error occurred",
-                    "recommendations": "Error occurred"
-                }
-                
-            # Create a cached task entry
-            cached_task = {
-                "id": task_id,
-                "topic": json.dumps({
-                    "property_address": property_address,
-                    "task_type": task_type,
-                    "additional_details": additional_details
-                }),
-                "result": result_str,
-                "requester": account.address,
-                "completed": True,
-                "transaction_hash": tx_hash if 'tx_hash' in locals() else None,
-                "transaction_status": "Error",
-                "error": f"Failed to process task: {str(e)}"
+        logger.error(f"Job {job.id} for task {task_data.task_id} failed: {str(e)}")
+        job_store.update(job.id, "failed", error=str(e))
+        return
+    
+    if isinstance(response, ErrorResponse):
+        job_store.update(job.id, "failed", result=jsonable_encoder(response), error=response.error)
+    else:
+        job_store.update(job.id, "persisted", result=jsonable_encoder(response))
+
+@app.post("/process_task", response_model=Union[TaskResponse, ErrorResponse])
+async def process_task(
+    task_data: RealEstateTaskRequest,
+    mode: str = Query("sync", description="'sync' waits for the result, 'async' returns 202 with a job id right away"),
+    wait: bool = Query(True, description="Wait for the transaction receipts; false returns once the transactions are submitted"),
+    receipt_timeout: Optional[float] = Query(None, gt=0, description="Seconds to wait for each receipt (default TX_CONFIRMATION_TIMEOUT)")
+):
+    if mode == "async":
+        # Refuse up front rather than accepting a job that can't be queued
+        if analysis_pool.is_saturated():
+            return saturated_response(task_data.task_id, PoolSaturatedError(analysis_pool.name))
+        
+        job = job_store.create(task_data.task_id)
+        # Keep a reference so the task isn't garbage collected while it runs
+        job_task = asyncio.create_task(run_task_job(job, task_data, wait, receipt_timeout))
+        background_jobs.add(job_task)
+        job_task.add_done_callback(background_jobs.discard)
+        return JSONResponse(
+            status_code=202,
+            content={
+                "job_id": job.id,
+                "task_id": task_data.task_id,
+                "stage": job.stage,
+                "status_url": f"/jobs/{job.id}",
+                "events_url": f"/jobs/{job.id}/events"
             }
-            task_cache[task_id] = cached_task
-            logger.info(f"Stored task {task_id} in local cache due to processing error")
-            
-            return ErrorResponse(
-                error=f"Failed to process task: {str(e)}",
-                task_id=task_id,
-                transaction_hash=tx_hash if 'tx_hash' in locals() else None,
-                transaction_status="Error",
-                local_result=result_str
-            )
-        except Exception as cache_error:
-            logger.error(f"Error storing task in cache: {str(cache_error)}")
-            
-            # If we couldn't store in cache or don't have a result
-            return ErrorResponse(
-                error=f"Failed to process task: {str(e)}",
-                task_id=task_id,
-                transaction_hash=tx_hash if 'tx_hash' in locals() else None,
-                transaction_status="Error"
-            )
-        except Exception as final_error:
-            # Last resort error handling
-            logger.error(f"Critical error in error handling: {str(final_error)}")
-            return ErrorResponse(
-                error="Critical system error",
-                task_id=task_id if 'task_id' in locals() else 0,
-                transaction_status="Error"
-            )
+        )
+    
+    try:
+        return await execute_task(task_data, wait_for_receipt=wait, receipt_timeout=receipt_timeout)
+    except PoolSaturatedError as e:
+        return saturated_response(task_data.task_id, e)
+
+async def run_batch_item(index, task_data):
+    """Processes one task of a batch and returns its NDJSON record"""
+    try:
+        response = await execute_task(task_data, analysis_slots=batch_slots, commit=commit_queue.submit)
+        status = "failed" if isinstance(response, ErrorResponse) else "completed"
+        return {"index": index, "task_id": task_data.task_id, "status": status, "result": jsonable_encoder(response)}
+    except PoolSaturatedError as e:
+        return {"index": index, "task_id": task_data.task_id, "status": "rejected", "error": str(e)}
+    except Exception as e:
+        logger.error(f"Batch item {index} (task {task_data.task_id}) failed: {str(e)}")
+        return {"index": index, "task_id": task_data.task_id, "status": "failed", "error": str(e)}
+
+async def stream_batch(tasks):
+    """Yields one NDJSON line per task as it finishes, then a summary line"""
+    started_at = time.time()
+    counts = {"completed": 0, "failed": 0, "rejected": 0}
+    
+    # Keep references so the items keep running even if the client goes away
+    items = [asyncio.create_task(run_batch_item(index, task_data)) for index, task_data in enumerate(tasks)]
+    for item in items:
+        background_jobs.add(item)
+        item.add_done_callback(background_jobs.discard)
+    
+    for finished in asyncio.as_completed(items):
+        record = await finished
+        counts[record["status"]] += 1
+        yield json.dumps(record) + "\n"
+    
+    summary = dict(counts, total=len(tasks), elapsed_seconds=round(time.time() - started_at, 3))
+    logger.info(f"Batch of {len(tasks)} tasks finished: {summary}")
+    yield json.dumps({"summary": summary}) + "\n"
+
+@app.post("/process_tasks")
+async def process_tasks(tasks: List[RealEstateTaskRequest]):
+    """Process a batch of tasks concurrently and stream each result as NDJSON when it finishes"""
+    if not tasks:
+        return JSONResponse(status_code=400, content={"error": "The batch is empty"})
+    if len(tasks) > BATCH_MAX_TASKS:
+        return JSONResponse(status_code=413, content={"error": f"Batches are limited to {BATCH_MAX_TASKS} tasks"})
+    
+    logger.info(f"Processing a batch of {len(tasks)} tasks ({BATCH_CONCURRENCY} analyses at a time)")
+    return StreamingResponse(stream_batch(tasks), media_type="application/x-ndjson")
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Return the current stage of an asynchronous task and, once finished, its TaskResponse"""
+    job = job_store.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": f"Job {job_id} not found"})
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}/events")
+async def get_job_events(job_id: str):
+    """Stream the stage transitions of an asynchronous task as Server-Sent Events"""
+    if job_store.get(job_id) is None:
+        return JSONResponse(status_code=404, content={"error": f"Job {job_id} not found"})
+    return StreamingResponse(
+        job_store.stream(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.get("/get_task/{task_id}", response_model=Union[BlockchainTask, ErrorResponse])
-async def get_task(task_id: int):
+def get_task(task_id: int):
     try:
         logger.info(f"Fetching task {task_id} from blockchain")
         task = get_task_from_blockchain(task_id)
@@ -1485,7 +2830,7 @@ async def get_task(task_id: int):
 # Use the local function to get tasks by transaction hash
 
 @app.get("/task_by_hash/{tx_hash}", response_model=Union[BlockchainTask, ErrorResponse])
-async def get_task_by_hash(tx_hash: str = Path(..., description="Transaction hash of the task")):
+def get_task_by_hash(tx_hash: str = Path(..., description="Transaction hash of the task")):
     try:
         logger.info(f"Fetching task with transaction hash {tx_hash}")
         task = get_task_by_tx_hash(tx_hash)
@@ -1503,7 +2848,7 @@ async def get_task_by_hash(tx_hash: str = Path(..., description="Transaction has
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/recent_tasks")
-async def recent_tasks(count: int = Query(10, description="Number of recent tasks to fetch")):
+def recent_tasks(count: int = Query(10, description="Number of recent tasks to fetch")):
     try:
         logger.info(f"Fetching {count} recent tasks")
         tasks = get_recent_tasks(count)
@@ -1512,6 +2857,34 @@ async def recent_tasks(count: int = Query(10, description="Number of recent task
         logger.error(f"Error fetching recent tasks: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/tasks")
+def list_tasks(
+    from_id: int = Query(1, description="ID of the first task to list"),
+    count: int = Query(100, description="Number of tasks to list"),
+    summary: bool = Query(False, description="List IDs, requesters, completion and result sizes without topics and results")
+):
+    if count < 1 or count > TASK_LIST_MAX_COUNT:
+        return JSONResponse(status_code=400, content={"error": f"count must be between 1 and {TASK_LIST_MAX_COUNT}"})
+    
+    try:
+        from_id = max(1, from_id)
+        task_counter = contract_state.task_counter()
+        count = max(0, min(count, task_counter - from_id + 1))
+        logger.info(f"Listing {count} tasks from {from_id}{' (summaries)' if summary else ''}")
+        tasks = get_task_summaries(from_id, count) if summary else get_task_range(from_id, count)
+        
+        next_from_id = from_id + count
+        return {
+            "from_id": from_id,
+            "task_counter": task_counter,
+            "next_from_id": next_from_id if next_from_id <= task_counter else None,
+            "index": chain_index.freshness() if chain_index else None,
+            "tasks": tasks
+        }
+    except Exception as e:
+        logger.error(f"Error listing tasks: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Root endpoint for API documentation info
 @app.get("/")
 async def root():
@@ -1520,19 +2893,76 @@ async def root():
         "description": "This API provides AI-powered real estate analysis with blockchain storage",
         "endpoints": [
             "/process_task - Submit a real estate analysis task",
+            "/process_tasks - Submit a batch of tasks and stream the results as NDJSON",
             "/get_task/{task_id} - Retrieve a specific task from blockchain",
             "/recent_tasks - Get recent tasks from blockchain",
+            "/tasks - Page through tasks by ID, in full or as summaries",
             "/task_result/{task_id} - Get the final result of a task from blockchain",
             "/local_task/{task_id} - Get the complete local result for a task",
             "/local_tasks - Get all locally stored tasks",
-            "/local_result/{tx_hash} - Get local result by transaction hash"
+            "/local_result/{tx_hash} - Get local result by transaction hash",
+            "/healthz - Liveness and dependency status",
+            "/readyz - Readiness of the RPC, contract and LLM dependencies",
+            "/stats - Worker pool, cache and runtime statistics",
+            "/fees - Current fee parameters and recent fee history"
         ],
         "documentation": "/docs"
     }
 
+# Runtime statistics for sizing the worker pools
+@app.get("/stats")
+async def stats():
+    """Report worker pool queue depth, active workers and wait times, and cache counters"""
+    return {
+        "analysis_pool": analysis_pool.stats(),
+        "chain_pool": chain_pool.stats(),
+        "commit_queue": commit_queue.stats(),
+        "signers": signer_pool.stats(),
+        "fees": fee_oracle.stats(),
+        "gas_model": gas_model.stats(),
+        "contract_state": contract_state.stats(),
+        "chain_reads": chain_reader.stats(),
+        "chain_index": chain_index.stats() if chain_index else {"enabled": False},
+        "task_cache": chain_task_cache.stats() if chain_task_cache else {"enabled": False},
+        "tx_index": tx_index.stats(),
+        "receipts": receipt_tracker.stats(),
+        "commit_batches": commit_writer.stats(),
+        "blobs": blob_store.stats(),
+        "analysis_cache": analysis_cache.stats() if analysis_cache else {"enabled": False},
+        "analysis_coalescing": analysis_flights.stats(),
+        "search": search_tool.stats() if isinstance(search_tool, CachedSearchTool) else {"enabled": search_tool is not None}
+    }
+
+# Fee parameters used for new transactions and the fees seen recently
+@app.get("/fees")
+async def fees():
+    """Report the fee oracle's current fee parameters and the fee history it has seen"""
+    return dict(fee_oracle.stats(), history=fee_oracle.history())
+
+# Liveness endpoint: answers as soon as the process is serving requests
+@app.get("/healthz")
+async def healthz():
+    """Report that the server is up along with the current state of every dependency"""
+    with dependency_lock:
+        dependencies = {name: dict(status) for name, status in dependency_status.items()}
+    return {"status": "ok", "dependencies": dependencies}
+
+# Readiness endpoint: only ready once every required dependency has been checked
+@app.get("/readyz")
+async def readyz():
+    """Report whether all required dependencies are usable, with each probe's latency"""
+    with dependency_lock:
+        dependencies = {name: dict(status) for name, status in dependency_status.items()}
+    
+    ready = all(dependencies[name]["state"] in ("ok", "degraded") for name in REQUIRED_DEPENDENCIES)
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "dependencies": dependencies}
+    )
+
 # Endpoint to fetch final on-chain content for a task
 @app.get("/task_result/{task_id}")
-async def task_result(task_id: int):
+def task_result(task_id: int):
     """
     Fetches the final on-chain content for a specific task.
     This endpoint focuses only on retrieving the stored result.
@@ -1545,12 +2975,16 @@ async def task_result(task_id: int):
             return JSONResponse(status_code=404, content={"error": task["error"]})
             
         # Return just the result from the on-chain task
-        return {
+        response = {
             "task_id": task["id"],
             "topic": task["topic"],
             "result": task["result"],
             "requester": task["requester"]
         }
+        if "result_digest" in task:
+            response["result_digest"] = task["result_digest"]
+            response["result_verified"] = task["result_verified"]
+        return response
     except Exception as e:
         logger.error(f"Error fetching task result {task_id}: {str(e)}")
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -1581,12 +3015,13 @@ async def analysis_types():
             {"id": "investment_analysis", "name": "Investment Analysis", "description": "ROI and financial projections for property investments"},
             {"id": "neighborhood_insights", "name": "Neighborhood Insights", "description": "Analysis of neighborhood characteristics and livability"},
             {"id": "rental_analysis", "name": "Rental Analysis", "description": "Rental market analysis and potential rental income"},
-            {"id": "development_potential", "name": "Development Potential", "description": "Assessment of property development or improvement potential"}
+            {"id": "development_potential", "name": "Development Potential", "description": "Assessment of property development or improvement potential"},
+            {"id": "comprehensive", "name": "Comprehensive Analysis", "description": "Market, valuation, investment and neighborhood specialists combined into one analysis"}
         ]
     }
 
 @app.get("/local_tasks")
-async def get_local_tasks():
+def get_local_tasks():
     """Retrieve all locally stored task results"""
     try:
         logger.info("Fetching all locally stored tasks")
@@ -1597,7 +3032,7 @@ async def get_local_tasks():
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/local_task/{task_id}")
-async def get_local_task(task_id: int):
+def get_local_task(task_id: int):
     """Retrieve a specific task from local storage"""
     try:
         logger.info(f"Fetching local task {task_id}")
@@ -1612,7 +3047,7 @@ async def get_local_task(task_id: int):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/local_result/{tx_hash}")
-async def get_local_result_by_hash(tx_hash: str):
+def get_local_result_by_hash(tx_hash: str):
     """Retrieve a task result by transaction hash from local storage"""
     try:
         logger.info(f"Fetching local result for transaction {tx_hash}")
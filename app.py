@@ -177,11 +177,18 @@ def create_task():
                 "additional_details": additional_details
             }
             
-            # Send request to API
-            response = requests.post(f"{API_URL}/process_task", json=payload)
+            # Submit the task as a background job so this view doesn't block on the analysis
+            response = requests.post(f"{API_URL}/process_task", params={"mode": "async"}, json=payload, timeout=15)
             result = response.json()
             
-            if response.status_code == 200:
+            if response.status_code == 202:
+                flash(f"Task {task_id} submitted for analysis (job {result['job_id']}). "
+                      f"Results will appear once the analysis is stored on the blockchain.", "success")
+                return redirect(url_for('index'))
+            elif response.status_code == 503:
+                flash(f"The analysis queue is full, please try again in a few seconds: {result.get('error')}", "warning")
+                return redirect(url_for('create_task'))
+            elif response.status_code == 200:
                 # Check if there was an error in the blockchain transaction
                 if 'error' in result:
                     # Task was created but blockchain transaction failed
@@ -243,6 +250,11 @@ def api_task(task_id):
     response = requests.get(f"{API_URL}/get_task/{task_id}")
     return jsonify(response.json())
 
+@app.route('/api/job/<string:job_id>')
+def api_job(job_id):
+    response = requests.get(f"{API_URL}/jobs/{job_id}", timeout=5)
+    return jsonify(response.json()), response.status_code
+
 @app.route('/api/task_result/<int:task_id>')
 def api_task_result(task_id):
     response = requests.get(f"{API_URL}/task_result/{task_id}")
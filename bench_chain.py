@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Local-chain benchmark of committing an analysis to the AIAgent contract
+
+Compares the two-step flow (createTask, wait, owner(), completeTask, wait) with a
+single createAndCompleteTask transaction, using the saved results in results/ as
+payloads. Reports the latency per committed analysis and the gas it used.
+
+Needs a node with unlocked accounts and the current contracts/AIAgent.sol deployed
+by the first account, e.g.:
+
+    npx hardhat node
+    npx hardhat run scripts/deploy.js --network localhost
+    BENCH_CONTRACT_ADDRESS=0x... python bench_chain.py [iterations]
+
+BENCH_RPC_URL defaults to http://127.0.0.1:8545.
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import statistics
+
+from web3 import Web3
+from web3.logs import DISCARD
+
+RESULTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", "task_*.json")
+ABI_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "AIAgent.json")
+
+
+def load_payloads():
+    """Returns (topic, result) pairs built from the saved task results"""
+    payloads = []
+    for path in sorted(glob.glob(RESULTS)):
+        with open(path) as f:
+            saved = json.load(f)
+        topic = json.dumps({
+            "property_address": saved.get("property_address"),
+            "task_type": saved.get("task_type"),
+            "additional_details": {}
+        })
+        payloads.append((topic, saved["raw_result"]))
+    return payloads
+
+
+def created_task_id(contract, receipt):
+    for event in contract.events.TaskCreated().process_receipt(receipt, errors=DISCARD):
+        return event["args"]["id"]
+    raise ValueError(f"No TaskCreated event in {receipt.transactionHash.hex()}")
+
+
+def two_step(w3, contract, topic, result):
+    """The flow store_analysis uses for contracts without createAndCompleteTask"""
+    create_receipt = w3.eth.wait_for_transaction_receipt(contract.functions.createTask(topic).transact())
+    task_id = created_task_id(contract, create_receipt)
+    contract.functions.owner().call()
+    complete_receipt = w3.eth.wait_for_transaction_receipt(contract.functions.completeTask(task_id, result).transact())
+    return create_receipt.gasUsed + complete_receipt.gasUsed
+
+
+def single_transaction(w3, contract, topic, result):
+    receipt = w3.eth.wait_for_transaction_receipt(contract.functions.createAndCompleteTask(topic, result).transact())
+    created_task_id(contract, receipt)
+    return receipt.gasUsed
+
+
+def bench(fn, w3, contract, payloads, iterations):
+    latencies, gas = [], []
+    for i in range(iterations):
+        topic, result = payloads[i % len(payloads)]
+        started_at = time.perf_counter()
+        gas.append(fn(w3, contract, topic, result))
+        latencies.append(time.perf_counter() - started_at)
+    return latencies, gas
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    address = os.getenv("BENCH_CONTRACT_ADDRESS")
+    if not address:
+        sys.exit("Set BENCH_CONTRACT_ADDRESS to an AIAgent contract deployed by the node's first account")
+
+    w3 = Web3(Web3.HTTPProvider(os.getenv("BENCH_RPC_URL", "http://127.0.0.1:8545")))
+    w3.eth.default_account = w3.eth.accounts[0]
+    with open(ABI_PATH) as f:
+        contract = w3.eth.contract(address=Web3.to_checksum_address(address), abi=json.load(f))
+    if contract.functions.owner().call() != w3.eth.default_account:
+        sys.exit(f"{w3.eth.default_account} does not own the contract at {address}")
+
+    payloads = load_payloads()
+    if not payloads:
+        sys.exit(f"No saved results found at {RESULTS}")
+
+    print(f"{len(payloads)} payloads, {iterations} analyses per flow, chain ID {w3.eth.chain_id}")
+    for name, fn in (("two-step", two_step), ("single", single_transaction)):
+        latencies, gas = bench(fn, w3, contract, payloads, iterations)
+        print(f"{name:>9}: median {statistics.median(latencies) * 1000:8.1f} ms/analysis, "
+              f"p95 {sorted(latencies)[int(len(latencies) * 0.95) - 1] * 1000:8.1f} ms, "
+              f"mean gas {statistics.mean(gas):10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of crew result handling over the saved outputs in results/agents
+
+Each fixture is turned back into a CrewOutput and run through the legacy handling
+(type-name checks, serializing the whole crew object, JSON round trips and two
+saves of the crew output) and through crew_results.normalize_crew_result plus the
+single save. Usage: python bench_normalizer.py [iterations]
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import statistics
+
+from crewai.crews.crew_output import CrewOutput
+from crewai.tasks.task_output import TaskOutput
+from crewai.tasks.output_format import OutputFormat
+from crewai.types.usage_metrics import UsageMetrics
+
+from crew_results import normalize_crew_result
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", "agents", "crew_output_*.json")
+
+
+def load_fixture(path):
+    """Rebuilds the CrewOutput that produced a saved crew output file"""
+    with open(path) as f:
+        saved = json.load(f)["crew_output"]
+
+    return CrewOutput(
+        raw=saved["raw"],
+        json_dict=saved["json_dict"],
+        tasks_output=[
+            TaskOutput(
+                description=task["description"],
+                name=None if task["name"] in (None, "None") else task["name"],
+                expected_output=task["expected_output"],
+                summary=task["summary"],
+                raw=task["raw"],
+                json_dict=task["json_dict"] if isinstance(task["json_dict"], dict) else None,
+                agent=task["agent"],
+                output_format=OutputFormat(task["output_format"])
+            )
+            for task in saved["tasks_output"]
+        ],
+        token_usage=UsageMetrics(**saved["token_usage"])
+    )
+
+
+def make_json_serializable(obj, max_depth=10, current_depth=0, processed=None):
+    # Copy of the helper in ai.py, which can't be imported without a configured wallet
+    if processed is None:
+        processed = set()
+    if current_depth >= max_depth:
+        return "<max depth reached>"
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    obj_id = id(obj)
+    if obj_id in processed:
+        return "<circular reference>"
+    processed.add(obj_id)
+    try:
+        if hasattr(obj, '__dict__'):
+            return {key: make_json_serializable(value, max_depth, current_depth + 1, processed)
+                    for key, value in obj.__dict__.items()}
+        elif isinstance(obj, dict):
+            return {str(key): make_json_serializable(value, max_depth, current_depth + 1, processed)
+                    for key, value in obj.items()}
+        elif isinstance(obj, (list, tuple)):
+            return [make_json_serializable(item, max_depth, current_depth + 1, processed)
+                    for item in obj]
+        elif hasattr(obj, '__str__'):
+            return str(obj)
+        else:
+            return "<non-serializable object>"
+    finally:
+        processed.remove(obj_id)
+
+
+def legacy_normalize(result):
+    """The result handling run_analysis and store_analysis did before crew_results"""
+    # First save_crew_output in run_analysis
+    json.dumps({"crew_output": make_json_serializable(result, max_depth=20)}, indent=2)
+
+    if 'CrewOutput' in str(type(result)):
+        if hasattr(result, 'raw_output'):
+            crew_data = result.raw_output
+        elif hasattr(result, 'final_output'):
+            crew_data = result.final_output
+        else:
+            crew_data = make_json_serializable(result)
+    else:
+        crew_data = make_json_serializable(result)
+
+    if isinstance(crew_data, dict):
+        structured_output = crew_data
+        result_str = json.dumps(crew_data, indent=2)
+    else:
+        structured_output = json.loads(crew_data)
+        result_str = crew_data
+
+    if len(result_str) > 7500:
+        result_str = json.dumps({"summary": structured_output.get("summary", "Analysis completed"),
+                                 "note": "Full analysis available in local storage"})
+
+    crew_output = make_json_serializable(result, max_depth=20)
+    # Second save_crew_output in store_analysis
+    json.dumps({"crew_output": make_json_serializable(crew_output, max_depth=20)}, indent=2)
+    return structured_output, result_str
+
+
+def normalizer(result):
+    normalized = normalize_crew_result(result)
+    json.dumps({"crew_output": normalized.record}, indent=2)
+    return normalized.structured_output, normalized.result_str
+
+
+def bench(fn, results, iterations):
+    timings = []
+    for _ in range(iterations):
+        started_at = time.perf_counter()
+        for result in results:
+            fn(result)
+        timings.append((time.perf_counter() - started_at) / len(results))
+    return timings
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    paths = sorted(glob.glob(FIXTURES))
+    if not paths:
+        sys.exit(f"No fixtures found at {FIXTURES}")
+    results = [load_fixture(path) for path in paths]
+
+    for path, result in zip(paths, results):
+        legacy_output, legacy_str = legacy_normalize(result)
+        output, result_str = normalizer(result)
+        print(f"{os.path.basename(path)}: legacy stores {len(legacy_str)} chars "
+              f"({'summary only' if 'note' in json.loads(legacy_str) else 'full analysis'}), "
+              f"normalizer stores {len(result_str)} chars with keys {sorted(output)}")
+
+    print(f"\n{len(results)} fixtures, {iterations} iterations")
+    for name, fn in (("legacy", legacy_normalize), ("normalizer", normalizer)):
+        timings = bench(fn, results, iterations)
+        print(f"{name:>10}: median {statistics.median(timings) * 1e6:8.1f} us/result, "
+              f"p95 {sorted(timings)[int(len(timings) * 0.95) - 1] * 1e6:8.1f} us/result")
+
+
+if __name__ == "__main__":
+    main()
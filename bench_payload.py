@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Size and gas of the on-chain result encodings over the saved outputs in results/agents
+
+Each fixture is normalized with crew_results and its result written three ways: the
+pretty-printed JSON string stored so far, minified JSON, and the packed payload from
+payload_codec. Gas is the calldata plus the storage of the result (22,100 gas per new
+32-byte slot, 16 per non-zero and 4 per zero calldata byte, ABI padding included),
+which is what changes between the encodings. Extra JSON analyses can be passed as
+arguments. Usage: python bench_payload.py [analysis.json ...]
+"""
+
+import os
+import sys
+import glob
+import json
+import statistics
+
+from bench_normalizer import FIXTURES, load_fixture
+from crew_results import normalize_crew_result
+from payload_codec import encode_result, decode_result
+
+MAX_STRING_LENGTH = 8000  # contracts/AIAgent.sol
+MAX_BLOCKCHAIN_LENGTH = 7500  # Limit ai.py applies to string results
+
+
+def result_gas(data):
+    """Calldata and storage gas of writing data as a string or bytes argument"""
+    padded = data + b"\x00" * (-len(data) % 32)
+    calldata = 64 * 4 + sum(4 if byte == 0 else 16 for byte in padded)  # Plus offset and length words, mostly zero
+    slots = 1 if len(data) < 32 else 1 + len(padded) // 32
+    return calldata + 22100 * slots
+
+
+def main():
+    analyses = []
+    for path in sorted(glob.glob(FIXTURES)):
+        analyses.append((os.path.basename(path), normalize_crew_result(load_fixture(path)).result_str))
+    for path in sys.argv[1:]:
+        with open(path) as f:
+            analyses.append((os.path.basename(path), json.dumps(json.load(f), indent=2)))
+    if not analyses:
+        sys.exit(f"No fixtures found at {FIXTURES}")
+
+    encodings = {
+        "pretty": lambda result_str: result_str.encode("utf-8"),
+        "minified": lambda result_str: json.dumps(json.loads(result_str), separators=(",", ":")).encode("utf-8"),
+        "packed": encode_result
+    }
+    totals = {name: {"bytes": [], "gas": [], "fits": 0} for name in encodings}
+    for name, result_str in analyses:
+        row = []
+        for encoding, encode in encodings.items():
+            data = encode(result_str)
+            limit = MAX_STRING_LENGTH if encoding == "packed" else MAX_BLOCKCHAIN_LENGTH
+            totals[encoding]["bytes"].append(len(data))
+            totals[encoding]["gas"].append(result_gas(data))
+            totals[encoding]["fits"] += len(data) <= limit
+            row.append(f"{encoding} {len(data):5d} B")
+        assert json.loads(decode_result(encode_result(result_str))) == json.loads(result_str)
+        print(f"{name}: {', '.join(row)}")
+
+    print(f"\n{len(analyses)} analyses")
+    baseline = statistics.mean(totals["pretty"]["gas"])
+    for encoding, total in totals.items():
+        gas = statistics.mean(total["gas"])
+        print(f"{encoding:>9}: mean {statistics.mean(total['bytes']):7.0f} bytes, {gas:8.0f} gas "
+              f"({(gas - baseline) / baseline * 100:+.1f}%), {total['fits']}/{len(analyses)} fit on-chain in full")
+
+
+if __name__ == "__main__":
+    main()
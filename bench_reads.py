@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Local-chain benchmark of recent task listing latency
+
+Reads the last COUNT tasks with getTask one call at a time, as one JSON-RPC batch,
+and through Multicall3 aggregate3 when the chain has Multicall3, and reports the
+median latency and the round trips of each listing. For example, with Hardhat:
+
+    npx hardhat node
+    npx hardhat run scripts/deploy.js --network localhost
+    BENCH_CONTRACT_ADDRESS=0x... BENCH_PRIVATE_KEY=0x... python bench_reads.py [count] [iterations]
+
+BENCH_RPC_URL defaults to http://127.0.0.1:8545. If the contract has fewer than
+COUNT tasks and BENCH_PRIVATE_KEY is set, the missing tasks are created first. A
+plain Hardhat node has no Multicall3; run against a fork of a chain that has it
+(npx hardhat node --fork <rpc url>) to include the multicall row.
+"""
+
+import os
+import sys
+import json
+import time
+import statistics
+
+from web3 import Web3
+from eth_account import Account
+
+from chain_reader import BatchReader, MULTICALL3_ADDRESS
+
+ABI_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "AIAgent.json")
+
+
+def create_tasks(w3, contract, key, count):
+    """Creates count tasks from the key's account and waits for the last one"""
+    account = Account.from_key(key)
+    nonce = w3.eth.get_transaction_count(account.address, "pending")
+    fees = {"from": account.address, "gas": 500000, "gasPrice": w3.eth.gas_price * 2, "chainId": w3.eth.chain_id}
+    tx_hash = None
+    for index in range(count):
+        topic = json.dumps({"property_address": f"{index} Benchmark Ave", "task_type": "investment_analysis"})
+        tx = contract.functions.createTask(topic).build_transaction(dict(fees, nonce=nonce + index))
+        tx_hash = w3.eth.send_raw_transaction(account.sign_transaction(tx).raw_transaction)
+    if tx_hash is not None:
+        w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
+
+
+def measure(reader, calls, iterations):
+    """Returns the median milliseconds and the round trips of one listing"""
+    timings = []
+    round_trips = reader.round_trips
+    for _ in range(iterations):
+        started_at = time.perf_counter()
+        results = reader.call(calls)
+        timings.append((time.perf_counter() - started_at) * 1000)
+        failed = [result.value for result in results if not result.success]
+        if failed:
+            sys.exit(f"{len(failed)} reads failed, first: {failed[0]}")
+    return statistics.median(timings), (reader.round_trips - round_trips) / iterations
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    address = os.getenv("BENCH_CONTRACT_ADDRESS")
+    if not address:
+        sys.exit("Set BENCH_CONTRACT_ADDRESS")
+
+    w3 = Web3(Web3.HTTPProvider(os.getenv("BENCH_RPC_URL", "http://127.0.0.1:8545")))
+    with open(ABI_PATH) as f:
+        contract = w3.eth.contract(address=Web3.to_checksum_address(address), abi=json.load(f))
+
+    task_counter = contract.functions.taskCounter().call()
+    if task_counter < count:
+        key = os.getenv("BENCH_PRIVATE_KEY")
+        if not key:
+            sys.exit(f"The contract has {task_counter} tasks; set BENCH_PRIVATE_KEY to create the other {count - task_counter}")
+        create_tasks(w3, contract, key, count - task_counter)
+        task_counter = contract.functions.taskCounter().call()
+
+    calls = [contract.functions.getTask(task_id) for task_id in range(task_counter, task_counter - count, -1)]
+    modes = ["sequential", "batch"]
+    if w3.eth.get_code(MULTICALL3_ADDRESS):
+        modes.append("multicall")
+
+    print(f"{count} tasks per listing, median of {iterations}")
+    baseline = None
+    for mode in modes:
+        reader = BatchReader(w3, mode=mode)
+        reader.call(calls[:1])  # Warm up the connection
+        milliseconds, round_trips = measure(reader, calls, iterations)
+        baseline = baseline or milliseconds
+        print(f"{mode:>10}: {milliseconds:8.1f} ms, {round_trips:5.0f} round trip(s) ({baseline / milliseconds:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Local-chain benchmark of write throughput against the number of signers
+
+Sends the same number of contract writes through a SignerPool of 1, 2, ... N accounts
+and reports the transactions mined per second. Nodes cap how many unmined
+transactions one account may have (geth keeps 16 per account by default), so each
+signer keeps at most BENCH_DEPTH transactions in flight; with blocks mined on an
+interval that cap is what limits a single account.
+
+The first key must own the contract; it adds the other signers as operators so they
+can use createAndCompleteTask. On contracts without operators every signer sends
+createTask instead. For example, with Hardhat's default accounts:
+
+    npx hardhat node
+    npx hardhat run scripts/deploy.js --network localhost
+    BENCH_CONTRACT_ADDRESS=0x... BENCH_PRIVATE_KEYS=0x...,0x...,0x...,0x... python bench_signers.py [transactions]
+
+BENCH_RPC_URL defaults to http://127.0.0.1:8545. BENCH_BLOCK_INTERVAL (milliseconds,
+default 1000) switches the node to interval mining through evm_setIntervalMining;
+set it to 0 to leave the node's mining mode alone.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+
+from web3 import Web3
+from eth_account import Account
+
+from tx_manager import SignerPool
+
+ABI_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "AIAgent.json")
+RESULT = json.dumps({"summary": "Benchmark analysis", "roi": "8%", "cap_rate": "5.5%"})
+
+
+def send_and_wait(w3, signer, function_call, fees):
+    """Signs and sends one transaction from the signer with its next nonce, then waits for the receipt"""
+    nonce = signer.nonce_manager.allocate()
+    try:
+        tx = function_call.build_transaction(dict(fees, **{"from": signer.address, "nonce": nonce, "gas": 500000}))
+        tx_hash = w3.eth.send_raw_transaction(signer.account.sign_transaction(tx).raw_transaction)
+    except Exception:
+        signer.nonce_manager.release(nonce)
+        raise
+    receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120, poll_latency=0.1)
+    signer.nonce_manager.confirm(nonce)
+    if receipt.status != 1:
+        raise RuntimeError(f"{tx_hash.hex()} reverted")
+    return receipt
+
+
+def run(w3, contract, accounts, transactions, depth, use_operators, fees):
+    """Sends the transactions through a pool of the accounts and returns the seconds until all are mined"""
+    pool = SignerPool(w3, accounts, strategy="least_pending")
+    slots = threading.Semaphore(depth * len(accounts))
+    errors = []
+
+    def write(index):
+        topic = json.dumps({"property_address": f"{index} Benchmark Ave", "task_type": "investment_analysis"})
+        function_call = (contract.functions.createAndCompleteTask(topic, RESULT) if use_operators
+                         else contract.functions.createTask(topic))
+        signer = pool.acquire()
+        try:
+            send_and_wait(w3, signer, function_call, fees)
+        except Exception as e:
+            errors.append(str(e))
+        finally:
+            pool.release(signer)
+            slots.release()
+
+    started_at = time.perf_counter()
+    threads = []
+    for index in range(transactions):
+        # least_pending keeps each signer at or below depth unmined transactions
+        slots.acquire()
+        thread = threading.Thread(target=write, args=(index,), daemon=True)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    if errors:
+        sys.exit(f"{len(errors)} transactions failed, first: {errors[0]}")
+    return time.perf_counter() - started_at
+
+
+def main():
+    transactions = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    depth = int(os.getenv("BENCH_DEPTH", "4"))
+    address = os.getenv("BENCH_CONTRACT_ADDRESS")
+    keys = [key.strip() for key in os.getenv("BENCH_PRIVATE_KEYS", "").split(",") if key.strip()]
+    if not address or not keys:
+        sys.exit("Set BENCH_CONTRACT_ADDRESS and BENCH_PRIVATE_KEYS (comma separated, the first owning the contract)")
+
+    w3 = Web3(Web3.HTTPProvider(os.getenv("BENCH_RPC_URL", "http://127.0.0.1:8545")))
+    with open(ABI_PATH) as f:
+        contract = w3.eth.contract(address=Web3.to_checksum_address(address), abi=json.load(f))
+    accounts = [Account.from_key(key) for key in keys]
+
+    # Fee fields and chain ID are read once so the runs measure the writes, not these lookups
+    fees = {"gasPrice": w3.eth.gas_price * 2, "chainId": w3.eth.chain_id}
+    interval = int(os.getenv("BENCH_BLOCK_INTERVAL", "1000"))
+    if interval:
+        w3.provider.make_request("evm_setAutomine", [False])
+        w3.provider.make_request("evm_setIntervalMining", [interval])
+
+    try:
+        use_operators = contract.functions.isOperator(accounts[0].address).call() is not None
+    except Exception:
+        # Deployed before operators were added
+        use_operators = False
+    if use_operators:
+        if contract.functions.owner().call() != accounts[0].address:
+            sys.exit(f"{accounts[0].address} does not own the contract at {address}")
+        owner = SignerPool(w3, accounts[:1]).signers[0]
+        for account in accounts[1:]:
+            if not contract.functions.isOperator(account.address).call():
+                send_and_wait(w3, owner, contract.functions.addOperator(account.address), fees)
+
+    print(f"{transactions} writes per run, {depth} in flight per signer, "
+          f"{'createAndCompleteTask' if use_operators else 'createTask'}, "
+          f"block interval {f'{interval} ms' if interval else 'unchanged'}")
+    baseline = None
+    for count in range(1, len(accounts) + 1):
+        elapsed = run(w3, contract, accounts[:count], transactions, depth, use_operators, fees)
+        throughput = transactions / elapsed
+        baseline = baseline or throughput
+        print(f"{count:>2} signer(s): {throughput:7.1f} tx/s, {elapsed:6.1f} s ({throughput / baseline:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Content-addressed store for analysis results kept off-chain
+
+Each blob is named by the keccak256 of its content, so identical analyses are stored
+once and the digest anchored on-chain is enough to find and verify the result. Blobs
+are deflate-compressed on disk under a two-character fan-out directory and are
+checked against their digest every time they are read.
+"""
+
+import os
+import zlib
+import tempfile
+import threading
+from collections import namedtuple
+
+from eth_utils import keccak
+
+# Digest and size of a stored blob, as written to the contract
+BlobAnchor = namedtuple("BlobAnchor", ["digest", "size"])
+
+
+class BlobIntegrityError(ValueError):
+    """Raised when a blob's content does not match its digest"""
+
+
+class BlobStore:
+    """
+    Deduplicated, compressed blob store keyed by keccak256
+
+    put() returns the BlobAnchor of the content, writing it only if that digest is not
+    stored yet. get() returns the content of a digest after checking it hashes back to
+    the digest. Writes go through a temporary file and a rename, so a reader never
+    sees a partial blob.
+    """
+
+    def __init__(self, root, compression_level=9):
+        self.root = root
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+        self.writes = 0
+        self.deduplicated = 0
+        self.reads = 0
+        self.missing = 0
+        self.corrupt = 0
+        self.bytes_in = 0
+        self.bytes_stored = 0
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def digest(data):
+        """Returns the 0x-prefixed keccak256 hex digest of data"""
+        return "0x" + keccak(data).hex()
+
+    def path(self, digest):
+        name = normalize_digest(digest)[2:]
+        return os.path.join(self.root, name[:2], name)
+
+    def put(self, data):
+        """
+        Stores content unless a blob with the same digest exists
+
+        Args:
+            data: The content as bytes, or a string stored as UTF-8
+
+        Returns:
+            The BlobAnchor with the digest and size in bytes of the content
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        anchor = BlobAnchor(self.digest(data), len(data))
+        path = self.path(anchor.digest)
+
+        with self._lock:
+            if os.path.exists(path):
+                self.deduplicated += 1
+                return anchor
+
+        compressed = zlib.compress(data, self.compression_level)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(compressed)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        with self._lock:
+            self.writes += 1
+            self.bytes_in += len(data)
+            self.bytes_stored += len(compressed)
+        return anchor
+
+    def get(self, digest, size=None):
+        """
+        Returns the content of a blob
+
+        Args:
+            digest: The keccak256 digest, as hex or bytes
+            size: Size the content must have, if known
+
+        Returns:
+            The content bytes, or None if no blob has this digest
+
+        Raises:
+            BlobIntegrityError: If the stored content does not match the digest or size
+        """
+        digest = normalize_digest(digest)
+        try:
+            with open(self.path(digest), "rb") as f:
+                compressed = f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self.missing += 1
+            return None
+
+        try:
+            data = zlib.decompress(compressed)
+        except zlib.error as e:
+            data = None
+            error = f"Blob {digest} is corrupt: {str(e)}"
+        else:
+            error = None
+            if self.digest(data) != digest:
+                error = f"Blob {digest} does not match its digest"
+            elif size is not None and len(data) != size:
+                error = f"Blob {digest} is {len(data)} bytes, expected {size}"
+
+        with self._lock:
+            self.reads += 1
+            if error:
+                self.corrupt += 1
+        if error:
+            raise BlobIntegrityError(error)
+        return data
+
+    def __contains__(self, digest):
+        return os.path.exists(self.path(digest))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "root": self.root,
+                "writes": self.writes,
+                "deduplicated": self.deduplicated,
+                "reads": self.reads,
+                "missing": self.missing,
+                "corrupt": self.corrupt,
+                "compression_ratio": round(self.bytes_stored / self.bytes_in, 3) if self.bytes_in else None
+            }
+
+
+def normalize_digest(digest):
+    """Returns a digest given as bytes or hex as lowercase 0x-prefixed hex"""
+    if isinstance(digest, (bytes, bytearray)):
+        digest = bytes(digest).hex()
+    digest = digest.lower()
+    if not digest.startswith("0x"):
+        digest = "0x" + digest
+    if len(digest) != 66:
+        raise ValueError(f"Invalid blob digest {digest}")
+    int(digest, 16)
+    return digest
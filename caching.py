@@ -0,0 +1,280 @@
+"""
+Caches shared by the API server
+
+LRUCache is a thread-safe in-memory cache with per-entry TTLs and an entry or
+memory budget. PersistentCache keeps entries in SQLite so they survive restarts,
+with an LRUCache in front of it for hot keys.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_size(value):
+    """Rough size in bytes of a JSON-like value, used for memory budgets"""
+    if isinstance(value, (str, bytes)):
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory LRU cache
+
+    Entries can expire after a TTL. The cache evicts the least recently used entries
+    once it holds more than max_entries, or more than max_bytes when a memory
+    budget is set.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=None, default_ttl=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()  # key -> (value, expires_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at, size = entry
+            if expires_at is not None and expires_at <= time.time():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """
+        Stores a value
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl: Seconds until the entry expires; defaults to default_ttl, None never expires
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl is not None else None
+        size = estimate_size(value) if self.max_bytes else 0
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+
+            while self._entries and (len(self._entries) > self.max_entries or
+                                     (self.max_bytes and self._bytes > self.max_bytes)):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+            if self.max_bytes:
+                stats["memory_bytes"] = self._bytes
+                stats["max_bytes"] = self.max_bytes
+            return stats
+
+
+class PersistentCache:
+    """
+    SQLite backed cache for JSON-serializable values with an in-memory LRU in front
+
+    Entries expire after their TTL. Once the database holds more than max_entries,
+    the least recently used entries are evicted. Hits served from memory are written
+    to the entries' last_access at most every touch_interval seconds, and before every
+    eviction, so the hottest entries aren't the first to go.
+    """
+
+    def __init__(self, path, max_entries=10000, memory_entries=256, default_ttl=None, touch_interval=5.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.touch_interval = touch_interval
+        self._touched = {}  # key -> last memory hit not yet written to disk
+        self._touches_written_at = time.time()
+        self.memory = LRUCache(max_entries=memory_entries)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, "
+            "expires_at REAL, last_access REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        self._db.commit()
+
+    def get(self, key):
+        """Returns the cached value for key, or None if it is missing or expired"""
+        now = time.time()
+        entry = self.memory.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at is None or expires_at > now:
+                with self._lock:
+                    self.hits += 1
+                    self._touched[key] = now
+                    if now - self._touches_written_at >= self.touch_interval:
+                        self._write_touches(now)
+                        self._db.commit()
+                return value
+            self.memory.delete(key)
+
+        with self._lock:
+            row = self._db.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = json.loads(row[0]), row[1]
+            if expires_at is not None and expires_at <= now:
+                self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._db.commit()
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self.hits += 1
+
+        self.memory.set(key, (value, expires_at))
+        return value
+
+    def set(self, key, value, ttl=None, keep_expiry=False):
+        """
+        Stores a value on disk and in memory
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+            ttl: Seconds until the entry expires; defaults to default_ttl, None never expires
+            keep_expiry: Keep the expiry of an existing entry instead of starting a new TTL
+        """
+        now = time.time()
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = now + ttl if ttl is not None else None
+
+        with self._lock:
+            if keep_expiry:
+                row = self._db.execute("SELECT expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    expires_at = row[0]
+
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, created_at, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(value), now, expires_at, now)
+            )
+            self._evict(now)
+            self._db.commit()
+
+        self.memory.set(key, (value, expires_at))
+
+    def delete(self, key):
+        self.memory.delete(key)
+        with self._lock:
+            self._touched.pop(key, None)
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._db.commit()
+
+    def _write_touches(self, now):
+        # Called with the lock held; the caller commits
+        if self._touched:
+            self._db.executemany("UPDATE entries SET last_access = ? WHERE key = ?",
+                                 [(accessed_at, key) for key, accessed_at in self._touched.items()])
+            self._touched.clear()
+        self._touches_written_at = now
+
+    def _evict(self, now):
+        # Drop expired entries first, then the least recently used ones over the size cap
+        self._write_touches(now)
+        expired = self._db.execute("DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)).rowcount
+        self.expirations += expired
+
+        count = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        if count > self.max_entries:
+            excess = count - self.max_entries
+            evicted_keys = [row[0] for row in self._db.execute(
+                "SELECT key FROM entries ORDER BY last_access ASC LIMIT ?", (excess,)
+            )]
+            self._db.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k in evicted_keys])
+            for evicted_key in evicted_keys:
+                self.memory.delete(evicted_key)
+            self.evictions += len(evicted_keys)
+            logger.info(f"Evicted {len(evicted_keys)} entries from {self.path}")
+
+    def stats(self):
+        with self._lock:
+            disk_entries = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "disk_entries": disk_entries,
+                "max_entries": self.max_entries,
+                "memory_entries": len(self.memory),
+                "hits": self.hits,
+                "memory_hits": self.memory.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
@@ -0,0 +1,346 @@
+"""
+Local SQLite index of the contract's event logs
+
+Every read endpoint used to query the chain for each request. ChainIndex follows the
+contract's TaskCreated, TaskCompleted (string, packed or anchored) and
+OwnershipTransferred logs with eth_getLogs and keeps tasks, the transactions that
+touched them and their block numbers in SQLite, so reads are answered locally. The
+last indexed block is checkpointed, so a restart resumes where the index stopped.
+"""
+
+import os
+import time
+import logging
+import sqlite3
+import threading
+
+from contract_state import event_topics, decode_log
+
+logger = logging.getLogger(__name__)
+
+# Events stored in the index
+INDEXED_EVENTS = ("TaskCreated", "TaskCompleted", "TaskCompletedPacked", "TaskAnchored", "OwnershipTransferred")
+
+TASK_COLUMNS = (
+    "id", "topic", "requester", "completed", "result", "packed_result", "result_digest", "result_size",
+    "created_block", "created_tx", "completed_block", "completed_tx"
+)
+
+
+def find_deployment_block(web3, address, head):
+    """Binary searches the first block with code at address; needs a node that serves historical state"""
+    low, high = 0, head
+    while low < high:
+        middle = (low + high) // 2
+        if web3.eth.get_code(address, block_identifier=middle):
+            high = middle
+        else:
+            low = middle + 1
+    return low
+
+
+class ChainIndex:
+    """
+    Task index built from the contract's logs
+
+    A background thread polls every poll_interval seconds. Blocks older than
+    confirmations are final; the newer ones are rolled back and scanned again on every
+    poll, in the same SQLite transaction as the new blocks, so logs of blocks that are
+    reorganized away within the confirmation depth disappear from the index. Ranges for
+    eth_getLogs start at block_range blocks, halve when the node rejects a range (too
+    many results, timeouts) and double after GROW_AFTER full ranges in a row succeed,
+    up to max_block_range.
+
+    Reads never touch the chain. freshness() tells how far behind the index is; callers
+    fall back to the chain when it is stale or doesn't have a task.
+    """
+
+    GROW_AFTER = 4
+
+    def __init__(self, web3, contract, path, start_block=None, confirmations=6, poll_interval=2.0,
+                 max_age=30.0, block_range=2000, max_block_range=100000):
+        self.web3 = web3
+        self.contract = contract
+        self.path = path
+        self.start_block = start_block
+        self.confirmations = confirmations
+        self.poll_interval = poll_interval
+        self.max_age = max_age
+        self.block_range = block_range
+        self.max_block_range = max_block_range
+        self._events = event_topics(contract, INDEXED_EVENTS)
+        self._topics = [["0x" + topic.hex() for topic in self._events]]
+        self._poll_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._head = None
+        self._synced_at = None
+        self._full_ranges = 0
+        self.polls = 0
+        self.logs_indexed = 0
+        self.rescanned_blocks = 0
+        self.range_shrinks = 0
+        self.errors = 0
+        self.disabled = None  # Why the index can't run, if it can't
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "id INTEGER PRIMARY KEY, topic TEXT, requester TEXT, completed INTEGER NOT NULL DEFAULT 0, "
+            "result TEXT, packed_result BLOB, result_digest TEXT, result_size INTEGER, "
+            "created_block INTEGER NOT NULL, created_tx TEXT NOT NULL, completed_block INTEGER, completed_tx TEXT)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS transactions ("
+            "tx_hash TEXT NOT NULL, task_id INTEGER NOT NULL, event TEXT NOT NULL, "
+            "block_number INTEGER NOT NULL, log_index INTEGER NOT NULL, PRIMARY KEY (tx_hash, log_index))"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS owners ("
+            "block_number INTEGER NOT NULL, log_index INTEGER NOT NULL, owner TEXT NOT NULL, "
+            "PRIMARY KEY (block_number, log_index))"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS tasks_created_block ON tasks (created_block)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS tasks_completed_block ON tasks (completed_block)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS transactions_block ON transactions (block_number)")
+        self._db.commit()
+        self._checkpoint = None
+
+    def start(self):
+        """Starts the background indexing thread"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="chain-index", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Chain index poll failed: {str(e)}")
+            self._stop.wait(self.poll_interval)
+
+    def _meta(self, key):
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _open(self, head):
+        """
+        Loads the checkpoint, starting over if the index was built for another contract.
+        Returns False if there is no checkpoint and no block to start from
+        """
+        source = f"{self.web3.eth.chain_id}:{self.contract.address.lower()}"
+        with self._lock:
+            if self._meta("source") != source:
+                if self._meta("source") is not None:
+                    logger.info(f"Chain index was built for {self._meta('source')}, rebuilding it for {source}")
+                for table in ("tasks", "transactions", "owners", "meta"):
+                    self._db.execute(f"DELETE FROM {table}")
+                self._db.execute("INSERT INTO meta (key, value) VALUES ('source', ?)", (source,))
+                self._db.commit()
+            checkpoint = self._meta("checkpoint")
+
+        if checkpoint is not None:
+            self._checkpoint = int(checkpoint)
+            return True
+        start_block = self.start_block
+        if start_block is None:
+            try:
+                start_block = find_deployment_block(self.web3, self.contract.address, head)
+            except Exception as e:
+                # Indexing from block 0 instead would fetch the logs of the whole chain
+                self.disabled = f"the contract's deployment block could not be found ({str(e)}); set its start block"
+                logger.error(f"Chain index disabled: {self.disabled}")
+                self._stop.set()
+                return False
+        self._checkpoint = start_block - 1
+        logger.info(f"Chain index starts at block {start_block}")
+        return True
+
+    def poll(self):
+        """Indexes the blocks mined since the last poll and rescans the unconfirmed ones"""
+        with self._poll_lock:
+            if self.disabled:
+                return
+            head = self.web3.eth.block_number
+            if self._checkpoint is None and not self._open(head):
+                return
+
+            # Blocks after `final` may still be reorganized, so they are scanned again; on a
+            # chain younger than the confirmations that is every block
+            final = max(head - self.confirmations, -1)
+            rollback_to = final if self._checkpoint > final else None
+            from_block = self._checkpoint + 1 if rollback_to is None else rollback_to + 1
+            if rollback_to is not None:
+                self.rescanned_blocks += self._checkpoint - rollback_to
+
+            while from_block <= head:
+                to_block = min(head, from_block + self.block_range - 1)
+                try:
+                    logs = self.web3.eth.get_logs({
+                        "address": self.contract.address,
+                        "fromBlock": from_block,
+                        "toBlock": to_block,
+                        "topics": self._topics
+                    })
+                except Exception as e:
+                    if to_block == from_block:
+                        raise
+                    # Too many results or too slow for the node; try a smaller range
+                    self.block_range = max(1, (to_block - from_block + 1) // 2)
+                    self._full_ranges = 0
+                    self.range_shrinks += 1
+                    logger.info(f"eth_getLogs failed for blocks {from_block}-{to_block}, using ranges of {self.block_range} ({str(e)})")
+                    continue
+
+                with self._lock:
+                    try:
+                        if rollback_to is not None:
+                            self._rollback(rollback_to)
+                        for log in logs:
+                            self._apply(log)
+                        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('checkpoint', ?)", (str(to_block),))
+                        self._db.commit()
+                    except Exception:
+                        self._db.rollback()
+                        raise
+                rollback_to = None
+                self._checkpoint = to_block
+                self.logs_indexed += len(logs)
+                if to_block - from_block + 1 == self.block_range:
+                    self._full_ranges += 1
+                    if self._full_ranges >= self.GROW_AFTER:
+                        self.block_range = min(self.max_block_range, self.block_range * 2)
+                        self._full_ranges = 0
+                from_block = to_block + 1
+
+            self._head = head
+            self._synced_at = time.time()
+            self.polls += 1
+
+    def _rollback(self, block):
+        # Called with the lock held; forgets everything logged after block
+        self._db.execute("DELETE FROM tasks WHERE created_block > ?", (block,))
+        self._db.execute(
+            "UPDATE tasks SET completed = 0, result = NULL, packed_result = NULL, result_digest = NULL, "
+            "result_size = NULL, completed_block = NULL, completed_tx = NULL WHERE completed_block > ?",
+            (block,)
+        )
+        self._db.execute("DELETE FROM transactions WHERE block_number > ?", (block,))
+        self._db.execute("DELETE FROM owners WHERE block_number > ?", (block,))
+
+    def _apply(self, log):
+        # Called with the lock held
+        event = self._events.get(bytes(log["topics"][0])) if log["topics"] else None
+        if event is None:
+            return
+        decoded = decode_log(event, log)
+        name, args = decoded["event"], decoded["args"]
+        block, log_index = log["blockNumber"], log["logIndex"]
+        tx_hash = "0x" + bytes(log["transactionHash"]).hex()
+
+        if name == "OwnershipTransferred":
+            self._db.execute(
+                "INSERT OR REPLACE INTO owners (block_number, log_index, owner) VALUES (?, ?, ?)",
+                (block, log_index, args["newOwner"])
+            )
+            return
+
+        task_id = args["id"]
+        if name == "TaskCreated":
+            self._db.execute(
+                "INSERT OR REPLACE INTO tasks (id, topic, requester, created_block, created_tx) VALUES (?, ?, ?, ?, ?)",
+                (task_id, args["topic"], args["requester"], block, tx_hash)
+            )
+        else:
+            if name == "TaskCompleted":
+                column, value = "result", args["result"]
+            elif name == "TaskCompletedPacked":
+                column, value = "packed_result", bytes(args["result"])
+            else:
+                column, value = "result_digest", "0x" + bytes(args["digest"]).hex()
+            self._db.execute(
+                f"UPDATE tasks SET completed = 1, {column} = ?, result_size = ?, completed_block = ?, completed_tx = ? WHERE id = ?",
+                (value, args.get("size"), block, tx_hash, task_id)
+            )
+        self._db.execute(
+            "INSERT OR REPLACE INTO transactions (tx_hash, task_id, event, block_number, log_index) VALUES (?, ?, ?, ?, ?)",
+            (tx_hash, task_id, name, block, log_index)
+        )
+
+    def _task_rows(self, where, params):
+        with self._lock:
+            rows = self._db.execute(f"SELECT {', '.join(TASK_COLUMNS)} FROM tasks WHERE {where}", params).fetchall()
+        return [dict(zip(TASK_COLUMNS, row), completed=bool(row[3])) for row in rows]
+
+    def get_task(self, task_id):
+        """Returns the indexed task, or None if the index doesn't have it"""
+        rows = self._task_rows("id = ?", (task_id,))
+        return rows[0] if rows else None
+
+    def task_range(self, from_id, count):
+        """Returns the indexed tasks with IDs from from_id to from_id + count - 1, in ascending order"""
+        return self._task_rows("id >= ? AND id < ? ORDER BY id", (from_id, from_id + count))
+
+    def task_id_by_tx_hash(self, tx_hash):
+        """Returns the ID of the first task a transaction created or completed, or None"""
+        tx_hash = tx_hash.lower() if tx_hash.startswith(("0x", "0X")) else "0x" + tx_hash.lower()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT task_id FROM transactions WHERE tx_hash = ? ORDER BY log_index LIMIT 1", (tx_hash.lower(),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def task_counter(self):
+        """Returns the highest indexed task ID"""
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(MAX(id), 0) FROM tasks").fetchone()[0]
+
+    def owner(self):
+        """Returns the owner set by the last indexed OwnershipTransferred, or None"""
+        with self._lock:
+            row = self._db.execute("SELECT owner FROM owners ORDER BY block_number DESC, log_index DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def freshness(self):
+        """How far behind the chain the index may be"""
+        age = time.time() - self._synced_at if self._synced_at else None
+        return {
+            "block": self._checkpoint,
+            "head_block": self._head,
+            "confirmations": self.confirmations,
+            "age_seconds": round(age, 2) if age is not None else None,
+            "stale": age is None or age > self.max_age
+        }
+
+    def is_fresh(self):
+        return not self.freshness()["stale"]
+
+    def stats(self):
+        with self._lock:
+            tasks = self._db.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+            transactions = self._db.execute("SELECT COUNT(DISTINCT tx_hash) FROM transactions").fetchone()[0]
+        return dict(
+            self.freshness(),
+            tasks=tasks,
+            transactions=transactions,
+            polls=self.polls,
+            logs_indexed=self.logs_indexed,
+            rescanned_blocks=self.rescanned_blocks,
+            block_range=self.block_range,
+            range_shrinks=self.range_shrinks,
+            errors=self.errors,
+            disabled=self.disabled
+        )
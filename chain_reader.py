@@ -0,0 +1,226 @@
+"""
+Contract reads for many calls in one round trip
+
+Listing recent tasks used to make one eth_call per task. BatchReader sends a list of
+contract calls together, either folded into Multicall3 aggregate3 calls (when
+Multicall3 is deployed on the chain) or as one JSON-RPC batch of eth_calls, and
+decodes every result separately, so one reverted call doesn't fail the others.
+"""
+
+import logging
+import threading
+from collections import namedtuple
+
+from eth_abi import decode as abi_decode
+from eth_abi.exceptions import DecodingError
+from eth_utils.abi import get_abi_output_types
+from web3._utils.abi import map_abi_data
+from web3._utils.normalizers import BASE_RETURN_NORMALIZERS
+
+logger = logging.getLogger(__name__)
+
+# Multicall3 has the same address on every chain it is deployed to
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"internalType": "address", "name": "target", "type": "address"},
+                    {"internalType": "bool", "name": "allowFailure", "type": "bool"},
+                    {"internalType": "bytes", "name": "callData", "type": "bytes"}
+                ],
+                "internalType": "struct Multicall3.Call3[]",
+                "name": "calls",
+                "type": "tuple[]"
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"internalType": "bool", "name": "success", "type": "bool"},
+                    {"internalType": "bytes", "name": "returnData", "type": "bytes"}
+                ],
+                "internalType": "struct Multicall3.Result[]",
+                "name": "returnData",
+                "type": "tuple[]"
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function"
+    }
+]
+
+# Selector of Error(string), the payload of require() and revert() with a message
+ERROR_SELECTOR = bytes.fromhex("08c379a0")
+
+CallResult = namedtuple("CallResult", ["success", "value"])
+CallResult.__doc__ = "Outcome of one call: the decoded return value, or the error message if success is False"
+
+
+def revert_message(data):
+    """Returns the message of a revert's return data, or a generic one if it has none"""
+    data = bytes(data or b"")
+    if data[:4] == ERROR_SELECTOR:
+        try:
+            return f"execution reverted: {abi_decode(['string'], data[4:])[0]}"
+        except DecodingError:
+            pass
+    return "execution reverted"
+
+
+class BatchReader:
+    """
+    Runs many read-only contract calls in as few round trips as possible
+
+    Modes:
+        multicall: calls are packed into Multicall3 aggregate3 calls with allowFailure
+            set, at most chunk_size per aggregate3; the chunks go out as one JSON-RPC
+            batch when the provider supports batches
+        batch: one JSON-RPC batch with an eth_call per call
+        sequential: one request per call, for providers that can't batch
+        auto: multicall if Multicall3 has code at multicall_address, otherwise batch,
+            falling back to sequential the first time the provider rejects a batch
+    """
+
+    MODES = ("auto", "multicall", "batch", "sequential")
+
+    def __init__(self, web3, mode="auto", multicall_address=MULTICALL3_ADDRESS, chunk_size=50):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown chain read mode {mode!r}, expected one of {', '.join(self.MODES)}")
+        self.web3 = web3
+        self.mode = mode
+        self.chunk_size = chunk_size
+        self.multicall = web3.eth.contract(address=web3.to_checksum_address(multicall_address), abi=MULTICALL3_ABI)
+        self._use_multicall = {"multicall": True, "batch": False, "sequential": False}.get(mode)
+        self._batch_supported = False if mode == "sequential" else None
+        self._lock = threading.Lock()
+        self.reads = 0
+        self.calls = 0
+        self.failed_calls = 0
+        self.round_trips = 0
+
+    def _multicall_available(self):
+        if self._use_multicall is None:
+            try:
+                self._use_multicall = len(self.web3.eth.get_code(self.multicall.address)) > 0
+            except Exception as e:
+                logger.warning(f"Could not check for Multicall3: {str(e)}")
+                return False
+            logger.info(f"Multicall3 {'found' if self._use_multicall else 'not deployed'} at {self.multicall.address}")
+        return self._use_multicall
+
+    def call(self, function_calls, block_identifier="latest"):
+        """
+        Runs bound contract calls, e.g. contract.functions.getTask(1), at one block
+
+        Args:
+            function_calls: The calls to run
+            block_identifier: Block number or tag the calls read from
+
+        Returns:
+            A CallResult per call, in order. Values are decoded like ContractFunction.call()
+            would decode them; reverts and undecodable results are failed CallResults.
+        """
+        function_calls = list(function_calls)
+        if not function_calls:
+            return []
+        block = hex(block_identifier) if isinstance(block_identifier, int) else block_identifier
+
+        if self._multicall_available():
+            chunks = [function_calls[i:i + self.chunk_size] for i in range(0, len(function_calls), self.chunk_size)]
+            requests = [("eth_call", [{"to": self.multicall.address, "data": self._aggregate3_data(chunk)}, block]) for chunk in chunks]
+            results = []
+            for chunk, response in zip(chunks, self._send(requests)):
+                results.extend(self._unpack_aggregate3(chunk, response))
+        else:
+            requests = [("eth_call", [{"to": call.address, "data": call._encode_transaction_data()}, block]) for call in function_calls]
+            results = [self._result(call, response) for call, response in zip(function_calls, self._send(requests))]
+
+        with self._lock:
+            self.reads += 1
+            self.calls += len(function_calls)
+            self.failed_calls += sum(1 for result in results if not result.success)
+        return results
+
+    def _send(self, requests):
+        """Sends raw JSON-RPC requests and returns their raw responses, batched if the provider can"""
+        if self._batch_supported is not False and len(requests) > 1:
+            try:
+                responses = self.web3.provider.make_batch_request(requests)
+                if not isinstance(responses, list):
+                    raise ValueError(f"Batch request failed: {responses}")
+                self._batch_supported = True
+                with self._lock:
+                    self.round_trips += 1
+                # Nodes may answer a batch in any order
+                by_id = {response.get("id"): response for response in responses}
+                if len(by_id) == len(responses) == len(requests) and all(isinstance(key, int) for key in by_id):
+                    responses = [by_id[key] for key in sorted(by_id)]
+                return responses
+            except Exception as e:
+                if self._batch_supported:
+                    raise
+                logger.info(f"Provider does not support batch requests, reading one call at a time ({str(e)})")
+                self._batch_supported = False
+
+        responses = []
+        for method, params in requests:
+            try:
+                responses.append(self.web3.provider.make_request(method, params))
+            except Exception as e:
+                responses.append({"error": {"message": str(e)}})
+            with self._lock:
+                self.round_trips += 1
+        return responses
+
+    def _aggregate3_data(self, chunk):
+        calls = [(call.address, True, call._encode_transaction_data()) for call in chunk]
+        return self.multicall.functions.aggregate3(calls)._encode_transaction_data()
+
+    def _unpack_aggregate3(self, chunk, response):
+        if "error" in response or not response.get("result"):
+            # The whole aggregate3 failed, e.g. it ran out of the node's eth_call gas cap
+            message = self._error_message(response)
+            return [CallResult(False, message) for _ in chunk]
+
+        (entries,) = abi_decode(["(bool,bytes)[]"], bytes.fromhex(response["result"][2:]))
+        return [
+            self._decode(call, data) if success else CallResult(False, revert_message(data))
+            for call, (success, data) in zip(chunk, entries)
+        ]
+
+    def _result(self, call, response):
+        if "error" in response:
+            return CallResult(False, self._error_message(response))
+        result = response.get("result") or "0x"
+        return self._decode(call, bytes.fromhex(result[2:]))
+
+    def _decode(self, call, data):
+        output_types = get_abi_output_types(call.abi)
+        try:
+            decoded = self.web3.codec.decode(output_types, data)
+        except DecodingError as e:
+            return CallResult(False, f"Could not decode the result of {call.fn_name}: {str(e)}")
+
+        normalized = map_abi_data(BASE_RETURN_NORMALIZERS, output_types, decoded)
+        return CallResult(True, normalized[0] if len(normalized) == 1 else list(normalized))
+
+    @staticmethod
+    def _error_message(response):
+        error = response.get("error")
+        if isinstance(error, dict):
+            return error.get("message", str(error))
+        return str(error) if error else "empty result"
+
+    def stats(self):
+        with self._lock:
+            return {
+                "mode": "multicall" if self._use_multicall else "batch" if self._batch_supported is not False else "sequential",
+                "reads": self.reads,
+                "calls": self.calls,
+                "failed_calls": self.failed_calls,
+                "round_trips": self.round_trips
+            }
@@ -0,0 +1,303 @@
+"""
+In-memory view of the contract state that only changes through events
+
+The owner, the task counter, the operator list and MAX_STRING_LENGTH are read on
+hot paths (permission checks before every commit, every recent task listing), yet
+they only change through OwnershipTransferred, TaskCreated and OperatorAdded or
+OperatorRemoved. ContractStateCache loads them once at a block, then follows the
+contract's logs from that block on, so reads are answered from memory. Other
+components can listen to the events it follows, e.g. to invalidate cached tasks.
+"""
+
+import time
+import logging
+import threading
+
+from eth_utils import event_abi_to_log_topic, function_abi_to_4byte_selector
+from web3.exceptions import LogTopicError
+from web3._utils.events import get_event_data
+
+logger = logging.getLogger(__name__)
+
+# Events that change the cached state
+FOLLOWED_EVENTS = ("OwnershipTransferred", "TaskCreated", "OperatorAdded", "OperatorRemoved")
+
+# Events that complete a task; followed for listeners only
+COMPLETION_EVENTS = ("TaskCompleted", "TaskCompletedPacked", "TaskAnchored")
+
+
+def event_topics(contract, names=None):
+    """Maps the topic0 of each event in the contract's ABI (or of the named ones) to its event class"""
+    return {
+        event_abi_to_log_topic(abi): getattr(contract.events, abi["name"])
+        for abi in contract.abi
+        if abi.get("type") == "event" and (names is None or abi["name"] in names)
+    }
+
+
+def decode_log(event, log):
+    """
+    Decodes a log of the event class
+
+    Contracts deployed before the event parameters were indexed emit the same topic0 with
+    every argument in the data; those logs are decoded with no parameter indexed.
+    """
+    try:
+        return event().process_log(log)
+    except LogTopicError:
+        if len(log["topics"]) != 1:
+            raise
+        abi = dict(event.abi, inputs=[dict(param, indexed=False) for param in event.abi["inputs"]])
+        return get_event_data(event.w3.codec, abi, log)
+
+
+def deployed_functions(web3, contract):
+    """
+    Returns the names of the ABI functions that the contract deployed at its address has
+
+    Solidity's dispatcher pushes the selector of every external function to compare it
+    with the call's, so a function whose selector the runtime code never pushes isn't
+    deployed there, e.g. when the ABI is newer than the deployment. Code that pushes
+    none of them (a proxy) or no code at all leaves the ABI as the only answer.
+    """
+    selectors = {
+        abi["name"]: function_abi_to_4byte_selector(abi) for abi in contract.abi if abi.get("type") == "function"
+    }
+    code = bytes(web3.eth.get_code(contract.address))
+    deployed = set()
+    for name, selector in selectors.items():
+        # Selectors with leading zero bytes are pushed with a shorter PUSHn
+        value = selector.lstrip(b"\0") or b"\0"
+        if bytes([0x5f + len(value)]) + value in code:
+            deployed.add(name)
+    return deployed or set(selectors)
+
+
+class ContractStateCache:
+    """
+    Contract state kept current by following the contract's event logs
+
+    sync() loads the state at the head block on first use and afterwards applies the
+    logs of the blocks mined since, fetched with eth_getLogs in ranges of at most
+    max_block_range blocks. A background thread syncs every poll_interval seconds.
+    Reads answer from memory; when the last sync is older than max_age (the thread
+    stopped or the node is unreachable) they try one sync inline and otherwise serve
+    the last known values, which stats() reports as stale. The state is reloaded from
+    scratch every reload_interval seconds so that logs of blocks that were later
+    reorganized away can't leave it wrong for long.
+    """
+
+    def __init__(self, web3, contract, poll_interval=2.0, max_age=30.0, reload_interval=3600.0, max_block_range=2000):
+        self.web3 = web3
+        self.contract = contract
+        self.poll_interval = poll_interval
+        self.max_age = max_age
+        self.reload_interval = reload_interval
+        self.max_block_range = max_block_range
+        self._functions = {abi.get("name") for abi in contract.abi if abi.get("type") == "function"}
+        self._events = event_topics(contract, FOLLOWED_EVENTS + COMPLETION_EVENTS)
+        # Events of our own receipts that can be applied out of block order
+        self._receipt_events = {
+            topic for topic, event in self._events.items() if event.event_name in ("TaskCreated",) + COMPLETION_EVENTS
+        }
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._state = None
+        self._operators = {}  # Lowercase address -> bool, filled lazily and by events
+        self._block = None
+        self._head = None
+        self._synced_at = None
+        self._loaded_at = None
+        self.reads = 0
+        self.stale_reads = 0
+        self.inline_syncs = 0
+        self.syncs = 0
+        self.reloads = 0
+        self.logs_applied = 0
+        self.errors = 0
+
+    def add_listener(self, event_names, callback):
+        """Calls callback with each decoded event of the named ones that the cache applies"""
+        self._listeners.append((set(event_names), callback))
+
+    def _notify(self, decoded_events):
+        for decoded in decoded_events:
+            for event_names, callback in self._listeners:
+                if decoded["event"] in event_names:
+                    try:
+                        callback(decoded)
+                    except Exception as e:
+                        logger.warning(f"Contract event listener failed on {decoded['event']}: {str(e)}")
+
+    def start(self):
+        """Starts the background sync thread"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="contract-state", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sync()
+            except Exception as e:
+                logger.warning(f"Contract state sync failed: {str(e)}")
+            self._stop.wait(self.poll_interval)
+
+    def sync(self):
+        """Brings the state up to the head block, loading it first if needed"""
+        with self._sync_lock:
+            try:
+                head = self.web3.eth.block_number
+                if self._state is None or time.time() - self._loaded_at > self.reload_interval:
+                    self._load(head)
+                elif head > self._block:
+                    self._follow(self._block + 1, head)
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+                raise
+            with self._lock:
+                self._head = head
+                self._synced_at = time.time()
+                self.syncs += 1
+
+    def _load(self, block):
+        # Values the deployed contract doesn't have are None
+        self._functions = deployed_functions(self.web3, self.contract)
+        state = {
+            key: getattr(self.contract.functions, name)().call(block_identifier=block) if name in self._functions else None
+            for key, name in (("owner", "owner"), ("task_counter", "taskCounter"), ("max_string_length", "MAX_STRING_LENGTH"))
+        }
+        with self._lock:
+            self._state = state
+            self._operators = {}
+            self._block = block
+            self._loaded_at = time.time()
+            self.reloads += 1
+        logger.info(f"Contract state loaded at block {block}: owner {state['owner']}, {state['task_counter']} tasks")
+
+    def _follow(self, from_block, to_block):
+        address = self.contract.address
+        topics = [["0x" + topic.hex() for topic in self._events]]
+        while from_block <= to_block:
+            end = min(to_block, from_block + self.max_block_range - 1)
+            logs = self.web3.eth.get_logs({"address": address, "fromBlock": from_block, "toBlock": end, "topics": topics})
+            with self._lock:
+                applied = [self._apply(log) for log in logs]
+                self._block = end
+            self._notify(decoded for decoded in applied if decoded is not None)
+            from_block = end + 1
+
+    def _apply(self, log):
+        # Called with the lock held; returns the decoded event for the listeners
+        event = self._events.get(bytes(log["topics"][0])) if log["topics"] else None
+        if event is None:
+            return None
+        decoded = decode_log(event, log)
+        args = decoded["args"]
+        if decoded["event"] == "OwnershipTransferred":
+            self._state["owner"] = args["newOwner"]
+        elif decoded["event"] == "TaskCreated":
+            self._state["task_counter"] = max(self._state["task_counter"] or 0, args["id"])
+        elif decoded["event"] == "OperatorAdded":
+            self._operators[args["operator"].lower()] = True
+        elif decoded["event"] == "OperatorRemoved":
+            self._operators[args["operator"].lower()] = False
+        self.logs_applied += 1
+        return decoded
+
+    def observe_receipt(self, receipt):
+        """
+        Applies the TaskCreated and task completion events of a receipt we already have,
+        so the task counter and the listeners don't wait for the next sync. Other events
+        are left to the log follower, which applies them in block order.
+        """
+        if receipt is None or receipt.get("status") != 1:
+            return
+        with self._lock:
+            if self._state is None:
+                return
+            applied = [
+                self._apply(log) for log in receipt["logs"]
+                if log["address"].lower() == self.contract.address.lower() and log["topics"] and bytes(log["topics"][0]) in self._receipt_events
+            ]
+        self._notify(decoded for decoded in applied if decoded is not None)
+
+    def _read(self, key):
+        with self._lock:
+            state, synced_at = self._state, self._synced_at
+        if state is None or time.time() - synced_at > self.max_age:
+            try:
+                with self._lock:
+                    self.inline_syncs += 1
+                self.sync()
+            except Exception as e:
+                if state is None:
+                    raise
+                logger.warning(f"Serving stale contract state: {str(e)}")
+                with self._lock:
+                    self.stale_reads += 1
+        with self._lock:
+            self.reads += 1
+            return self._state[key]
+
+    def owner(self):
+        """Returns the contract owner, or None if the contract has no owner"""
+        return self._read("owner")
+
+    def task_counter(self):
+        return self._read("task_counter")
+
+    def max_string_length(self):
+        """Returns the contract's MAX_STRING_LENGTH, or None if the contract has none"""
+        return self._read("max_string_length")
+
+    def is_operator(self, address):
+        """Returns whether the address is the owner or an operator of the contract"""
+        owner = self.owner()
+        if owner is not None and owner.lower() == address.lower():
+            return True
+        if "isOperator" not in self._functions:
+            return False
+        with self._lock:
+            known = self._operators.get(address.lower())
+        if known is None:
+            # First question about this address; events keep the answer current from now on
+            known = self.contract.functions.isOperator(address).call(block_identifier=self._block)
+            with self._lock:
+                self._operators.setdefault(address.lower(), known)
+        return known
+
+    def staleness(self):
+        """How far behind the chain the cached state may be"""
+        with self._lock:
+            age = time.time() - self._synced_at if self._synced_at else None
+            return {
+                "block": self._block,
+                "head_block": self._head,
+                "age_seconds": round(age, 2) if age is not None else None,
+                "stale": age is None or age > self.max_age
+            }
+
+    def stats(self):
+        staleness = self.staleness()
+        with self._lock:
+            return dict(
+                staleness,
+                state=dict(self._state) if self._state else None,
+                known_operators=sum(1 for permitted in self._operators.values() if permitted),
+                reads=self.reads,
+                stale_reads=self.stale_reads,
+                inline_syncs=self.inline_syncs,
+                syncs=self.syncs,
+                reloads=self.reloads,
+                logs_applied=self.logs_applied,
+                errors=self.errors
+            )
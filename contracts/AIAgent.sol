@@ -15,16 +15,35 @@ contract AIAgent {
         bool completed;    // Flag to track if task has been completed
     }
 
+    struct TaskSummary {
+        uint256 id;
+        address requester;
+        bool completed;
+        uint256 resultLength; // Bytes of the string, compressed or off-chain result
+    }
+
+    struct ResultAnchor {
+        bytes32 digest;    // keccak256 of the result kept in the off-chain blob store
+        uint256 size;      // Size of the result in bytes
+    }
+
     // State variables
     address public owner;
     uint256 public taskCounter;
     mapping(uint256 => Task) public tasks;
+    mapping(uint256 => bytes) public packedResults; // Compressed results of tasks completed with bytes
+    mapping(uint256 => ResultAnchor) public resultAnchors; // Digests of results stored off-chain
+    mapping(address => bool) public operators; // Accounts besides the owner that may complete tasks
     uint256 public constant MAX_STRING_LENGTH = 8000; // Limit string size for gas efficiency
 
     // Events
     event TaskCreated(uint256 indexed id, string topic, address indexed requester);
     event TaskCompleted(uint256 indexed id, string result);
+    event TaskCompletedPacked(uint256 indexed id, bytes result);
+    event TaskAnchored(uint256 indexed id, bytes32 digest, uint256 size);
     event OwnershipTransferred(address indexed previousOwner, address indexed newOwner);
+    event OperatorAdded(address indexed operator);
+    event OperatorRemoved(address indexed operator);
 
     // Modifiers
     modifier onlyOwner() {
@@ -32,6 +51,11 @@ contract AIAgent {
         _;
     }
 
+    modifier onlyOperator() {
+        require(isOperator(msg.sender), "AIAgent: caller is not an operator");
+        _;
+    }
+
     modifier taskExists(uint256 _id) {
         require(tasks[_id].id != 0, "AIAgent: task does not exist");
         _;
@@ -60,6 +84,34 @@ contract AIAgent {
         owner = newOwner;
     }
 
+    /**
+     * @dev Allows an account to complete tasks
+     * @param _operator Address of the operator
+     */
+    function addOperator(address _operator) public onlyOwner {
+        require(_operator != address(0), "AIAgent: operator is the zero address");
+        operators[_operator] = true;
+        emit OperatorAdded(_operator);
+    }
+
+    /**
+     * @dev Revokes an operator's permission to complete tasks
+     * @param _operator Address of the operator
+     */
+    function removeOperator(address _operator) public onlyOwner {
+        operators[_operator] = false;
+        emit OperatorRemoved(_operator);
+    }
+
+    /**
+     * @dev Checks if an account may complete tasks
+     * @param _account Address to check
+     * @return bool Whether the account is the owner or an operator
+     */
+    function isOperator(address _account) public view returns (bool) {
+        return _account == owner || operators[_account];
+    }
+
     /**
      * @dev Creates a new task with the given topic
      * @param _topic Task topic (JSON string with property details)
@@ -86,7 +138,7 @@ contract AIAgent {
      * @param _id Task ID
      * @param _result Task result (AI analysis)
      */
-    function completeTask(uint256 _id, string memory _result) public onlyOwner taskExists(_id) taskNotCompleted(_id) {
+    function completeTask(uint256 _id, string memory _result) public onlyOperator taskExists(_id) taskNotCompleted(_id) {
         require(bytes(_result).length <= MAX_STRING_LENGTH, "AIAgent: result too long");
         
         tasks[_id].result = _result;
@@ -95,6 +147,134 @@ contract AIAgent {
         emit TaskCompleted(_id, _result);
     }
 
+    /**
+     * @dev Creates a task and stores its result in a single transaction
+     * @param _topic Task topic (JSON string with property details)
+     * @param _result Task result (AI analysis)
+     * @return taskId The ID of the newly created task
+     */
+    function createAndCompleteTask(string memory _topic, string memory _result) public onlyOperator returns (uint256 taskId) {
+        require(bytes(_topic).length <= MAX_STRING_LENGTH, "AIAgent: topic too long");
+        require(bytes(_result).length <= MAX_STRING_LENGTH, "AIAgent: result too long");
+        
+        taskCounter++;
+        tasks[taskCounter] = Task({
+            id: taskCounter,
+            topic: _topic,
+            result: _result,
+            requester: msg.sender,
+            completed: true
+        });
+        
+        emit TaskCreated(taskCounter, _topic, msg.sender);
+        emit TaskCompleted(taskCounter, _result);
+        return taskCounter;
+    }
+
+    /**
+     * @dev Creates several tasks in a single transaction
+     * @param _topics Task topics (JSON strings with property details)
+     * @return taskIds The IDs of the new tasks, in the order of the topics
+     */
+    function createTasks(string[] memory _topics) public returns (uint256[] memory taskIds) {
+        taskIds = new uint256[](_topics.length);
+        for (uint256 i = 0; i < _topics.length; i++) {
+            taskIds[i] = createTask(_topics[i]);
+        }
+    }
+
+    /**
+     * @dev Completes several tasks in a single transaction
+     * @param _ids Task IDs
+     * @param _results Task results (AI analyses), one per ID
+     */
+    function completeTasks(uint256[] memory _ids, string[] memory _results) public onlyOperator {
+        require(_ids.length == _results.length, "AIAgent: ids and results differ in length");
+        
+        for (uint256 i = 0; i < _ids.length; i++) {
+            completeTask(_ids[i], _results[i]);
+        }
+    }
+
+    /**
+     * @dev Completes a task with a compressed result (see payload_codec.py)
+     * @param _id Task ID
+     * @param _result Version byte followed by the deflate-compressed JSON result
+     */
+    function completeTaskPacked(uint256 _id, bytes memory _result) public onlyOperator taskExists(_id) taskNotCompleted(_id) {
+        require(_result.length <= MAX_STRING_LENGTH, "AIAgent: result too long");
+        
+        packedResults[_id] = _result;
+        tasks[_id].completed = true;
+        
+        emit TaskCompletedPacked(_id, _result);
+    }
+
+    /**
+     * @dev Creates a task and stores its compressed result in a single transaction
+     * @param _topic Task topic (JSON string with property details)
+     * @param _result Version byte followed by the deflate-compressed JSON result
+     * @return taskId The ID of the newly created task
+     */
+    function createAndCompleteTaskPacked(string memory _topic, bytes memory _result) public onlyOperator returns (uint256 taskId) {
+        taskId = createTask(_topic);
+        completeTaskPacked(taskId, _result);
+    }
+
+    /**
+     * @dev Completes several tasks with compressed results in a single transaction
+     * @param _ids Task IDs
+     * @param _results Compressed results, one per ID
+     */
+    function completeTasksPacked(uint256[] memory _ids, bytes[] memory _results) public onlyOperator {
+        require(_ids.length == _results.length, "AIAgent: ids and results differ in length");
+        
+        for (uint256 i = 0; i < _ids.length; i++) {
+            completeTaskPacked(_ids[i], _results[i]);
+        }
+    }
+
+    /**
+     * @dev Completes a task with the digest of a result stored off-chain (see blob_store.py)
+     * @param _id Task ID
+     * @param _digest keccak256 of the result
+     * @param _size Size of the result in bytes
+     */
+    function anchorTask(uint256 _id, bytes32 _digest, uint256 _size) public onlyOperator taskExists(_id) taskNotCompleted(_id) {
+        require(_digest != bytes32(0), "AIAgent: empty digest");
+        
+        resultAnchors[_id] = ResultAnchor({digest: _digest, size: _size});
+        tasks[_id].completed = true;
+        
+        emit TaskAnchored(_id, _digest, _size);
+    }
+
+    /**
+     * @dev Creates a task and anchors its off-chain result in a single transaction
+     * @param _topic Task topic (JSON string with property details)
+     * @param _digest keccak256 of the result
+     * @param _size Size of the result in bytes
+     * @return taskId The ID of the newly created task
+     */
+    function createAndAnchorTask(string memory _topic, bytes32 _digest, uint256 _size) public onlyOperator returns (uint256 taskId) {
+        taskId = createTask(_topic);
+        anchorTask(taskId, _digest, _size);
+    }
+
+    /**
+     * @dev Anchors the off-chain results of several tasks in a single transaction
+     * @param _ids Task IDs
+     * @param _digests keccak256 of each result, one per ID
+     * @param _sizes Size of each result in bytes, one per ID
+     */
+    function anchorTasks(uint256[] memory _ids, bytes32[] memory _digests, uint256[] memory _sizes) public onlyOperator {
+        require(_ids.length == _digests.length && _ids.length == _sizes.length, "AIAgent: ids and digests differ in length");
+        
+        for (uint256 i = 0; i < _ids.length; i++) {
+            anchorTask(_ids[i], _digests[i], _sizes[i]);
+        }
+    }
+
     /**
      * @dev Retrieves a task by ID
      * @param _id Task ID
@@ -104,6 +284,82 @@ contract AIAgent {
         return tasks[_id];
     }
 
+    /**
+     * @dev Retrieves a task by ID together with its compressed result
+     * @param _id Task ID
+     * @return task The task data
+     * @return packedResult The compressed result, empty if the task was completed with a string result
+     */
+    function getTaskPacked(uint256 _id) public view taskExists(_id) returns (Task memory task, bytes memory packedResult) {
+        return (tasks[_id], packedResults[_id]);
+    }
+
+    /**
+     * @dev Retrieves the digest and size of a task's off-chain result
+     * @param _id Task ID
+     * @return digest keccak256 of the result, zero if the result is not stored off-chain
+     * @return size Size of the result in bytes
+     */
+    function getTaskAnchor(uint256 _id) public view taskExists(_id) returns (bytes32 digest, uint256 size) {
+        ResultAnchor memory anchor = resultAnchors[_id];
+        return (anchor.digest, anchor.size);
+    }
+
+    /**
+     * @dev Retrieves consecutive tasks, so a listing doesn't need a call per task
+     * @param _fromId ID of the first task (IDs start at 1)
+     * @param _count Most tasks to return; the page ends at the last task
+     * @return page The tasks with IDs from _fromId, in ascending order
+     * @return packedPage The compressed result of each task, empty for string results
+     */
+    function getTasksRange(uint256 _fromId, uint256 _count) public view returns (Task[] memory page, bytes[] memory packedPage) {
+        (uint256 start, uint256 length) = pageBounds(_fromId, _count);
+        page = new Task[](length);
+        packedPage = new bytes[](length);
+        for (uint256 i = 0; i < length; i++) {
+            page[i] = tasks[start + i];
+            packedPage[i] = packedResults[start + i];
+        }
+    }
+
+    /**
+     * @dev Retrieves summaries of consecutive tasks without their topics and results
+     * @param _fromId ID of the first task (IDs start at 1)
+     * @param _count Most summaries to return; the page ends at the last task
+     * @return summaries The summaries of the tasks with IDs from _fromId, in ascending order
+     */
+    function getTaskSummaries(uint256 _fromId, uint256 _count) public view returns (TaskSummary[] memory summaries) {
+        (uint256 start, uint256 length) = pageBounds(_fromId, _count);
+        summaries = new TaskSummary[](length);
+        for (uint256 i = 0; i < length; i++) {
+            Task storage task = tasks[start + i];
+            summaries[i] = TaskSummary({
+                id: task.id,
+                requester: task.requester,
+                completed: task.completed,
+                resultLength: bytes(task.result).length + packedResults[start + i].length + resultAnchors[start + i].size
+            });
+        }
+    }
+
+    /**
+     * @dev Clamps a page of task IDs to the existing tasks
+     * @param _fromId ID of the first task, 0 is read as 1
+     * @param _count Most tasks in the page
+     * @return start ID of the first task of the page
+     * @return length Number of tasks in the page
+     */
+    function pageBounds(uint256 _fromId, uint256 _count) internal view returns (uint256 start, uint256 length) {
+        start = _fromId == 0 ? 1 : _fromId;
+        if (start > taskCounter) {
+            return (start, 0);
+        }
+        length = taskCounter - start + 1;
+        if (_count < length) {
+            length = _count;
+        }
+    }
+
     /**
      * @dev Checks if a task exists
      * @param _id Task ID
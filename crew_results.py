@@ -0,0 +1,165 @@
+"""
+Normalization of CrewAI results
+
+A crew's final answer arrives as a CrewOutput whose json_dict, pydantic or raw
+attribute holds the analysis, with raw answers often wrapped in ```json fences.
+normalize_crew_result reads those attributes directly, parses and validates the
+analysis once, and builds both the on-chain string and the record saved under
+results/agents from that single pass.
+"""
+
+import re
+import json
+import logging
+from typing import Any, Dict, NamedTuple, Optional
+
+from pydantic import BaseModel, ValidationError
+
+logger = logging.getLogger(__name__)
+
+
+class RealEstateAnalysisOutput(BaseModel):
+    roi: str
+    cap_rate: str
+    cash_flow: str
+    appreciation: str
+    risk_assessment: str
+    recommendations: str
+    summary: str
+
+
+ANALYSIS_FIELDS = tuple(RealEstateAnalysisOutput.model_fields)
+
+# Matches a whole answer wrapped in a markdown code fence, e.g. ```json ... ```
+CODE_FENCE = re.compile(r"^\s*```[a-zA-Z0-9_-]*\s*\n?(.*?)\n?\s*```\s*$", re.DOTALL)
+
+
+class NormalizedResult(NamedTuple):
+    structured_output: Dict[str, Any]  # The analysis in the RealEstateAnalysisOutput shape
+    result_str: str  # JSON string stored on the blockchain
+    record: Dict[str, Any]  # JSON-serializable crew output saved locally
+    valid: bool  # True if the analysis validated against RealEstateAnalysisOutput
+
+
+def strip_code_fences(text):
+    """Returns text without a surrounding markdown code fence"""
+    match = CODE_FENCE.match(text)
+    return match.group(1) if match else text
+
+
+def parse_json_answer(text):
+    """Parses an agent's answer as a JSON object, or returns None if it isn't one"""
+    try:
+        parsed = json.loads(strip_code_fences(text))
+    except (TypeError, ValueError):
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+def _dump(value):
+    # Pydantic models, enums and other objects as plain JSON values
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, dict):
+        return {str(key): _dump(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_dump(item) for item in value]
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    if hasattr(value, "value"):
+        return value.value
+    return str(value)
+
+
+def crew_output_record(result):
+    """
+    Builds the JSON-serializable record of a crew result
+
+    CrewOutput objects keep raw, pydantic, json_dict, tasks_output and token_usage;
+    plain values (e.g. an already merged dictionary) are returned as JSON values.
+    """
+    if not hasattr(result, "tasks_output"):
+        return _dump(result)
+
+    return {
+        "raw": result.raw,
+        "pydantic": _dump(result.pydantic),
+        "json_dict": _dump(result.json_dict),
+        "tasks_output": [
+            {
+                "description": task.description,
+                "name": task.name,
+                "expected_output": task.expected_output,
+                "summary": task.summary,
+                "raw": task.raw,
+                "pydantic": _dump(task.pydantic),
+                "json_dict": _dump(task.json_dict),
+                "agent": task.agent,
+                "output_format": _dump(task.output_format)
+            }
+            for task in result.tasks_output
+        ],
+        "token_usage": _dump(result.token_usage)
+    }
+
+
+def extract_answer(result):
+    """
+    Returns the analysis candidate and the raw text of a crew result
+
+    Structured outputs win over parsing the raw text: pydantic first, then json_dict,
+    then the raw answer with any code fence stripped.
+    """
+    if isinstance(result, dict):
+        return result, None
+
+    raw = getattr(result, "raw", None)
+    if raw is None:
+        raw = result if isinstance(result, str) else str(result)
+
+    pydantic_output = getattr(result, "pydantic", None)
+    if pydantic_output is not None:
+        return pydantic_output.model_dump(), raw
+
+    json_dict = getattr(result, "json_dict", None)
+    if isinstance(json_dict, dict):
+        return json_dict, raw
+
+    return parse_json_answer(raw), raw
+
+
+def normalize_crew_result(result, record=None):
+    """
+    Normalizes a crew result in a single pass
+
+    Args:
+        result: The value returned by crew.kickoff(), or an analysis dictionary
+        record: Optional prebuilt record to store instead of crew_output_record(result)
+
+    Returns:
+        A NormalizedResult
+    """
+    if record is None:
+        record = crew_output_record(result)
+    answer, raw = extract_answer(result)
+
+    if answer is None:
+        # Not JSON at all; keep the text so nothing is lost
+        text = raw or ""
+        logger.warning("Crew result is not a JSON object, storing the raw answer")
+        structured_output = {field: "Extracted from result" for field in ANALYSIS_FIELDS}
+        structured_output["summary"] = text[:200] + "..."
+        return NormalizedResult(structured_output, json.dumps({"raw_result": text}), record, False)
+
+    try:
+        structured_output = RealEstateAnalysisOutput.model_validate(answer).model_dump()
+        valid = True
+    except ValidationError as e:
+        logger.warning(f"Crew result does not match RealEstateAnalysisOutput: {e.error_count()} errors")
+        structured_output = {
+            field: str(answer[field]) if answer.get(field) is not None else "Not available"
+            for field in ANALYSIS_FIELDS
+        }
+        valid = False
+
+    return NormalizedResult(structured_output, json.dumps(structured_output, indent=2), record, valid)
@@ -0,0 +1,144 @@
+"""
+In-memory job store for asynchronous task processing
+
+Each job records the stages a task goes through (queued, analyzing, transactions
+sent and confirmed, persisted) so clients can poll the current stage or stream the
+transitions as Server-Sent Events instead of holding a request open.
+"""
+
+import time
+import uuid
+import json
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Stages after which a job never changes again
+TERMINAL_STAGES = ("persisted", "failed", "rejected")
+
+
+class Job:
+    def __init__(self, task_id, loop):
+        self.id = uuid.uuid4().hex
+        self.task_id = task_id
+        self.stage = None
+        self.events = []
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self._loop = loop
+        self._changed = asyncio.Event()
+
+    @property
+    def done(self):
+        return self.stage in TERMINAL_STAGES
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "task_id": self.task_id,
+            "stage": self.stage,
+            "status": ("failed" if self.stage in ("failed", "rejected") else "completed") if self.done else "running",
+            "events": list(self.events),
+            "result": self.result,
+            "error": self.error
+        }
+
+
+class JobStore:
+    """
+    Keeps track of running and recently finished jobs
+
+    Stage updates may come from worker threads; waiters on the event loop are
+    woken up through call_soon_threadsafe.
+    """
+
+    def __init__(self, max_jobs=1000):
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, task_id):
+        """Creates a job in the queued stage. Must be called from the event loop."""
+        job = Job(task_id, asyncio.get_running_loop())
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict()
+        self.update(job.id, "queued")
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def update(self, job_id, stage, detail=None, result=None, error=None):
+        """
+        Moves a job to a new stage. Safe to call from any thread.
+
+        Args:
+            job_id: The job to update
+            stage: The new stage name
+            detail: Optional dictionary with stage details (e.g. a transaction hash)
+            result: Final payload, set with a terminal stage
+            error: Error message, set with the failed or rejected stage
+        """
+        job = self.get(job_id)
+        if job is None or job.done:
+            return
+
+        event = {"stage": stage, "timestamp": time.time()}
+        if detail:
+            event.update(detail)
+
+        with self._lock:
+            job.stage = stage
+            job.events.append(event)
+            if result is not None:
+                job.result = result
+            if error is not None:
+                job.error = error
+
+        logger.info(f"Job {job_id} (task {job.task_id}) moved to stage {stage}")
+        job._loop.call_soon_threadsafe(job._changed.set)
+
+    async def stream(self, job_id, keepalive=15):
+        """
+        Yields the job's stage transitions formatted as Server-Sent Events until it finishes
+
+        Args:
+            job_id: The job to follow
+            keepalive: Seconds between keepalive comments while nothing happens
+        """
+        job = self.get(job_id)
+        sent = 0
+        while True:
+            job._changed.clear()
+            events = job.events[sent:]
+            for event in events:
+                sent += 1
+                payload = dict(event)
+                if event["stage"] in TERMINAL_STAGES:
+                    payload["result"] = job.result
+                    payload["error"] = job.error
+                yield f"event: {event['stage']}\ndata: {json.dumps(payload)}\n\n"
+
+            if job.done and sent >= len(job.events):
+                return
+
+            try:
+                await asyncio.wait_for(job._changed.wait(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+
+    def _evict(self):
+        # Drop the oldest finished jobs once we hold more than max_jobs
+        while len(self._jobs) > self.max_jobs:
+            for job_id, job in self._jobs.items():
+                if job.done:
+                    del self._jobs[job_id]
+                    break
+            else:
+                return
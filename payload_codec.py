@@ -0,0 +1,63 @@
+"""
+Compact encoding of analysis results for on-chain storage
+
+Results are written to the contract's bytes-typed functions as a version byte
+followed by the raw-deflate compression of the analysis as canonical minified JSON
+(sorted keys, no whitespace). Pretty-printed JSON spends calldata and storage gas
+on indentation; the analyses are prose, so deflate roughly halves what is left.
+The version byte leaves room for other encodings without breaking old readers.
+"""
+
+import json
+import zlib
+
+# Version byte of each encoding
+DEFLATE_JSON = 0x01
+
+SUPPORTED_VERSIONS = (DEFLATE_JSON,)
+
+
+def canonical_json(value):
+    """Serializes a value as minified JSON with sorted keys"""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def encode_result(result):
+    """
+    Encodes an analysis for on-chain storage
+
+    Args:
+        result: The analysis as a dictionary or a JSON string; other strings are stored as a JSON string
+
+    Returns:
+        The payload bytes
+    """
+    if isinstance(result, str):
+        try:
+            result = json.loads(result)
+        except ValueError:
+            pass
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15)
+    compressed = compressor.compress(canonical_json(result).encode("utf-8")) + compressor.flush()
+    return bytes([DEFLATE_JSON]) + compressed
+
+
+def decode_result(payload):
+    """
+    Decodes a payload written by encode_result
+
+    Returns:
+        The analysis as a minified JSON string
+
+    Raises:
+        ValueError: If the payload is empty, has an unknown version or is corrupt
+    """
+    payload = bytes(payload)
+    if not payload:
+        raise ValueError("Empty result payload")
+    if payload[0] != DEFLATE_JSON:
+        raise ValueError(f"Unknown result payload version {payload[0]}")
+    try:
+        return zlib.decompress(payload[1:], -15).decode("utf-8")
+    except (zlib.error, UnicodeDecodeError) as e:
+        raise ValueError(f"Corrupt result payload: {str(e)}")
@@ -0,0 +1,168 @@
+"""
+Cached web search for the analysis agents
+
+CachedSearchTool is a drop-in SerperDevTool: same name, description and arguments,
+and the same formatted results. Raw search responses are kept in a PersistentCache
+keyed on the normalized query, so repeated queries like "<city> median home price"
+don't go out to the network on every analysis. Entries close to expiry are refreshed
+in the background on a hit, so popular queries rarely miss.
+
+The backend is pluggable: "serper" calls the Serper API, "http" posts the same
+request to any Serper-compatible server (e.g. a local stand-in for tests and benchmarks).
+"""
+
+import re
+import time
+import logging
+import threading
+from typing import Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from pydantic import PrivateAttr
+from crewai_tools import SerperDevTool
+
+logger = logging.getLogger(__name__)
+
+SEARCH_BACKENDS = ("serper", "http")
+
+
+def normalize_query(query):
+    """Lowercases a query, collapses whitespace and drops trailing punctuation"""
+    query = re.sub(r"\s+", " ", str(query).strip().lower())
+    return query.rstrip("?.!,;: ")
+
+
+class CachedSearchTool(SerperDevTool):
+    """
+    SerperDevTool with an on-disk result cache, refresh-ahead and metrics
+
+    Args:
+        cache: PersistentCache for raw search responses, or None to disable caching
+        ttl: Seconds a cached response stays valid
+        refresh_ahead: Fraction of the TTL after which a hit triggers a background refresh (0 disables it)
+        backend: "serper" or "http"
+        backend_url: Base URL of a Serper-compatible server for the "http" backend
+    """
+
+    cache: Optional[Any] = None
+    ttl: int = 24 * 3600
+    refresh_ahead: float = 0.8
+    backend: str = "serper"
+    backend_url: Optional[str] = None
+
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _refresher: Any = PrivateAttr(default=None)
+    _refreshing: set = PrivateAttr(default_factory=set)
+    _metrics: dict = PrivateAttr(default_factory=lambda: {
+        "searches": 0,
+        "cache_hits": 0,
+        "cache_misses": 0,
+        "backend_calls": 0,
+        "backend_errors": 0,
+        "backend_seconds": 0.0,
+        "refreshes": 0
+    })
+
+    def model_post_init(self, __context):
+        super().model_post_init(__context)
+        if self.backend not in SEARCH_BACKENDS:
+            raise ValueError(f"Unknown search backend '{self.backend}' (expected one of {', '.join(SEARCH_BACKENDS)})")
+        if self.backend == "http":
+            if not self.backend_url:
+                raise ValueError("The http search backend needs a backend_url")
+            self.base_url = self.backend_url.rstrip("/")
+            self.env_vars = []
+        if self.cache is not None and self.refresh_ahead:
+            self._refresher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search-refresh")
+
+    def cache_key(self, search_query, search_type):
+        # Everything that changes the response is part of the key
+        return "|".join([
+            search_type.lower(), str(self.n_results), self.country or "",
+            self.location or "", self.locale or "", normalize_query(search_query)
+        ])
+
+    def _make_api_request(self, search_query, search_type):
+        with self._lock:
+            self._metrics["searches"] += 1
+
+        if self.cache is None:
+            return self._fetch(search_query, search_type)
+
+        key = self.cache_key(search_query, search_type)
+        entry = self.cache.get(key)
+        if entry is not None:
+            with self._lock:
+                self._metrics["cache_hits"] += 1
+            logger.info(f"Search cache hit for '{search_query}'")
+            if self._refresher and time.time() - entry["fetched_at"] > self.ttl * self.refresh_ahead:
+                self._schedule_refresh(key, search_query, search_type)
+            return entry["response"]
+
+        with self._lock:
+            self._metrics["cache_misses"] += 1
+        response = self._fetch(search_query, search_type)
+        self.cache.set(key, {"response": response, "fetched_at": time.time()}, ttl=self.ttl)
+        return response
+
+    def _fetch(self, search_query, search_type):
+        started_at = time.time()
+        try:
+            if self.backend == "http":
+                response = requests.post(
+                    self._get_search_url(search_type),
+                    json={"q": search_query, "num": self.n_results},
+                    timeout=10
+                )
+                response.raise_for_status()
+                results = response.json()
+                if not results:
+                    raise ValueError("Empty response from search backend")
+                results = dict(results)
+            else:
+                results = super()._make_api_request(search_query, search_type)
+        except Exception:
+            with self._lock:
+                self._metrics["backend_errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._metrics["backend_calls"] += 1
+                self._metrics["backend_seconds"] += time.time() - started_at
+        if "searchParameters" in results:
+            # The echoed query would override the caller's own spelling on a cache hit
+            results["searchParameters"] = {k: v for k, v in results["searchParameters"].items() if k != "q"}
+        return results
+
+    def _schedule_refresh(self, key, search_query, search_type):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        self._refresher.submit(self._refresh, key, search_query, search_type)
+
+    def _refresh(self, key, search_query, search_type):
+        try:
+            response = self._fetch(search_query, search_type)
+            self.cache.set(key, {"response": response, "fetched_at": time.time()}, ttl=self.ttl)
+            with self._lock:
+                self._metrics["refreshes"] += 1
+        except Exception as e:
+            logger.warning(f"Background refresh of '{search_query}' failed: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def stats(self):
+        with self._lock:
+            metrics = dict(self._metrics)
+        calls = metrics["backend_calls"]
+        lookups = metrics["cache_hits"] + metrics["cache_misses"]
+        metrics["backend_seconds"] = round(metrics["backend_seconds"], 3)
+        metrics["avg_backend_seconds"] = round(metrics["backend_seconds"] / calls, 3) if calls else 0.0
+        metrics["hit_ratio"] = round(metrics["cache_hits"] / lookups, 3) if lookups else 0.0
+        metrics["backend"] = self.backend
+        if self.cache is not None:
+            metrics["cache"] = self.cache.stats()
+        return metrics
@@ -0,0 +1,58 @@
+import time
+
+from caching import LRUCache, PersistentCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "a" in cache and "c" in cache and "b" not in cache
+
+
+def test_persistent_cache_round_trips_and_survives_reopen(tmp_path):
+    path = str(tmp_path / "cache.db")
+    PersistentCache(path).set("key", {"value": [1, 2]})
+    assert PersistentCache(path).get("key") == {"value": [1, 2]}
+
+
+def test_persistent_cache_expires_entries(tmp_path):
+    cache = PersistentCache(str(tmp_path / "cache.db"), memory_entries=1)
+    cache.set("key", "value", ttl=0.05)
+    time.sleep(0.1)
+    assert cache.get("key") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_keep_expiry_keeps_the_original_ttl(tmp_path):
+    cache = PersistentCache(str(tmp_path / "cache.db"))
+    cache.set("key", "first", ttl=0.05)
+    cache.set("key", "second", keep_expiry=True)
+    time.sleep(0.1)
+    assert cache.get("key") is None
+
+
+def test_eviction_drops_the_least_recently_used_entry(tmp_path):
+    cache = PersistentCache(str(tmp_path / "cache.db"), max_entries=2, memory_entries=0)
+    cache.set("old", 1)
+    cache.set("hot", 2)
+    cache.get("old")
+    cache.set("new", 3)
+    assert cache.get("hot") is None
+    assert cache.get("old") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_memory_hits_keep_an_entry_from_being_evicted(tmp_path):
+    cache = PersistentCache(str(tmp_path / "cache.db"), max_entries=2, memory_entries=10, touch_interval=60)
+    cache.set("hot", 1)
+    time.sleep(0.01)
+    cache.set("cold", 2)
+    time.sleep(0.01)
+    # Served from memory only; the touch reaches the disk before the next eviction
+    assert cache.get("hot") == 1
+    cache.set("new", 3)
+    assert cache.get("hot") == 1
+    assert cache.get("cold") is None
@@ -0,0 +1,123 @@
+import os
+import json
+
+import pytest
+
+pytest.importorskip("eth_tester")
+
+from web3 import Web3, EthereumTesterProvider
+
+from chain_index import ChainIndex
+
+BUILD_INFO = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "artifacts", "build-info", "5716ccb0da3891e323ec0b2eef33622f.json"
+)
+
+
+@pytest.fixture
+def chain():
+    with open(BUILD_INFO) as f:
+        artifact = json.load(f)["output"]["contracts"]["contracts/AIAgent.sol"]["AIAgent"]
+    provider = EthereumTesterProvider()
+    web3 = Web3(provider)
+    sender = web3.eth.accounts[0]
+    factory = web3.eth.contract(abi=artifact["abi"], bytecode=artifact["evm"]["bytecode"]["object"])
+    address = web3.eth.get_transaction_receipt(factory.constructor().transact({"from": sender})).contractAddress
+    contract = web3.eth.contract(address=address, abi=artifact["abi"])
+    return web3, provider.ethereum_tester, contract, sender
+
+
+def test_indexes_created_and_completed_tasks(chain, tmp_path):
+    web3, _, contract, sender = chain
+    create = contract.functions.createTask("topic one").transact({"from": sender})
+    complete = contract.functions.completeTask(1, "done").transact({"from": sender})
+
+    index = ChainIndex(web3, contract, str(tmp_path / "index.db"), start_block=0, confirmations=0)
+    index.poll()
+
+    task = index.get_task(1)
+    assert (task["topic"], task["requester"], task["completed"], task["result"]) == ("topic one", sender, True, "done")
+    assert index.task_id_by_tx_hash(create.hex()) == 1
+    assert index.task_id_by_tx_hash("0x" + complete.hex().upper()) == 1
+    assert index.task_counter() == 1
+
+
+def test_rollback_forgets_logs_after_the_block(chain, tmp_path):
+    web3, _, contract, sender = chain
+    contract.functions.createTask("kept").transact({"from": sender})
+    kept_block = web3.eth.block_number
+    contract.functions.completeTask(1, "done later").transact({"from": sender})
+    contract.functions.createTask("dropped").transact({"from": sender})
+
+    index = ChainIndex(web3, contract, str(tmp_path / "index.db"), start_block=0, confirmations=0)
+    index.poll()
+    with index._lock:
+        index._rollback(kept_block)
+        index._db.commit()
+
+    task = index.get_task(1)
+    assert task["topic"] == "kept"
+    assert (task["completed"], task["result"], task["completed_tx"]) == (False, None, None)
+    assert index.get_task(2) is None
+    assert index.task_counter() == 1
+
+
+def test_reorganized_blocks_are_rescanned(chain, tmp_path):
+    web3, tester, contract, sender = chain
+    contract.functions.createTask("before the fork").transact({"from": sender})
+    snapshot = tester.take_snapshot()
+    contract.functions.createTask("orphaned").transact({"from": sender})
+
+    index = ChainIndex(web3, contract, str(tmp_path / "index.db"), start_block=0, confirmations=5)
+    index.poll()
+    assert index.get_task(2)["topic"] == "orphaned"
+
+    # The other branch has a different task 2 and is longer
+    tester.revert_to_snapshot(snapshot)
+    contract.functions.createTask("on the new branch").transact({"from": sender})
+    tester.mine_blocks(2)
+    index.poll()
+
+    assert index.get_task(2)["topic"] == "on the new branch"
+    assert index.stats()["rescanned_blocks"] > 0
+
+
+def test_restart_resumes_from_the_checkpoint(chain, tmp_path):
+    web3, _, contract, sender = chain
+    path = str(tmp_path / "index.db")
+    contract.functions.createTask("first").transact({"from": sender})
+    ChainIndex(web3, contract, path, start_block=0, confirmations=0).poll()
+
+    contract.functions.createTask("second").transact({"from": sender})
+    reopened = ChainIndex(web3, contract, path, start_block=0, confirmations=0)
+    reopened.poll()
+    assert [task["topic"] for task in reopened.task_range(1, 10)] == ["first", "second"]
+    assert reopened.stats()["logs_indexed"] == 1
+
+
+def test_finds_the_deployment_block(chain, tmp_path):
+    web3, _, contract, sender = chain
+    contract.functions.createTask("after deployment").transact({"from": sender})
+
+    index = ChainIndex(web3, contract, str(tmp_path / "index.db"), confirmations=0)
+    index.poll()
+    assert index.get_task(1)["topic"] == "after deployment"
+    assert index.freshness()["block"] == web3.eth.block_number
+    assert index.stats()["disabled"] is None
+
+
+def test_stays_off_without_a_start_block(chain, tmp_path, monkeypatch):
+    web3, _, contract, _ = chain
+
+    def no_history(address, block_identifier=None):
+        raise ValueError("missing trie node")
+    monkeypatch.setattr(web3.eth, "get_code", no_history)
+
+    index = ChainIndex(web3, contract, str(tmp_path / "index.db"), confirmations=0)
+    index.poll()
+    # Nothing was fetched from block 0, and later polls don't retry
+    assert index.freshness()["block"] is None
+    assert "deployment block" in index.stats()["disabled"]
+    index.poll()
+    assert index.polls == 0
@@ -0,0 +1,59 @@
+import os
+import json
+
+import pytest
+
+pytest.importorskip("eth_tester")
+
+from web3 import Web3, EthereumTesterProvider
+
+from contract_state import deployed_functions, decode_log
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUILD_INFO = os.path.join(ROOT, "artifacts", "build-info", "5716ccb0da3891e323ec0b2eef33622f.json")
+ABI = os.path.join(ROOT, "AIAgent.json")
+
+
+@pytest.fixture
+def old_deployment():
+    # The build info is of the contract before the owner, operator, packed and paged functions
+    with open(BUILD_INFO) as f:
+        artifact = json.load(f)["output"]["contracts"]["contracts/AIAgent.sol"]["AIAgent"]
+    web3 = Web3(EthereumTesterProvider())
+    factory = web3.eth.contract(abi=artifact["abi"], bytecode=artifact["evm"]["bytecode"]["object"])
+    receipt = web3.eth.get_transaction_receipt(factory.constructor().transact({"from": web3.eth.accounts[0]}))
+    return web3, receipt.contractAddress, artifact["abi"]
+
+
+def current_abi():
+    with open(ABI) as f:
+        data = json.load(f)
+    return data["abi"] if isinstance(data, dict) else data
+
+
+def test_newer_abi_functions_missing_from_the_deployment(old_deployment):
+    web3, address, old_abi = old_deployment
+    contract = web3.eth.contract(address=address, abi=current_abi())
+
+    functions = deployed_functions(web3, contract)
+    assert functions == {abi["name"] for abi in old_abi if abi["type"] == "function"}
+    assert not {"createAndCompleteTask", "isOperator", "getTaskPacked", "getTasksRange"} & functions
+
+
+def test_address_without_code_trusts_the_abi(old_deployment):
+    web3, _, _ = old_deployment
+    contract = web3.eth.contract(address=web3.eth.accounts[1], abi=current_abi())
+    assert "createAndCompleteTask" in deployed_functions(web3, contract)
+
+
+def test_decodes_events_without_indexed_parameters(old_deployment):
+    web3, address, old_abi = old_deployment
+    old = web3.eth.contract(address=address, abi=old_abi)
+    tx_hash = old.functions.createTask("topic").transact({"from": web3.eth.accounts[0]})
+    log = web3.eth.get_transaction_receipt(tx_hash)["logs"][0]
+
+    # The current ABI indexes the task ID and requester, which this deployment doesn't
+    contract = web3.eth.contract(address=address, abi=current_abi())
+    decoded = decode_log(contract.events.TaskCreated, log)
+    assert decoded["event"] == "TaskCreated"
+    assert (decoded["args"]["id"], decoded["args"]["topic"]) == (1, "topic")
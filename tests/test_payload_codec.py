@@ -0,0 +1,51 @@
+import json
+import zlib
+
+import pytest
+
+from payload_codec import DEFLATE_JSON, canonical_json, decode_result, encode_result
+
+ANALYSIS = {
+    "summary": "Duplex in a growing neighborhood — steady rent, modest appreciation",
+    "roi": "7.2%",
+    "cap_rate": "6.1%",
+    "recommendations": ["Buy", "Refinance in 5 years"]
+}
+
+
+def test_round_trips_a_dictionary_as_canonical_json():
+    payload = encode_result(ANALYSIS)
+    assert payload[0] == DEFLATE_JSON
+    assert decode_result(payload) == canonical_json(ANALYSIS)
+    assert json.loads(decode_result(payload)) == ANALYSIS
+
+
+def test_json_strings_are_minified():
+    pretty = json.dumps(ANALYSIS, indent=2)
+    assert decode_result(encode_result(pretty)) == canonical_json(ANALYSIS)
+    assert len(encode_result(pretty)) < len(pretty.encode("utf-8"))
+
+
+def test_plain_strings_are_stored_as_json_strings():
+    assert json.loads(decode_result(encode_result("not json"))) == "not json"
+
+
+def test_decode_accepts_bytearrays():
+    assert decode_result(bytearray(encode_result(ANALYSIS))) == canonical_json(ANALYSIS)
+
+
+@pytest.mark.parametrize("payload, message", [
+    (b"", "Empty"),
+    (bytes([0x7f]) + b"data", "Unknown result payload version"),
+    (bytes([DEFLATE_JSON]) + b"\xff\xfenot deflate", "Corrupt"),
+])
+def test_rejects_bad_payloads(payload, message):
+    with pytest.raises(ValueError, match=message):
+        decode_result(payload)
+
+
+def test_rejects_payloads_that_are_not_utf8():
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15)
+    payload = bytes([DEFLATE_JSON]) + compressor.compress(b"\xff\xfe") + compressor.flush()
+    with pytest.raises(ValueError, match="Corrupt"):
+        decode_result(payload)
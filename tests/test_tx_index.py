@@ -0,0 +1,112 @@
+from collections import namedtuple
+
+from blob_store import BlobStore
+from payload_codec import encode_result
+from tx_index import TxIndex, normalize_tx_hash, sent_tasks
+
+CONTRACT = "0x00000000000000000000000000000000000000Aa"
+SENDER = "0x00000000000000000000000000000000000000bB"
+
+# The parts of a web3 ContractFunction that sent_tasks reads
+Call = namedtuple("Call", ["fn_name", "args"])
+
+
+def test_normalize_tx_hash():
+    assert normalize_tx_hash("ABCD") == "0xabcd"
+    assert normalize_tx_hash("0xAbCd") == "0xabcd"
+    assert normalize_tx_hash(bytes.fromhex("abcd")) == "0xabcd"
+
+
+def test_receipt_fills_in_created_task_ids(tmp_path):
+    index = TxIndex(str(tmp_path / "tx.db"))
+    index.record_sent("aa", CONTRACT, SENDER, "create", [{"topic": "one"}, {"topic": "two"}])
+    assert [row["chain_task_id"] for row in index.get("0xAA")] == [None, None]
+
+    index.record_receipt("0xaa", "confirmed", 12, [7, 8])
+    rows = index.get("aa")
+    assert [(row["topic"], row["chain_task_id"], row["status"]) for row in rows] == [
+        ("one", 7, "confirmed"), ("two", 8, "confirmed")
+    ]
+    assert rows[0]["block_number"] == 12
+
+
+def test_task_rows_join_both_transactions_of_a_task(tmp_path):
+    index = TxIndex(str(tmp_path / "tx.db"))
+    index.record_sent("aa", CONTRACT, SENDER, "create", [{"topic": "one"}])
+    index.record_receipt("aa", "confirmed", 1, [7])
+    index.record_sent("bb", CONTRACT, SENDER, "complete", [{"chain_task_id": 7, "result": "done"}])
+    index.record_sent("cc", "0x" + "11" * 20, SENDER, "complete", [{"chain_task_id": 7, "result": "other contract"}])
+
+    rows = index.task_rows(CONTRACT.lower(), 7)
+    assert [(row["role"], row["topic"], row["result"]) for row in rows] == [
+        ("create", "one", None), ("complete", None, "done")
+    ]
+
+
+def test_unknown_hash_is_a_miss(tmp_path):
+    index = TxIndex(str(tmp_path / "tx.db"))
+    assert index.get("0xdead") is None
+    assert index.stats()["misses"] == 1
+
+
+def test_failed_task_record_round_trips(tmp_path):
+    index = TxIndex(str(tmp_path / "tx.db"))
+    index.record_failed("ee", {"id": 3, "transaction_status": "Error"})
+    (row,) = index.get("0xee")
+    assert row["role"] == "error"
+    assert row["record"] == {"id": 3, "transaction_status": "Error"}
+
+
+def test_index_survives_a_restart(tmp_path):
+    path = str(tmp_path / "tx.db")
+    index = TxIndex(path)
+    index.record_sent("aa", CONTRACT, SENDER, "create_and_complete", [{"topic": "one", "result": "done"}])
+    index.record_receipt("aa", "confirmed", 1, [4])
+
+    reopened = TxIndex(path)
+    (row,) = reopened.get("aa")
+    assert (row["chain_task_id"], row["result"], row["status"]) == (4, "done", "confirmed")
+
+
+def test_memory_front_is_bounded_and_sees_updates(tmp_path):
+    index = TxIndex(str(tmp_path / "tx.db"), memory_entries=2)
+    for tx_hash in ("aa", "bb", "cc"):
+        index.record_sent(tx_hash, CONTRACT, SENDER, "create", [{"topic": tx_hash}])
+        index.get(tx_hash)
+    assert index.stats()["memory_entries"] == 2
+
+    # A receipt replaces the rows cached in memory
+    index.record_receipt("cc", "unconfirmed")
+    assert index.get("cc")[0]["status"] == "unconfirmed"
+    assert index.get("aa")[0]["topic"] == "aa"
+
+
+def test_sent_tasks_of_anchor_calls():
+    anchor = BlobStore.digest(b"result"), 6
+    digest = anchor[0]
+    assert digest.startswith("0x")
+
+    assert sent_tasks(Call("createAndAnchorTask", ("topic", *anchor))) == (
+        "create_and_complete", [{"topic": "topic", "result_digest": digest, "result_size": 6}]
+    )
+    assert sent_tasks(Call("anchorTask", (7, *anchor))) == (
+        "complete", [{"chain_task_id": 7, "result_digest": digest, "result_size": 6}]
+    )
+    # Digests read back as bytes are indexed in the same form
+    assert sent_tasks(Call("anchorTasks", ([7, 8], [digest, bytes.fromhex(digest[2:].upper())], [6, 9]))) == (
+        "complete", [
+            {"chain_task_id": 7, "result_digest": digest, "result_size": 6},
+            {"chain_task_id": 8, "result_digest": digest, "result_size": 9}
+        ]
+    )
+
+
+def test_sent_tasks_of_plain_and_packed_calls():
+    assert sent_tasks(Call("createTasks", (["a", "b"],))) == ("create", [{"topic": "a"}, {"topic": "b"}])
+    assert sent_tasks(Call("createAndCompleteTaskPacked", ("topic", encode_result({"price": 1})))) == (
+        "create_and_complete", [{"topic": "topic", "result": '{"price":1}'}]
+    )
+    assert sent_tasks(Call("completeTasks", ([7, 8], ["x", "y"]))) == (
+        "complete", [{"chain_task_id": 7, "result": "x"}, {"chain_task_id": 8, "result": "y"}]
+    )
+    assert sent_tasks(Call("setOperator", ("0x1", True))) == (None, [])
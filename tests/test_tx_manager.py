@@ -0,0 +1,195 @@
+import threading
+from concurrent.futures import TimeoutError
+
+import pytest
+from hexbytes import HexBytes
+
+from tx_manager import NonceManager, ReceiptTracker, GasModel, payload_items
+
+
+class FakeEth:
+    def __init__(self, mined=0, pending=0):
+        self.counts = {"latest": mined, "pending": pending}
+        self.block_number = 5
+        self.receipts = {}
+
+    def get_transaction_count(self, address, block_identifier):
+        return self.counts[block_identifier]
+
+    def get_transaction_receipt(self, tx_hash):
+        return self.receipts.get(tx_hash)
+
+
+class FakeProvider:
+    def make_batch_request(self, requests):
+        raise ValueError("batches not supported")
+
+
+class StrictBatchProvider:
+    # Batches receipts the way geth does, rejecting hashes without the 0x prefix
+    def __init__(self, receipts):
+        self.receipts = receipts
+
+    def make_batch_request(self, requests):
+        responses = []
+        for method, (tx_hash,) in requests:
+            assert method == "eth_getTransactionReceipt"
+            if not tx_hash.startswith("0x"):
+                responses.append({"error": {"code": -32602, "message": "hex string without 0x prefix"}})
+            else:
+                responses.append({"result": self.receipts.get(tx_hash)})
+        return responses
+
+
+class FakeWeb3:
+    def __init__(self, mined=0, pending=0, provider=None):
+        self.eth = FakeEth(mined, pending)
+        self.provider = provider or FakeProvider()
+
+
+def sent_nonces(manager, count):
+    nonces = [manager.allocate() for _ in range(count)]
+    for nonce in nonces:
+        manager.mark_sent(nonce)
+    return nonces
+
+
+def test_allocates_from_the_pending_count():
+    manager = NonceManager(FakeWeb3(mined=3, pending=5), "0x1")
+    assert [manager.allocate() for _ in range(3)] == [5, 6, 7]
+
+
+def test_released_nonce_is_reused_first():
+    manager = NonceManager(FakeWeb3(pending=5), "0x1")
+    first, second, _ = [manager.allocate() for _ in range(3)]
+    manager.release(first)
+    manager.release(second)
+    assert manager.allocate() == first
+    assert manager.allocate() == second
+    assert manager.allocate() == 8
+
+
+def test_dropped_transaction_is_refilled():
+    web3 = FakeWeb3(mined=5, pending=5)
+    manager = NonceManager(web3, "0x1")
+    assert sent_nonces(manager, 3) == [5, 6, 7]
+
+    # 5 was dropped, and the node lost 6 and 7 behind it
+    manager.release(5)
+    manager.resync("unmined transaction")
+
+    assert [manager.allocate() for _ in range(4)] == [5, 6, 7, 8]
+    assert manager.stats()["gaps_filled"] == 2
+
+
+def test_resync_keeps_nonces_the_node_still_has_pending():
+    web3 = FakeWeb3(mined=5, pending=5)
+    manager = NonceManager(web3, "0x1")
+    sent_nonces(manager, 2)
+
+    # Receipts for 5 and 6 timed out, but both are still in the node's pool
+    web3.eth.counts["pending"] = 7
+    manager.resync("unmined transaction")
+    assert manager.allocate() == 7
+    assert manager.stats()["queued_for_reuse"] == 0
+
+
+def test_resync_keeps_nonces_that_are_not_broadcast_yet():
+    web3 = FakeWeb3(mined=5, pending=5)
+    manager = NonceManager(web3, "0x1")
+    sent_nonces(manager, 2)
+    unsent = manager.allocate()
+
+    manager.release(5)
+    manager.resync("unmined transaction")
+
+    # 7 is still being sent by another thread, so it must not be handed out again
+    assert unsent == 7
+    assert [manager.allocate() for _ in range(3)] == [5, 6, 8]
+
+
+def test_confirmed_nonces_are_not_reused():
+    web3 = FakeWeb3(mined=5, pending=5)
+    manager = NonceManager(web3, "0x1")
+    sent_nonces(manager, 2)
+    manager.confirm(5)
+    manager.confirm(6)
+    web3.eth.counts.update(latest=7, pending=7)
+    manager.resync("requested")
+    assert manager.allocate() == 7
+
+
+def test_receipt_tracker_polls_new_hashes_without_a_new_block():
+    web3 = FakeWeb3()
+    tracker = ReceiptTracker(web3, poll_interval=0.05)
+    # The tracker already saw the block that mines the transaction
+    tracker._last_block = web3.eth.block_number
+    web3.eth.receipts["0xabc"] = {"status": 1}
+
+    assert tracker.wait("0xabc", timeout=2) == {"status": 1}
+    assert tracker.stats()["confirmed"] == 1
+
+
+def test_receipt_tracker_reports_a_late_receipt():
+    web3 = FakeWeb3()
+    tracker = ReceiptTracker(web3, poll_interval=0.05, timeout=0.1)
+    calls = []
+    done = threading.Event()
+
+    def callback(tx_hash, receipt):
+        calls.append((tx_hash, receipt))
+        if receipt is not None:
+            done.set()
+
+    tracker.track("0xabc", callback)
+    with pytest.raises(TimeoutError):
+        tracker.wait("0xabc", timeout=2)
+    assert calls == [("0xabc", None)]
+    assert tracker.stats()["watching_late"] == 1
+
+    # Mined after the tracker gave up on it
+    web3.eth.receipts["0xabc"] = {"status": 1}
+    web3.eth.block_number += 1
+    assert done.wait(2)
+    assert calls == [("0xabc", None), ("0xabc", {"status": 1})]
+    assert tracker.receipt("0xabc") == {"status": 1}
+    assert tracker.stats()["late"] == 1 and tracker.stats()["watching_late"] == 0
+
+
+def test_receipt_tracker_batches_prefixed_hashes():
+    tx_hash = HexBytes("0x" + "ab" * 32)
+    raw = {"status": "0x1", "transactionHash": "0x" + "ab" * 32, "blockNumber": "0x5", "gasUsed": "0x5208"}
+    tracker = ReceiptTracker(FakeWeb3(provider=StrictBatchProvider({"0x" + "ab" * 32: raw})), poll_interval=0.05)
+
+    # HexBytes.hex() leaves the prefix off; the tracker adds it back before asking the node
+    receipt = tracker.wait(tx_hash.hex(), timeout=2)
+    assert receipt.status == 1 and receipt.gasUsed == 21000
+    assert tracker.receipt(tx_hash.to_0x_hex()) == receipt
+    assert tracker.stats()["batched"] is True
+
+
+def test_gas_model_predicts_the_learned_shape_with_margin():
+    model = GasModel(safety_margin=1.25, bucket_size=32)
+    assert model.predict("createTask", 40) is None
+    model.observe("createTask", 40, 100000)
+    assert model.predict("createTask", 50) == 125000
+    assert model.predict("createTask", 70) is None
+
+
+def test_gas_model_keeps_batches_of_different_sizes_apart():
+    model = GasModel()
+    model.observe("createTasks", 320, 300000, items=2)
+    # The same bytes over ten tasks pay ten times the per-task overhead
+    assert model.predict("createTasks", 320, items=10) is None
+    assert model.predict("createTasks", 320, items=2) == 375000
+    assert payload_items((["a", "b", "c"], ["x"])) == 3
+    assert payload_items(("topic",)) == 0
+
+
+def test_gas_model_estimates_again_after_running_out_of_gas():
+    model = GasModel()
+    model.observe("completeTask", 10, 50000)
+    model.record_out_of_gas("completeTask", 10)
+    assert model.predict("completeTask", 10) is None
+    model.observe("completeTask", 10, 70000)
+    assert model.predict("completeTask", 10) == 87500
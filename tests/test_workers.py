@@ -0,0 +1,118 @@
+import time
+import asyncio
+import threading
+
+import pytest
+
+from workers import BatchWriter, WorkerPool, PoolSaturatedError
+
+
+def echo_flush(flushed):
+    def flush(items, reason):
+        flushed.append(([item.payload for item in items], reason))
+        for item in items:
+            item.future.set_result(item.payload * 10)
+    return flush
+
+
+def test_batches_by_size():
+    flushed = []
+    writer = BatchWriter("test", echo_flush(flushed), max_items=3, max_wait=5)
+    futures = [writer.submit(n) for n in range(3)]
+    assert [future.result(timeout=2) for future in futures] == [0, 10, 20]
+    assert flushed == [([0, 1, 2], "size")]
+
+
+def test_flushes_a_partial_batch_after_the_window():
+    flushed = []
+    writer = BatchWriter("test", echo_flush(flushed), max_items=10, max_wait=0.05)
+    assert writer.submit(1).result(timeout=2) == 10
+    assert flushed == [([1], "window")]
+
+
+def test_cost_limit_splits_batches():
+    flushed = []
+    writer = BatchWriter("test", echo_flush(flushed), max_items=10, max_wait=0.2, max_cost=10)
+    futures = [writer.submit(n, cost=6) for n in range(2)]
+    for future in futures:
+        future.result(timeout=2)
+    assert [payloads for payloads, _ in flushed] == [[0], [1]]
+
+
+def test_unresolved_writes_get_the_flush_error():
+    def flush(items, reason):
+        raise ValueError("node down")
+
+    writer = BatchWriter("test", flush, max_items=1)
+    with pytest.raises(ValueError, match="node down"):
+        writer.submit(1).result(timeout=2)
+    assert writer.stats()["failed_batches"] == 1
+
+
+def test_rejects_writes_beyond_max_pending():
+    release = threading.Event()
+
+    def flush(items, reason):
+        release.wait(2)
+        for item in items:
+            item.future.set_result(None)
+
+    writer = BatchWriter("test", flush, max_items=1, max_wait=0, max_pending=2)
+    first = writer.submit(0)
+    # Wait until the first write is being flushed, then fill the queue
+    deadline = time.time() + 2
+    while writer.stats()["flushing"] == 0 and time.time() < deadline:
+        time.sleep(0.01)
+    writer.submit(1)
+    writer.submit(2)
+    with pytest.raises(PoolSaturatedError):
+        writer.submit(3)
+    assert writer.stats()["rejected"] == 1
+    release.set()
+    first.result(timeout=2)
+
+
+def test_flushes_batches_concurrently():
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def flush(items, reason):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.2)
+        with lock:
+            running[0] -= 1
+        for item in items:
+            item.future.set_result(None)
+
+    writer = BatchWriter("test", flush, max_items=1, max_wait=0, max_flushes=3)
+    futures = [writer.submit(n) for n in range(3)]
+    for future in futures:
+        future.result(timeout=2)
+    assert peak[0] == 3
+
+
+def test_process_pool_runs_with_spawned_workers():
+    pool = WorkerPool("test", max_workers=1, kind="process")
+    try:
+        assert asyncio.run(pool.run(pow, 2, 10)) == 1024
+        assert pool._executor._mp_context.get_start_method() == "spawn"
+    finally:
+        pool.shutdown(wait=True)
+
+
+def test_worker_pool_rejects_beyond_its_queue():
+    release = threading.Event()
+    pool = WorkerPool("test", max_workers=1, max_queue=0)
+
+    async def scenario():
+        first = asyncio.ensure_future(pool.run(release.wait, 2))
+        await asyncio.sleep(0.05)
+        with pytest.raises(PoolSaturatedError):
+            await pool.run(time.sleep, 0)
+        release.set()
+        await first
+
+    asyncio.run(scenario())
+    assert pool.stats()["rejected"] == 1
@@ -0,0 +1,211 @@
+"""
+Persistent index of the transactions the server sent
+
+Looking a task up by transaction hash used to need the receipt from the node and an
+in-memory map that was lost on restart. TxIndex records every task a transaction
+carries when the transaction is sent (its topic, result or the chain ID it
+completes) and the IDs the contract assigned once the receipt arrives, in SQLite
+with an LRUCache in front, so our own hashes resolve without an RPC.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+
+from caching import LRUCache
+from payload_codec import decode_result
+from blob_store import BlobAnchor, normalize_digest
+
+COLUMNS = (
+    "tx_hash", "position", "role", "contract", "chain_task_id", "sender", "topic", "result", "result_digest",
+    "result_size", "status", "block_number", "record", "sent_at"
+)
+
+# Task fields a sent transaction may carry
+TASK_FIELDS = ("chain_task_id", "topic", "result", "result_digest", "result_size")
+
+
+def normalize_tx_hash(tx_hash):
+    """Returns a transaction hash as lowercase hex with the 0x prefix"""
+    tx_hash = tx_hash.hex() if isinstance(tx_hash, (bytes, bytearray)) else str(tx_hash)
+    tx_hash = tx_hash.lower()
+    return tx_hash if tx_hash.startswith("0x") else "0x" + tx_hash
+
+
+def sent_result(chain_result):
+    """Returns the index fields of a result as a contract call carries it (a string, packed bytes or a BlobAnchor)"""
+    if isinstance(chain_result, BlobAnchor):
+        return {"result_digest": normalize_digest(chain_result.digest), "result_size": chain_result.size}
+    if isinstance(chain_result, bytes):
+        return {"result": decode_result(chain_result)}
+    return {"result": chain_result}
+
+
+def sent_tasks(function_call):
+    """
+    Returns the role of a contract call in the tx index and the tasks it carries: the
+    topics it creates and the chain IDs and results it completes, in argument order.
+    Calls that carry no task return (None, []).
+    """
+    name, args = function_call.fn_name, list(function_call.args)
+    if name == "createTask":
+        return "create", [{"topic": args[0]}]
+    if name == "createTasks":
+        return "create", [{"topic": topic} for topic in args[0]]
+    if name in ("createAndCompleteTask", "createAndCompleteTaskPacked"):
+        return "create_and_complete", [dict(sent_result(args[1]), topic=args[0])]
+    if name == "createAndAnchorTask":
+        return "create_and_complete", [dict(sent_result(BlobAnchor(*args[1:])), topic=args[0])]
+    if name in ("completeTask", "completeTaskPacked"):
+        return "complete", [dict(sent_result(args[1]), chain_task_id=args[0])]
+    if name == "anchorTask":
+        return "complete", [dict(sent_result(BlobAnchor(*args[1:])), chain_task_id=args[0])]
+    if name in ("completeTasks", "completeTasksPacked"):
+        return "complete", [dict(sent_result(result), chain_task_id=task_id) for task_id, result in zip(*args)]
+    if name == "anchorTasks":
+        return "complete", [
+            dict(sent_result(BlobAnchor(digest, size)), chain_task_id=task_id) for task_id, digest, size in zip(*args)
+        ]
+    return None, []
+
+
+class TxIndex:
+    """
+    SQLite backed map of sent transactions to the tasks they create or complete
+
+    A transaction has one row per task it carries, in argument order: role is create,
+    complete or create_and_complete, and error rows hold the record of a task that
+    failed before anything was sent. The memory front keeps the rows of the most
+    recently used hashes.
+    """
+
+    def __init__(self, path, memory_entries=1024):
+        self.path = path
+        self.memory = LRUCache(max_entries=memory_entries)
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS transactions ("
+            "tx_hash TEXT NOT NULL, position INTEGER NOT NULL, role TEXT NOT NULL, contract TEXT, chain_task_id INTEGER, "
+            "sender TEXT, topic TEXT, result TEXT, result_digest TEXT, result_size INTEGER, "
+            "status TEXT NOT NULL, block_number INTEGER, record TEXT, sent_at REAL NOT NULL, "
+            "PRIMARY KEY (tx_hash, position))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS transactions_task ON transactions (contract, chain_task_id)")
+        self._db.commit()
+
+    def record_sent(self, tx_hash, contract_address, sender, role, tasks):
+        """
+        Records a transaction when it is sent
+
+        Args:
+            tx_hash: Hash of the transaction
+            contract_address: Address of the contract it calls
+            sender: Address that signed it
+            role: create, complete or create_and_complete
+            tasks: One dictionary per task with any of chain_task_id, topic, result,
+                   result_digest and result_size
+        """
+        tx_hash = normalize_tx_hash(tx_hash)
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                f"INSERT OR REPLACE INTO transactions (tx_hash, position, role, contract, sender, {', '.join(TASK_FIELDS)}, "
+                "status, sent_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'sent', ?)",
+                [
+                    (tx_hash, position, role, contract_address.lower(), sender, *(task.get(field) for field in TASK_FIELDS), now)
+                    for position, task in enumerate(tasks)
+                ]
+            )
+            self._db.commit()
+        self.memory.delete(tx_hash)
+
+    def record_receipt(self, tx_hash, status, block_number=None, created_task_ids=()):
+        """
+        Records the outcome of a sent transaction
+
+        Args:
+            tx_hash: Hash of the transaction
+            status: confirmed, reverted, or unconfirmed when no receipt arrived in time
+            block_number: Block the transaction was mined in
+            created_task_ids: IDs from the receipt's TaskCreated events, in log order; they
+                              fill in the chain IDs of the rows that created tasks
+        """
+        tx_hash = normalize_tx_hash(tx_hash)
+        with self._lock:
+            self._db.execute(
+                "UPDATE transactions SET status = ?, block_number = ? WHERE tx_hash = ?", (status, block_number, tx_hash)
+            )
+            if created_task_ids:
+                self._db.executemany(
+                    "UPDATE transactions SET chain_task_id = ? WHERE tx_hash = ? AND position = ? AND chain_task_id IS NULL",
+                    [(task_id, tx_hash, position) for position, task_id in enumerate(created_task_ids)]
+                )
+            self._db.commit()
+        self.memory.delete(tx_hash)
+
+    def record_failed(self, tx_hash, record):
+        """Keeps the record of a task that failed under the hash it was reported with"""
+        tx_hash = normalize_tx_hash(tx_hash)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO transactions (tx_hash, position, role, status, record, sent_at) "
+                "VALUES (?, 0, 'error', 'error', ?, ?)",
+                (tx_hash, json.dumps(record), time.time())
+            )
+            self._db.commit()
+        self.memory.delete(tx_hash)
+
+    def _rows(self, where, params):
+        rows = self._db.execute(f"SELECT {', '.join(COLUMNS)} FROM transactions WHERE {where}", params).fetchall()
+        rows = [dict(zip(COLUMNS, row)) for row in rows]
+        for row in rows:
+            if row["record"] is not None:
+                row["record"] = json.loads(row["record"])
+        return rows
+
+    def get(self, tx_hash):
+        """Returns the rows of a transaction we sent in position order, or None if it isn't ours"""
+        tx_hash = normalize_tx_hash(tx_hash)
+        rows = self.memory.get(tx_hash)
+        if rows is not None:
+            with self._lock:
+                self.hits += 1
+            return rows
+
+        with self._lock:
+            rows = self._rows("tx_hash = ? ORDER BY position", (tx_hash,))
+            if not rows:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self.memory.set(tx_hash, rows)
+        return rows
+
+    def task_rows(self, contract_address, chain_task_id):
+        """Returns the rows of every transaction we sent for a task of a contract, oldest first"""
+        with self._lock:
+            return self._rows("contract = ? AND chain_task_id = ? ORDER BY sent_at", (contract_address.lower(), chain_task_id))
+
+    def stats(self):
+        with self._lock:
+            transactions = self._db.execute("SELECT COUNT(DISTINCT tx_hash) FROM transactions").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "transactions": transactions,
+                "memory_entries": len(self.memory),
+                "memory_hits": self.memory.hits,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0
+            }
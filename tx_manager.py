@@ -0,0 +1,660 @@
+"""
+Transaction plumbing for the contract writes
+
+NonceManager hands out nonces for the service account from memory so several
+transactions can be in flight at once without reading the nonce from the node for
+every send. SignerPool spreads writes over several accounts, each with its own
+nonce sequence. FeeOracle keeps current fee parameters in memory, refreshed in the
+background, so building a transaction needs no fee RPCs. GasModel learns gas limits
+from receipts so most sends skip estimate_gas. ReceiptTracker watches submitted
+transactions from one background loop instead of a blocking wait per transaction.
+"""
+
+import time
+import heapq
+import logging
+import threading
+from collections import deque, OrderedDict
+from concurrent.futures import Future, TimeoutError
+
+from web3.datastructures import AttributeDict
+from web3.exceptions import TransactionNotFound
+from web3._utils.method_formatters import receipt_formatter
+
+from tx_index import normalize_tx_hash
+
+logger = logging.getLogger(__name__)
+
+# Node error messages that mean our idea of the next nonce is wrong
+NONCE_ERRORS = ("nonce too low", "nonce too high", "invalid nonce", "invalid transaction nonce", "replacement transaction underpriced")
+
+
+def is_nonce_error(error):
+    message = str(error).lower()
+    return any(marker in message for marker in NONCE_ERRORS)
+
+
+class NonceManager:
+    """
+    Allocates monotonically increasing nonces for one account
+
+    The first allocation syncs from the node's pending transaction count; after that
+    nonces come from memory. Allocated nonces stay in flight until they are confirmed
+    (mined) or released (never broadcast, or dropped). Released nonces are handed out
+    again before new ones so they don't leave a gap that would stall later transactions.
+    resync() re-reads the pending count after nonce errors or suspected gaps; nonces
+    marked sent that the node no longer counts as pending were lost and are reused.
+    """
+
+    def __init__(self, web3, address):
+        self.web3 = web3
+        self.address = address
+        self._lock = threading.Lock()
+        self._next = None
+        self._in_flight = set()
+        self._sent = set()  # In-flight nonces whose transaction was broadcast
+        self._released = []  # Min-heap of nonces to reuse
+        self.allocated = 0
+        self.confirmed = 0
+        self.released = 0
+        self.resyncs = 0
+        self.gaps_filled = 0
+
+    def allocate(self):
+        """Returns the nonce for the next transaction"""
+        with self._lock:
+            if self._next is None:
+                self._sync(reason="first use")
+
+            if self._released:
+                nonce = heapq.heappop(self._released)
+            else:
+                nonce = self._next
+                self._next += 1
+            self._in_flight.add(nonce)
+            self.allocated += 1
+            return nonce
+
+    def mark_sent(self, nonce):
+        """Marks an in-flight nonce as broadcast, so a resync can tell that the node lost it"""
+        with self._lock:
+            if nonce in self._in_flight:
+                self._sent.add(nonce)
+
+    def confirm(self, nonce):
+        """Marks a nonce as mined"""
+        with self._lock:
+            if nonce in self._in_flight:
+                self._in_flight.discard(nonce)
+                self._sent.discard(nonce)
+                self.confirmed += 1
+
+    def release(self, nonce):
+        """Returns a nonce whose transaction was never broadcast or was dropped so it is reused"""
+        with self._lock:
+            if nonce not in self._in_flight:
+                return
+            self._in_flight.discard(nonce)
+            self._sent.discard(nonce)
+            self.released += 1
+            if self._next is not None and nonce == self._next - 1:
+                self._next -= 1
+            else:
+                heapq.heappush(self._released, nonce)
+
+    def resync(self, reason="requested"):
+        """Re-reads the account's pending transaction count from the node"""
+        with self._lock:
+            self._sync(reason)
+
+    def _sync(self, reason):
+        mined = self.web3.eth.get_transaction_count(self.address, "latest")
+        pending = self.web3.eth.get_transaction_count(self.address, "pending")
+        self.resyncs += 1
+
+        # Nonces below the mined count are settled, whoever used them. Broadcast nonces the
+        # node doesn't count as pending were dropped; only nonces still being sent stay in flight
+        lost = {nonce for nonce in self._sent if nonce >= pending}
+        self._in_flight = {nonce for nonce in self._in_flight if nonce >= mined and nonce not in lost}
+        self._sent = self._sent.intersection(self._in_flight)
+
+        previous = self._next
+        highest = max(self._in_flight, default=-1)
+        self._next = max(pending, highest + 1)
+
+        # Released nonces at or above the new next nonce are handed out in order anyway
+        self._released = [nonce for nonce in self._released if pending <= nonce < self._next]
+        heapq.heapify(self._released)
+        self.gaps_filled += sum(1 for nonce in lost if nonce >= self._next)
+
+        # Nonces between what the node knows about and what we handed out that are
+        # neither in flight nor queued for reuse were lost; reuse them to fill the gap
+        known = self._in_flight.union(self._released)
+        for nonce in range(pending, self._next):
+            if nonce not in known:
+                heapq.heappush(self._released, nonce)
+                self.gaps_filled += 1
+
+        logger.info(f"Nonce resync ({reason}): mined {mined}, pending {pending}, next {previous} -> {self._next}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "next_nonce": self._next,
+                "in_flight": len(self._in_flight),
+                "queued_for_reuse": len(self._released),
+                "allocated": self.allocated,
+                "confirmed": self.confirmed,
+                "released": self.released,
+                "resyncs": self.resyncs,
+                "gaps_filled": self.gaps_filled
+            }
+
+
+class Signer:
+    """A signing account with its own nonce sequence and count of unmined transactions"""
+
+    def __init__(self, web3, account):
+        self.account = account
+        self.address = account.address
+        self.nonce_manager = NonceManager(web3, account.address)
+        self.enabled = True
+        self.pending = 0
+        self.assigned = 0
+
+
+class SignerPool:
+    """
+    Spreads contract writes over several accounts
+
+    One account has a single nonce sequence, so its transactions are mined one after
+    another and a stuck one holds up the rest. Each signer here keeps its own
+    NonceManager. acquire() picks a signer round-robin, or the one with the fewest
+    unmined transactions ("least_pending", ties broken round-robin); the caller hands
+    it back with release() once the transaction is mined or was never sent. Signers
+    that can't write to the contract can be disabled.
+    """
+
+    STRATEGIES = ("round_robin", "least_pending")
+
+    def __init__(self, web3, accounts, strategy="least_pending"):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown signer strategy '{strategy}' (expected one of {', '.join(self.STRATEGIES)})")
+        if not accounts:
+            raise ValueError("A signer pool needs at least one account")
+        self.strategy = strategy
+        self.signers = []
+        for account in accounts:
+            if all(signer.address != account.address for signer in self.signers):
+                self.signers.append(Signer(web3, account))
+        self._lock = threading.Lock()
+        self._next = 0
+
+    def acquire(self):
+        """Returns the signer for the next transaction and counts it as pending"""
+        with self._lock:
+            signers = [signer for signer in self.signers if signer.enabled] or self.signers
+            start = self._next % len(signers)
+            ordered = signers[start:] + signers[:start]
+            signer = min(ordered, key=lambda s: s.pending) if self.strategy == "least_pending" else ordered[0]
+            self._next = start + 1
+            signer.pending += 1
+            signer.assigned += 1
+            return signer
+
+    def release(self, signer):
+        """Marks a transaction of the signer as mined, dropped or never sent"""
+        with self._lock:
+            signer.pending = max(0, signer.pending - 1)
+
+    def disable(self, address, reason):
+        """Stops handing out a signer, unless it is the last one enabled"""
+        with self._lock:
+            enabled = [signer for signer in self.signers if signer.enabled]
+            for signer in enabled:
+                if signer.address.lower() == address.lower() and len(enabled) > 1:
+                    signer.enabled = False
+                    logger.warning(f"Signer {signer.address} disabled: {reason}")
+
+    def __len__(self):
+        return len(self.signers)
+
+    def stats(self):
+        with self._lock:
+            signers = [
+                {
+                    "address": signer.address,
+                    "enabled": signer.enabled,
+                    "pending": signer.pending,
+                    "assigned": signer.assigned
+                }
+                for signer in self.signers
+            ]
+        for signer, entry in zip(self.signers, signers):
+            entry["nonces"] = signer.nonce_manager.stats()
+        return {"strategy": self.strategy, "signers": signers}
+
+
+class FeeOracle:
+    """
+    Keeps current fee parameters in memory, refreshed by a background thread
+
+    EIP-1559 support is detected once from the latest block. Each refresh reads the
+    latest block's base fee and the node's suggested priority fee (or the gas price on
+    legacy chains) and appends them to a bounded fee history. fee_params() answers
+    from memory and only refreshes inline when the data is older than max_age.
+    """
+
+    def __init__(self, web3, ttl=5.0, max_age=30.0, base_fee_multiplier=2.0, history=120):
+        self.web3 = web3
+        self.ttl = ttl
+        self.max_age = max_age
+        self.base_fee_multiplier = base_fee_multiplier
+        self.eip1559 = None
+        self._lock = threading.Lock()
+        self._current = None
+        self._history = deque(maxlen=history)
+        self._stop = threading.Event()
+        self._thread = None
+        self.refreshes = 0
+        self.errors = 0
+
+    def start(self):
+        """Starts the background refresh thread"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="fee-oracle", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"Fee refresh failed: {str(e)}")
+            self._stop.wait(self.ttl)
+
+    def refresh(self):
+        """Reads the current fees from the node"""
+        try:
+            block = self.web3.eth.get_block("latest")
+            if self.eip1559 is None:
+                self.eip1559 = block.get("baseFeePerGas") is not None
+                logger.info(f"EIP-1559 {'supported' if self.eip1559 else 'not supported'} by the node")
+
+            if self.eip1559:
+                try:
+                    priority_fee = self.web3.eth.max_priority_fee
+                except Exception:
+                    # Nodes without eth_maxPriorityFeePerGas
+                    priority_fee = 0
+                sample = {"base_fee": block["baseFeePerGas"], "priority_fee": priority_fee}
+            else:
+                sample = {"gas_price": self.web3.eth.gas_price}
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+
+        sample.update(block=block["number"], timestamp=time.time())
+        with self._lock:
+            self._current = sample
+            self._history.append(sample)
+            self.refreshes += 1
+        return sample
+
+    def fee_params(self):
+        """Returns the fee fields for a transaction, from memory unless the data is stale"""
+        with self._lock:
+            current = self._current
+        if current is None or time.time() - current["timestamp"] > self.max_age:
+            current = self.refresh()
+
+        if "base_fee" in current:
+            return {
+                "maxFeePerGas": int(current["base_fee"] * self.base_fee_multiplier) + current["priority_fee"],
+                "maxPriorityFeePerGas": current["priority_fee"]
+            }
+        return {"gasPrice": current["gas_price"]}
+
+    def history(self):
+        with self._lock:
+            return list(self._history)
+
+    def stats(self):
+        with self._lock:
+            current = self._current
+            return {
+                "eip1559": self.eip1559,
+                "current": current,
+                "age_seconds": round(time.time() - current["timestamp"], 1) if current else None,
+                "refreshes": self.refreshes,
+                "errors": self.errors,
+                "history_size": len(self._history)
+            }
+
+
+def payload_size(args):
+    """Bytes of string and bytes arguments, which dominate the cost of a contract write"""
+    size = 0
+    for arg in args:
+        if isinstance(arg, str):
+            size += len(arg.encode("utf-8"))
+        elif isinstance(arg, (bytes, bytearray)):
+            size += len(arg)
+        elif isinstance(arg, (list, tuple)):
+            size += payload_size(arg)
+    return size
+
+
+def payload_items(args):
+    """Items in the longest array argument, e.g. the tasks of a batch call; 0 if there is none"""
+    return max((len(arg) for arg in args if isinstance(arg, (list, tuple))), default=0)
+
+
+class GasModel:
+    """
+    Learns gas limits from the gasUsed of mined transactions
+
+    Samples are keyed by function name, array length and payload-length bucket. Strings
+    are stored one 32-byte storage word at a time (about 20k gas each), so buckets
+    default to a single word; wider buckets mix payloads whose gas differs by more than
+    the margin. Batch calls also pay a fixed cost per item, so the same payload split
+    over more items is a different shape.
+    A prediction is the largest gasUsed seen for the shape times the safety margin.
+    Shapes that were never seen, or that ran out of gas, return None so the caller
+    falls back to estimate_gas. The model tracks how far its predictions were from
+    the gas actually used.
+    """
+
+    def __init__(self, safety_margin=1.25, bucket_size=32, max_samples=50):
+        self.safety_margin = safety_margin
+        self.bucket_size = bucket_size
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._samples = {}  # (function, items, bucket) -> deque of gasUsed
+        self._untrusted = set()  # Shapes that must be estimated until a new sample arrives
+        self.predictions = 0
+        self.fallbacks = 0
+        self.out_of_gas = 0
+        self._errors = deque(maxlen=500)  # Relative error of the unmargined prediction
+
+    def _key(self, function_name, payload_length, items):
+        return function_name, items, payload_length // self.bucket_size
+
+    def predict(self, function_name, payload_length, items=0):
+        """Returns a gas limit for the shape, or None if it has to be estimated"""
+        key = self._key(function_name, payload_length, items)
+        with self._lock:
+            samples = self._samples.get(key)
+            if not samples or key in self._untrusted:
+                self.fallbacks += 1
+                return None
+            self.predictions += 1
+            return int(max(samples) * self.safety_margin)
+
+    def observe(self, function_name, payload_length, gas_used, predicted_limit=None, items=0):
+        """
+        Records the gas used by a mined transaction
+
+        Args:
+            function_name: Contract function that was called
+            payload_length: payload_size() of its arguments
+            gas_used: gasUsed from the receipt
+            predicted_limit: The limit predict() supplied, if the transaction used one
+            items: payload_items() of its arguments
+        """
+        key = self._key(function_name, payload_length, items)
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.max_samples)).append(gas_used)
+            self._untrusted.discard(key)
+            if predicted_limit:
+                predicted_used = predicted_limit / self.safety_margin
+                self._errors.append((predicted_used - gas_used) / gas_used)
+
+    def record_out_of_gas(self, function_name, payload_length, items=0):
+        """Stops predicting a shape after one of its transactions ran out of gas"""
+        key = self._key(function_name, payload_length, items)
+        with self._lock:
+            self._untrusted.add(key)
+            self.out_of_gas += 1
+        logger.warning(f"{function_name} with a {payload_length} byte payload ran out of gas, estimating it again")
+
+    def stats(self):
+        with self._lock:
+            errors = list(self._errors)
+            return {
+                "shapes": len(self._samples),
+                "safety_margin": self.safety_margin,
+                "bucket_size": self.bucket_size,
+                "predictions": self.predictions,
+                "estimate_fallbacks": self.fallbacks,
+                "out_of_gas": self.out_of_gas,
+                "mean_abs_error_pct": round(100 * sum(abs(e) for e in errors) / len(errors), 2) if errors else None,
+                "max_under_prediction_pct": round(-100 * min(errors), 2) if errors and min(errors) < 0 else 0.0
+            }
+
+
+class ReceiptTracker:
+    """
+    Watches submitted transactions until they are mined
+
+    A background thread checks the block number every poll_interval seconds. When a
+    new block appears, it fetches the receipts of all pending transactions in one
+    JSON-RPC batch (or one by one if the provider can't batch); newly tracked hashes
+    are fetched once right away, since the block that mined them may already have been
+    seen. Each tracked hash has a Future that resolves with its receipt; callbacks run
+    as (tx_hash, receipt) and get receipt None if the transaction is still unmined after
+    timeout seconds. Such a transaction may still be mined, so it is watched for another
+    late_timeout seconds and its callbacks run again with the receipt if one arrives.
+    """
+
+    def __init__(self, web3, poll_interval=1.0, timeout=600, max_resolved=1000, late_timeout=3600):
+        self.web3 = web3
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.late_timeout = late_timeout
+        self.max_resolved = max_resolved
+        self._lock = threading.Lock()
+        self._pending = {}  # tx_hash -> (future, submitted_at)
+        self._unpolled = set()  # Tracked hashes not fetched since they were tracked
+        self._late = {}  # Timed-out tx_hash -> timed_out_at, still watched for a receipt
+        self._callbacks = {}  # Pending or late tx_hash -> callbacks to run again on a late receipt
+        self._resolved = OrderedDict()  # Recently resolved tx_hash -> future
+        self._wake = threading.Event()
+        self._thread = None
+        self._last_block = None
+        self._batch_supported = None
+        self.polls = 0
+        self.confirmed = 0
+        self.reverted = 0
+        self.timed_out = 0
+        self.late = 0
+        self._latencies = deque(maxlen=500)
+
+    def track(self, tx_hash, callback=None):
+        """
+        Starts watching a submitted transaction
+
+        Args:
+            tx_hash: Hex hash of the transaction
+            callback: Optional function called as callback(tx_hash, receipt) once it is mined or timed out
+
+        Returns:
+            A Future that resolves with the receipt
+        """
+        # Nodes reject hashes without the 0x prefix, which HexBytes.hex() leaves off
+        tx_hash = normalize_tx_hash(tx_hash)
+        with self._lock:
+            future = self._future(tx_hash)
+            if future is None:
+                future = Future()
+                self._pending[tx_hash] = (future, time.time())
+                self._unpolled.add(tx_hash)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="receipt-tracker", daemon=True)
+                self._thread.start()
+        if callback is not None:
+            self.add_callback(tx_hash, callback)
+        self._wake.set()
+        return future
+
+    def add_callback(self, tx_hash, callback):
+        """Calls callback(tx_hash, receipt) when the transaction resolves, right away if it already has"""
+        tx_hash = normalize_tx_hash(tx_hash)
+        def done(finished):
+            try:
+                callback(tx_hash, None if finished.exception() else finished.result())
+            except Exception as e:
+                logger.error(f"Receipt callback for {tx_hash} failed: {str(e)}")
+
+        with self._lock:
+            future = self._future(tx_hash)
+            if future is None:
+                raise KeyError(f"Transaction {tx_hash} is not tracked")
+            if tx_hash in self._pending or tx_hash in self._late:
+                self._callbacks.setdefault(tx_hash, []).append(done)
+        future.add_done_callback(done)
+
+    def wait(self, tx_hash, timeout):
+        """Waits up to timeout seconds for the receipt; raises TimeoutError if it isn't mined by then"""
+        tx_hash = normalize_tx_hash(tx_hash)
+        with self._lock:
+            future = self._future(tx_hash)
+        if future is None:
+            future = self.track(tx_hash)
+        return future.result(timeout=timeout)
+
+    def receipt(self, tx_hash):
+        """Returns the receipt of a mined transaction, or None if it isn't known to be mined"""
+        tx_hash = normalize_tx_hash(tx_hash)
+        with self._lock:
+            future = self._future(tx_hash)
+        if future is None or not future.done() or future.exception():
+            return None
+        return future.result()
+
+    def _future(self, tx_hash):
+        if tx_hash in self._pending:
+            return self._pending[tx_hash][0]
+        return self._resolved.get(tx_hash)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            with self._lock:
+                hashes = list(self._pending) + list(self._late)
+                unpolled = [tx_hash for tx_hash in self._pending if tx_hash in self._unpolled]
+            if not hashes:
+                continue
+            try:
+                block = self.web3.eth.block_number
+                if block != self._last_block:
+                    self._poll(hashes)
+                    self._last_block = block
+                elif unpolled:
+                    self._poll(unpolled)
+                self._expire()
+            except Exception as e:
+                logger.warning(f"Receipt polling failed: {str(e)}")
+
+    def _poll(self, hashes):
+        receipts = self._fetch_receipts(hashes)
+        self.polls += 1
+        now = time.time()
+        with self._lock:
+            self._unpolled.difference_update(hashes)
+        for tx_hash, receipt in receipts.items():
+            if receipt is None:
+                continue
+            with self._lock:
+                callbacks = self._callbacks.pop(tx_hash, [])
+                if tx_hash in self._pending:
+                    future, submitted_at = self._pending.pop(tx_hash)
+                    self._latencies.append(now - submitted_at)
+                elif self._late.pop(tx_hash, None) is not None:
+                    # Mined after its callbacks were told it timed out; they run again with the receipt
+                    future = Future()
+                    for callback in callbacks:
+                        future.add_done_callback(callback)
+                    self.late += 1
+                else:
+                    continue
+                self._remember(tx_hash, future)
+                if receipt["status"] == 1:
+                    self.confirmed += 1
+                else:
+                    self.reverted += 1
+            future.set_result(receipt)
+
+    def _expire(self):
+        now = time.time()
+        with self._lock:
+            expired = [tx_hash for tx_hash, (_, submitted_at) in self._pending.items() if now - submitted_at > self.timeout]
+            futures = []
+            for tx_hash in expired:
+                future, _ = self._pending.pop(tx_hash)
+                self._unpolled.discard(tx_hash)
+                self._remember(tx_hash, future)
+                self._late[tx_hash] = now
+                self.timed_out += 1
+                futures.append((tx_hash, future))
+            for tx_hash in [tx_hash for tx_hash, timed_out_at in self._late.items() if now - timed_out_at > self.late_timeout]:
+                del self._late[tx_hash]
+                self._callbacks.pop(tx_hash, None)
+        for tx_hash, future in futures:
+            logger.warning(f"Transaction {tx_hash} not mined after {self.timeout}s")
+            future.set_exception(TimeoutError(f"Transaction {tx_hash} not mined after {self.timeout}s"))
+
+    def _remember(self, tx_hash, future):
+        self._resolved[tx_hash] = future
+        while len(self._resolved) > self.max_resolved:
+            self._resolved.popitem(last=False)
+
+    def _fetch_receipts(self, hashes):
+        if self._batch_supported is not False:
+            try:
+                responses = self.web3.provider.make_batch_request(
+                    [("eth_getTransactionReceipt", [tx_hash]) for tx_hash in hashes]
+                )
+                if not isinstance(responses, list):
+                    raise ValueError(f"Batch request failed: {responses}")
+                self._batch_supported = True
+                receipts = {}
+                for tx_hash, response in zip(hashes, responses):
+                    raw = response.get("result")
+                    receipts[tx_hash] = AttributeDict.recursive(receipt_formatter(raw)) if raw else None
+                return receipts
+            except Exception as e:
+                if self._batch_supported:
+                    raise
+                logger.info(f"Provider does not support batch requests, polling receipts one by one ({str(e)})")
+                self._batch_supported = False
+
+        receipts = {}
+        for tx_hash in hashes:
+            try:
+                receipts[tx_hash] = self.web3.eth.get_transaction_receipt(tx_hash)
+            except TransactionNotFound:
+                receipts[tx_hash] = None
+        return receipts
+
+    def stats(self):
+        with self._lock:
+            latencies = list(self._latencies)
+            return {
+                "pending": len(self._pending),
+                "confirmed": self.confirmed,
+                "reverted": self.reverted,
+                "timed_out": self.timed_out,
+                "late": self.late,
+                "watching_late": len(self._late),
+                "polls": self.polls,
+                "last_block": self._last_block,
+                "batched": self._batch_supported,
+                "avg_confirmation_seconds": round(sum(latencies) / len(latencies), 3) if latencies else None
+            }
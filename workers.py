@@ -0,0 +1,454 @@
+"""
+Bounded worker pools for the blocking stages of task processing
+
+The CrewAI analysis and the blockchain writes are synchronous and can take tens of
+seconds. Running them on a worker pool keeps the FastAPI event loop free, and the
+bounded queue makes the server shed load instead of piling up work. BatchWriter
+coalesces individual writes so several tasks can share one transaction.
+"""
+
+import time
+import asyncio
+import logging
+import threading
+import multiprocessing
+from collections import deque, Counter
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturatedError(Exception):
+    """Raised when a worker pool has no free worker and its queue is full"""
+
+    def __init__(self, pool_name, retry_after=5):
+        super().__init__(f"Worker pool '{pool_name}' is at capacity, try again later")
+        self.pool_name = pool_name
+        self.retry_after = retry_after
+
+
+# Module level so it can be pickled for process pools
+def _timed_call(fn, args, kwargs, on_start=None):
+    started_at = time.time()
+    if on_start is not None:
+        on_start()
+    return started_at, fn(*args, **kwargs)
+
+
+class WorkerPool:
+    """
+    Runs blocking functions on a thread or process pool with a concurrency limit
+
+    At most max_workers calls run at once and at most max_queue more wait for a
+    worker. Anything beyond that is rejected with PoolSaturatedError. Process pools
+    start their workers with spawn: they are started on first use, after the server's
+    background threads, and a forked child could inherit a lock one of them held.
+    """
+
+    def __init__(self, name, max_workers=4, max_queue=16, kind="thread"):
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+
+        if kind == "process":
+            self._executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+        elif kind == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-worker")
+        else:
+            raise ValueError(f"Unknown executor kind '{kind}' for pool {name} (expected 'thread' or 'process')")
+
+        self._lock = threading.Lock()
+        self._pending = 0  # Queued plus running
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._total_run = 0.0
+
+    def is_saturated(self):
+        """Returns True if a new job would be rejected right now"""
+        with self._lock:
+            return self._pending >= self.max_workers + self.max_queue
+
+    async def run(self, fn, *args, on_start=None, **kwargs):
+        """
+        Runs fn(*args, **kwargs) on the pool and waits for the result without blocking the event loop
+
+        Args:
+            fn: The blocking function to run
+            on_start: Optional callback invoked when a worker picks the job up. Callbacks can't
+                cross process boundaries, so process pools invoke it on submission instead.
+
+        Raises:
+            PoolSaturatedError: If all workers are busy and the queue is full
+        """
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                logger.warning(f"Worker pool {self.name} rejected a job ({self._pending} pending)")
+                raise PoolSaturatedError(self.name)
+            self._pending += 1
+            self._submitted += 1
+
+        enqueued_at = time.time()
+        try:
+            loop = asyncio.get_running_loop()
+            if on_start is not None and self.kind == "process":
+                on_start()
+                on_start = None
+            started_at, result = await loop.run_in_executor(self._executor, _timed_call, fn, args, kwargs, on_start)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+                self._failed += 1
+            raise
+
+        finished_at = time.time()
+        wait = max(0.0, started_at - enqueued_at)
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+            self._total_run += finished_at - started_at
+        return result
+
+    def stats(self):
+        """Returns queue depth, active workers and wait time figures for sizing the pool"""
+        with self._lock:
+            finished = self._completed
+            return {
+                "executor": self.kind,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active_workers": min(self._pending, self.max_workers),
+                "queue_depth": max(0, self._pending - self.max_workers),
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "avg_wait_seconds": round(self._total_wait / finished, 3) if finished else 0.0,
+                "max_wait_seconds": round(self._max_wait, 3),
+                "avg_run_seconds": round(self._total_run / finished, 3) if finished else 0.0
+            }
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into a single run
+
+    The first caller for a key runs the work; callers that arrive while it is in
+    flight wait for the same result instead of starting another run. Must be used
+    from a single event loop.
+    """
+
+    def __init__(self, history=50):
+        self._inflight = {}
+        self._recent = deque(maxlen=history)
+        self.runs = 0
+        self.coalesced = 0
+        self.max_waiters = 0
+
+    def in_flight(self, key):
+        """Returns True if a run for key is in progress"""
+        return key in self._inflight
+
+    async def do(self, key, fn):
+        """
+        Runs fn() for key unless an identical call is already in flight
+
+        Args:
+            key: Identifies identical work
+            fn: Zero-argument coroutine function doing the work
+
+        Returns:
+            A (result, shared) tuple; shared is True when the caller joined another run
+        """
+        call = self._inflight.get(key)
+        if call is not None:
+            call["waiters"] += 1
+            self.coalesced += 1
+            logger.info(f"Joined in-flight run for {key} ({call['waiters']} waiters)")
+            # Shield so a cancelled waiter doesn't cancel the shared run
+            return await asyncio.shield(call["future"]), True
+
+        future = asyncio.get_running_loop().create_future()
+        call = {"future": future, "waiters": 0, "started_at": time.time()}
+        self._inflight[key] = call
+        self.runs += 1
+
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            if call["waiters"] == 0:
+                future.exception()  # Mark as retrieved, nobody else is waiting
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            del self._inflight[key]
+            self.max_waiters = max(self.max_waiters, call["waiters"])
+            self._recent.append({
+                "key": key,
+                "waiters": call["waiters"],
+                "duration_seconds": round(time.time() - call["started_at"], 3)
+            })
+            if call["waiters"]:
+                logger.info(f"Run for {key} served {call['waiters']} coalesced waiters")
+
+    def stats(self):
+        return {
+            "in_flight": len(self._inflight),
+            "runs": self.runs,
+            "coalesced_requests": self.coalesced,
+            "max_waiters": self.max_waiters,
+            "recent_runs": list(self._recent)
+        }
+
+
+class CommitQueue:
+    """
+    Single consumer queue in front of a worker pool
+
+    Callers submit blocking work and await its result; one consumer hands the items
+    to the pool one at a time. Batches can queue any number of commits without
+    filling the pool's own bounded queue, and commits from different batches are
+    written in submission order. Must be used from a single event loop.
+    """
+
+    def __init__(self, pool, retry_delay=0.5):
+        self.pool = pool
+        self.retry_delay = retry_delay
+        self._queue = None
+        self._consumer = None
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+
+    async def submit(self, fn, *args, **kwargs):
+        """Queues fn(*args, **kwargs) for the pool and waits for its result"""
+        if self._consumer is None or self._consumer.done():
+            self._queue = asyncio.Queue()
+            self._consumer = asyncio.create_task(self._consume())
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((fn, args, kwargs, future))
+        self.submitted += 1
+        return await future
+
+    async def _consume(self):
+        while True:
+            fn, args, kwargs, future = await self._queue.get()
+            while True:
+                try:
+                    result = await self.pool.run(fn, *args, **kwargs)
+                except PoolSaturatedError:
+                    # Other requests filled the pool; wait instead of failing the commit
+                    await asyncio.sleep(self.retry_delay)
+                    continue
+                except Exception as e:
+                    self.failed += 1
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    self.completed += 1
+                    if not future.done():
+                        future.set_result(result)
+                break
+
+    def stats(self):
+        return {
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed
+        }
+
+
+class PendingWrite:
+    """An item waiting in a BatchWriter; flush functions resolve its future"""
+
+    def __init__(self, payload, cost):
+        self.payload = payload
+        self.cost = cost
+        self.future = Future()
+        self.queued_at = time.time()
+
+
+class BatchWriter:
+    """
+    Coalesces individual writes into batches flushed from a background thread
+
+    A batch is flushed when it holds max_items writes, when its oldest write has
+    waited max_wait seconds, or when the next write would push the batch's total
+    cost (e.g. estimated gas) past max_cost. flush(items, reason) receives the
+    PendingWrite items, resolves each item's future and may return a dictionary of
+    details that is kept with the batch in stats(). Futures it leaves unresolved get
+    the exception it raised, or a RuntimeError.
+
+    Up to max_flushes batches are flushed at once on flush threads, so a batch waiting
+    for its receipts doesn't hold up the next one; while all of them are busy, writes
+    keep collecting into the next batch. At most max_pending writes wait for a batch,
+    beyond that submit() raises PoolSaturatedError.
+
+    Args:
+        name: Name used in logs and stats
+        flush: Function called as flush(items, reason) on a flush thread
+        max_items: Largest batch
+        max_wait: Seconds the first write of a batch waits for others
+        max_cost: Largest total cost of a batch, or a function returning it; None for no limit
+        max_pending: Most writes waiting for a batch; None for no limit
+        max_flushes: Most batches flushed at once
+        history: Number of recent batches kept for stats
+    """
+
+    def __init__(self, name, flush, max_items=16, max_wait=0.5, max_cost=None, max_pending=None, max_flushes=1, history=50):
+        self.name = name
+        self.flush = flush
+        self.max_items = max_items
+        self.max_wait = max_wait
+        self.max_cost = max_cost
+        self.max_pending = max_pending
+        self.max_flushes = max_flushes
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._pending = deque()
+        self._thread = None
+        self._flush_slots = threading.Semaphore(max_flushes)
+        self._flusher = ThreadPoolExecutor(max_workers=max_flushes, thread_name_prefix=f"{name}-flush")
+        self._recent = deque(maxlen=history)
+        self.submitted = 0
+        self.rejected = 0
+        self.flushing = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.reasons = Counter()
+
+    def submit(self, payload, cost=0):
+        """
+        Queues a write and returns a Future for its result
+
+        Raises:
+            PoolSaturatedError: If max_pending writes are already waiting
+        """
+        item = PendingWrite(payload, cost)
+        with self._lock:
+            if self.max_pending is not None and len(self._pending) >= self.max_pending:
+                self.rejected += 1
+                logger.warning(f"{self.name} writer rejected a write ({len(self._pending)} pending)")
+                raise PoolSaturatedError(self.name)
+            self._pending.append(item)
+            self.submitted += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f"{self.name}-writer", daemon=True)
+                self._thread.start()
+            self._ready.notify()
+        return item.future
+
+    def _cost_limit(self):
+        return self.max_cost() if callable(self.max_cost) else self.max_cost
+
+    def _take_batch(self):
+        # Called with the lock held once at least one write is pending
+        limit = self._cost_limit()
+        batch, cost = [], 0
+        while self._pending and len(batch) < self.max_items:
+            item = self._pending[0]
+            if batch and limit is not None and cost + item.cost > limit:
+                return batch, "cost"
+            batch.append(self._pending.popleft())
+            cost += item.cost
+        if len(batch) >= self.max_items:
+            return batch, "size"
+        return batch, "cost" if self._pending else "window"
+
+    def _run(self):
+        while True:
+            # Wait for a free flush thread first; writes keep collecting meanwhile
+            self._flush_slots.acquire()
+            with self._lock:
+                while not self._pending:
+                    self._ready.wait()
+                # Give the batch until its oldest write has waited max_wait to fill up
+                while len(self._pending) < self.max_items and not self._over_cost():
+                    remaining = self._pending[0].queued_at + self.max_wait - time.time()
+                    if remaining <= 0:
+                        break
+                    self._ready.wait(remaining)
+                batch, reason = self._take_batch()
+                self.flushing += 1
+            self._flusher.submit(self._flush_in_slot, batch, reason)
+
+    def _flush_in_slot(self, batch, reason):
+        try:
+            self._flush(batch, reason)
+        finally:
+            with self._lock:
+                self.flushing -= 1
+            self._flush_slots.release()
+
+    def _over_cost(self):
+        limit = self._cost_limit()
+        return limit is not None and sum(item.cost for item in self._pending) > limit
+
+    def _flush(self, batch, reason):
+        started_at = time.time()
+        details, error = None, None
+        try:
+            details = self.flush(batch, reason)
+        except Exception as e:
+            logger.error(f"{self.name} batch of {len(batch)} failed: {str(e)}")
+            error = e
+        for item in batch:
+            if not item.future.done():
+                item.future.set_exception(error or RuntimeError(f"{self.name} batch did not resolve this write"))
+
+        record = {
+            "size": len(batch),
+            "reason": reason,
+            "cost": sum(item.cost for item in batch),
+            "waited_seconds": round(started_at - batch[0].queued_at, 3),
+            "flush_seconds": round(time.time() - started_at, 3),
+            "finished_at": time.time()
+        }
+        if details:
+            record.update(details)
+        if error is not None:
+            record["error"] = str(error)
+        with self._lock:
+            self.batches += 1
+            if error is not None:
+                self.failed_batches += 1
+            self.reasons[reason] += 1
+            self._recent.append(record)
+        logger.info(f"{self.name} flushed {len(batch)} writes ({reason}) in {record['flush_seconds']}s")
+
+    def stats(self):
+        with self._lock:
+            recent = list(self._recent)
+            return {
+                "pending": len(self._pending),
+                "flushing": self.flushing,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "batches": self.batches,
+                "failed_batches": self.failed_batches,
+                "avg_batch_size": round(sum(r["size"] for r in recent) / len(recent), 2) if recent else 0.0,
+                "flush_reasons": dict(self.reasons),
+                "max_items": self.max_items,
+                "max_wait": self.max_wait,
+                "max_pending": self.max_pending,
+                "max_flushes": self.max_flushes,
+                "recent_batches": recent[-10:]
+            }